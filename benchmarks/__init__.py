@@ -0,0 +1,3 @@
+"""
+This module provides benchmarks for the game and the simulation core.
+"""
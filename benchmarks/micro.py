@@ -0,0 +1,286 @@
+"""
+Micro-benchmarks for the game's hot primitives, each run at several sizes.
+
+Every benchmark reports the min and median time per operation. Results can be stored as a
+baseline and later runs compared against it, so optimizations are measured, not guessed.
+
+Usage: python -m benchmarks.micro --save-baseline .data/benchmarks/micro-base.json
+       python -m benchmarks.micro --baseline .data/benchmarks/micro-base.json
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.results import (compare, environment, load_results,
+                                print_regressions, save_results)
+from engine import GameSnapshot
+from events.events import ShortcutRevealEvent
+from main import LabyRunGame
+from maze.maze_generation import FindUnion, MazeGenerator
+from stats import StatsManager
+from stats.player_stats import PlayerStats
+
+
+def prepare_match(game, size):
+    """Starts a match on a size x size maze."""
+    game.settings.set_maze_size(size, size)
+    game.game_state.run_game()
+
+
+def bench_generate_maze(_game, size):
+    """MazeGenerator.generate_maze on a size x size maze."""
+    rng = random.Random(0)
+    return lambda: MazeGenerator.generate_maze(size, size, rng), 1
+
+
+def bench_find_union(_game, size):
+    """size unions followed by size finds on a fresh FindUnion."""
+    rng = random.Random(0)
+    pairs = [(rng.randrange(size), rng.randrange(size)) for _ in range(size)]
+
+    def run():
+        sets = FindUnion(range(size))
+        for first, second in pairs:
+            sets.union(first, second)
+        for item in range(size):
+            sets.find(item)
+
+    return run, 2 * size
+
+
+def bench_check_collision(game, size):
+    """Maze.check_collision for player-sized rectangles all over the maze."""
+    prepare_match(game, size)
+    maze = game.maze
+    rng = random.Random(0)
+    player = game.player1
+    rects = []
+    for _ in range(1000):
+        rect = player.rect.copy()
+        rect.x = maze.offset_x + rng.randrange(maze.maze_width - rect.width)
+        rect.y = maze.offset_y + rng.randrange(maze.maze_height - rect.height)
+        rects.append(rect)
+
+    def run():
+        for rect in rects:
+            maze.check_collision(rect)
+
+    return run, len(rects)
+
+
+def bench_player_update(game, size):
+    """Player.update with random movement, 1000 ticks from the start position."""
+    prepare_match(game, size)
+    player = game.player1
+    rng = random.Random(0)
+    inputs = [rng.randrange(16) for _ in range(1000)]
+
+    def run():
+        player.reset()
+        for input_mask in inputs:
+            player.set_input(input_mask)
+            player.update()
+
+    return run, len(inputs)
+
+
+def bench_push_out_of_wall(game, size):
+    """Player.push_out_of_wall for a player overlapping walls next to corridors."""
+    prepare_match(game, size)
+    maze = game.maze
+    player = game.player1
+    block = maze.block_size
+    positions = []
+    for row in range(1, len(maze.maze) - 1):
+        for col in range(1, len(maze.maze[0]) - 1):
+            if maze.maze[row][col] == 1 and maze.maze[row][col + 1] == 0:
+                # Half inside the wall, half inside the corridor to its right
+                positions.append(
+                    (
+                        maze.offset_x + col * block + block - player.width // 2,
+                        maze.offset_y + row * block + (block - player.height) // 2,
+                    )
+                )
+    positions = positions[:200]
+
+    def run():
+        for x, y in positions:
+            player.teleport(x, y)
+            player.push_out_of_wall()
+
+    return run, len(positions)
+
+
+def bench_generate_power_ups(game, size):
+    """Maze.generate_power_ups on a size x size maze."""
+    prepare_match(game, size)
+    maze = game.maze
+
+    def run():
+        maze.power_ups.empty()
+        maze.generate_power_ups()
+
+    return run, 1
+
+
+def bench_update_fog_of_war(game, size):
+    """Maze.update_fog_of_war on a size x size maze."""
+    prepare_match(game, size)
+    return game.maze.update_fog_of_war, 1
+
+
+def bench_snapshot_save(game, size):
+    """GameSnapshot.save on a size x size maze."""
+    prepare_match(game, size)
+    snapshot = GameSnapshot()
+    return lambda: snapshot.save(game), 1
+
+
+def bench_snapshot_restore(game, size):
+    """
+    GameSnapshot.restore on a size x size maze, alternating between a snapshot taken
+    before a Shortcut Reveal event and one taken while it is active.
+    """
+    prepare_match(game, size)
+    before = GameSnapshot()
+    before.save(game)
+    event = ShortcutRevealEvent()
+    event.activate(game)
+    game.event_manager.active_events.append(event)
+    during = GameSnapshot()
+    during.save(game)
+
+    def run():
+        before.restore(game)
+        during.restore(game)
+
+    return run, 2
+
+
+def bench_get_leaderboard(_game, size):
+    """StatsManager.get_leaderboard with size players."""
+    rng = random.Random(0)
+    path = os.path.join(tempfile.gettempdir(), "labyrun-micro-stats.json")
+    if os.path.exists(path):
+        os.remove(path)
+    manager = StatsManager(path)
+    for index in range(size):
+        games = rng.randint(1, 50)
+        manager.players[f"Player {index}"] = PlayerStats(
+            player_name=f"Player {index}",
+            games_played=games,
+            games_won=rng.randint(0, games),
+            avg_game_time=rng.uniform(10, 120),
+            fastest_win=rng.uniform(5, 60),
+        )
+    return manager.get_leaderboard, 1
+
+
+# (name, factory, sizes); a factory returns (callable, operations per call)
+BENCHMARKS = [
+    ("MazeGenerator.generate_maze", bench_generate_maze, [7, 15, 31, 55, 103]),
+    ("FindUnion.union+find", bench_find_union, [100, 1000, 10000]),
+    ("Maze.check_collision", bench_check_collision, [7, 31, 55]),
+    ("Player.update", bench_player_update, [7, 31, 55]),
+    ("Player.push_out_of_wall", bench_push_out_of_wall, [7, 31, 55]),
+    ("Maze.generate_power_ups", bench_generate_power_ups, [7, 31, 55]),
+    ("Maze.update_fog_of_war", bench_update_fog_of_war, [31]),
+    ("GameSnapshot.save", bench_snapshot_save, [7, 31, 55]),
+    ("GameSnapshot.restore", bench_snapshot_restore, [7, 31, 55]),
+    ("StatsManager.get_leaderboard", bench_get_leaderboard, [10, 100, 1000]),
+]
+
+
+def measure(function, operations, repeat, min_time):
+    """
+    Calls function in batches lasting at least min_time seconds, repeat times.
+    Returns the min and median time per operation in microseconds.
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        if time.perf_counter() - start >= min_time:
+            break
+        number *= 2
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        timings.append((time.perf_counter() - start) / (number * operations) * 1e6)
+
+    return {"min_us": min(timings), "median_us": statistics.median(timings)}
+
+
+def parse_args():
+    """Parses the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--filter", default="", help="only run benchmarks whose name contains this"
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.05,
+        help="minimum seconds per measured batch",
+    )
+    parser.add_argument("--output", default=".data/benchmarks/micro.json")
+    parser.add_argument(
+        "--save-baseline", default=None, metavar="FILE", help="store results as baseline"
+    )
+    parser.add_argument(
+        "--baseline", default=None, metavar="FILE", help="baseline to compare against"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="relative slowdown reported as a regression",
+    )
+    return parser.parse_args()
+
+
+def main():
+    """Runs the micro-benchmarks, writes the results and compares them with a baseline."""
+    args = parse_args()
+    game = LabyRunGame(headless=True, seed=0)
+    results = {}
+
+    print(f"{'benchmark':<40} {'min us/op':>12} {'median us/op':>13}")
+    for name, factory, sizes in BENCHMARKS:
+        if args.filter not in name:
+            continue
+        for size in sizes:
+            key = f"{name}[{size}]"
+            function, operations = factory(game, size)
+            results[key] = measure(function, operations, args.repeat, args.min_time)
+            print(
+                f"{key:<40} {results[key]['min_us']:12.3f} "
+                f"{results[key]['median_us']:13.3f}"
+            )
+
+    output = {"environment": environment(), "benchmarks": results}
+    save_results(args.output, output)
+    print(f"Results written to {args.output}")
+    if args.save_baseline:
+        save_results(args.save_baseline, output)
+        print(f"Baseline written to {args.save_baseline}")
+
+    if args.baseline:
+        baseline = load_results(args.baseline)["benchmarks"]
+        regressions = compare(results, baseline, ("median_us",), args.threshold)
+        if print_regressions(regressions, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
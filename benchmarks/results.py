@@ -0,0 +1,85 @@
+"""
+This module contains helpers shared by the benchmarks: summarizing timing samples, writing
+results files and comparing them against a stored baseline.
+"""
+
+import json
+import os
+import platform
+import sys
+
+from engine.profiler import percentile
+
+
+def summarize(samples, scale=1000):
+    """
+    Returns mean, p50, p95, p99 and max of the samples, multiplied by scale
+    (seconds to milliseconds by default).
+    """
+    ordered = sorted(samples)
+    if not ordered:
+        return {"mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    return {
+        "mean": sum(ordered) / len(ordered) * scale,
+        "p50": percentile(ordered, 0.5) * scale,
+        "p95": percentile(ordered, 0.95) * scale,
+        "p99": percentile(ordered, 0.99) * scale,
+        "max": ordered[-1] * scale,
+    }
+
+
+def environment():
+    """Describes the machine, so results from different machines are not mixed up."""
+    return {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+    }
+
+
+def save_results(path, results):
+    """Writes a results dict as JSON."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=4)
+
+
+def load_results(path):
+    """Reads a results file written by save_results."""
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def compare(current, baseline, metrics, threshold=0.1):
+    """
+    Compares the given metrics of every benchmark present in both result sets.
+    current and baseline map benchmark names to dicts of metric values (lower is better).
+    Returns a list of (name, metric, baseline value, current value, relative change) for
+    the metrics that got worse by more than threshold.
+    """
+    regressions = []
+    for name, values in current.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        for metric in metrics:
+            old, new = reference.get(metric), values.get(metric)
+            if old is None or new is None or old <= 0:
+                continue
+            change = (new - old) / old
+            if change > threshold:
+                regressions.append((name, metric, old, new, change))
+    return regressions
+
+
+def print_regressions(regressions, threshold):
+    """Prints the regressions found by compare. Returns True if there were any."""
+    if not regressions:
+        print(f"No regressions above {threshold:.0%} against the baseline.")
+        return False
+
+    print(f"Regressions above {threshold:.0%} against the baseline:")
+    for name, metric, old, new, change in regressions:
+        print(f"  {name} {metric}: {old:.3f} -> {new:.3f} ({change:+.0%})")
+    return True
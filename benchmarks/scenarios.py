@@ -0,0 +1,235 @@
+"""
+Plays scripted or replayed matches through the full frame loop (input, simulation and
+rendering) on every maze size, with every combination of fog, power-ups and events.
+
+Records mean/p95/p99 frame times, maze generation time and peak memory per scenario into a
+JSON file, and flags regressions against a baseline results file.
+
+Usage: python -m benchmarks.scenarios --frames 300 --baseline .data/benchmarks/base.json
+"""
+
+import argparse
+import itertools
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+from benchmarks.results import (compare, environment, load_results,
+                                print_regressions, save_results, summarize)
+from engine import RandomWalkController, Replay, ReplayPlayer
+from main import LabyRunGame
+from menu.settings_pages import MAZE_SIZES
+
+FEATURES = ("fog", "power_ups", "events")
+COMPARED_METRICS = ("frame_mean_ms", "frame_p95_ms", "frame_p99_ms", "maze_generation_ms")
+
+
+def scenario_name(size, features):
+    """Returns e.g. "31x31+fog+events", or "31x31" without features."""
+    return "+".join([f"{size}x{size}", *features])
+
+
+def configure(game, size, features):
+    """Applies a maze size and feature combination to the game's settings."""
+    settings = game.settings
+    settings.set_maze_size(size, size)
+    settings.fog_of_war_enabled = "fog" in features
+    settings.power_ups_enabled = "power_ups" in features
+    settings.events_enabled = "events" in features
+
+
+class ScriptedDriver:
+    """Drives both players with seeded random walks."""
+
+    def __init__(self, game, seed):
+        self.game = game
+        self.controllers = [RandomWalkController(seed), RandomWalkController(seed + 1)]
+
+    def start(self):
+        """Starts a match."""
+        self.game.game_state.run_game()
+
+    def before_frame(self):
+        """Sets the players' inputs for the coming frame."""
+        engine = self.game.engine
+        for player, controller in zip(
+            (self.game.player1, self.game.player2), self.controllers
+        ):
+            player.set_input(controller.get_input(player, engine.tick))
+
+
+class ReplayDriver:
+    """Drives both players from a replay file, restarting it when it ends."""
+
+    def __init__(self, game, replay):
+        self.game = game
+        self.replay = replay
+
+    def start(self):
+        """Starts the replayed match from its beginning."""
+        self.game.engine.replay = ReplayPlayer(self.replay)
+        self.game.game_state.run_game()
+
+    def before_frame(self):
+        """Replayed inputs are applied by the engine itself."""
+
+
+def time_match_start(driver, runs):
+    """Returns the median time in seconds of starting a match, which builds a maze."""
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        driver.start()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def play(game, driver, frames):
+    """
+    Starts a match and plays the given number of frames, each advancing the simulation
+    by one tick. Returns the frame times in seconds.
+    """
+    engine = game.engine
+    driver.start()
+
+    frame_times = []
+    for _ in range(frames):
+        if game.game_state.get_current_state() != "running":
+            driver.start()  # The match ended, start another one outside the timing
+
+        start = time.perf_counter()
+        driver.before_frame()
+        engine.frame(engine.time_step)
+        frame_times.append(time.perf_counter() - start)
+
+    return frame_times
+
+
+def measure_memory(game, driver, frames):
+    """Returns the peak traced memory in KiB of starting a match and playing frames."""
+    tracemalloc.start()
+    try:
+        play(game, driver, frames)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def run_scenario(game, driver, frames, memory_frames, generation_runs=5):
+    """Benchmarks one scenario and returns its results."""
+    # Memory is traced in a separate pass since tracemalloc slows everything down
+    peak_memory = measure_memory(game, driver, memory_frames)
+    generation = time_match_start(driver, generation_runs)
+    frame_times = play(game, driver, frames)
+    frame_stats = summarize(frame_times)
+
+    return {
+        "maze_generation_ms": generation * 1000,
+        **{f"frame_{name}_ms": value for name, value in frame_stats.items()},
+        "fps": 1000 / frame_stats["mean"] if frame_stats["mean"] > 0 else 0.0,
+        "peak_memory_kib": peak_memory,
+        "frames": frames,
+    }
+
+
+def print_result(name, result):
+    """Prints one row of the results table."""
+    print(
+        f"{name:<40} {result['frame_mean_ms']:8.2f} {result['frame_p95_ms']:8.2f} "
+        f"{result['frame_p99_ms']:8.2f} {result['fps']:8.0f} "
+        f"{result['maze_generation_ms']:8.1f} {result['peak_memory_kib']:9.0f}"
+    )
+
+
+def parse_args():
+    """Parses the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=MAZE_SIZES,
+        help="square maze sizes to play, the GameMenu sizes by default",
+    )
+    parser.add_argument(
+        "--features",
+        nargs="*",
+        choices=FEATURES,
+        default=FEATURES,
+        help="features whose on/off combinations are benchmarked",
+    )
+    parser.add_argument(
+        "--replay",
+        nargs="+",
+        default=None,
+        metavar="FILE",
+        help="benchmark these replay files instead of scripted matches",
+    )
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--memory-frames", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=".data/benchmarks/scenarios.json")
+    parser.add_argument(
+        "--baseline", default=None, help="results file to compare against"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="relative slowdown reported as a regression",
+    )
+    return parser.parse_args()
+
+
+def main():
+    """Runs the scenarios, writes the results and compares them with the baseline."""
+    args = parse_args()
+    scenarios = {}
+
+    print(
+        f"{'scenario':<40} {'mean ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'fps':>8} "
+        f"{'gen ms':>8} {'peak KiB':>9}"
+    )
+    if args.replay:
+        for path in args.replay:
+            replay = Replay.load(path)
+            game = LabyRunGame(headless=True, resolution=replay.resolution)
+            replay.apply_settings(game)
+            frames = min(args.frames, replay.end_tick)
+            name = f"replay:{os.path.basename(path)}"
+            scenarios[name] = run_scenario(
+                game, ReplayDriver(game, replay), frames, args.memory_frames
+            )
+            print_result(name, scenarios[name])
+    else:
+        game = LabyRunGame(headless=True, seed=args.seed)
+        combinations = [
+            features
+            for count in range(len(args.features) + 1)
+            for features in itertools.combinations(args.features, count)
+        ]
+        for size in args.sizes:
+            for features in combinations:
+                name = scenario_name(size, features)
+                configure(game, size, features)
+                driver = ScriptedDriver(game, args.seed)
+                scenarios[name] = run_scenario(
+                    game, driver, args.frames, args.memory_frames
+                )
+                print_result(name, scenarios[name])
+
+    save_results(args.output, {"environment": environment(), "scenarios": scenarios})
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        baseline = load_results(args.baseline)["scenarios"]
+        regressions = compare(scenarios, baseline, COMPARED_METRICS, args.threshold)
+        if print_regressions(regressions, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
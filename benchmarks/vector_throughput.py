@@ -0,0 +1,71 @@
+"""
+Compares the throughput of BatchSimulation with running the same number of Simulation loops.
+
+Usage: python -m benchmarks.vector_throughput --envs 1024 --ticks 600
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from simulation import SimConfig, Simulation
+from simulation.vector import BatchSimulation
+
+
+def bench_single(config, num_envs, ticks, inputs):
+    """Steps num_envs Simulation objects one after another, returns elapsed seconds."""
+    sims = [Simulation(config) for _ in range(num_envs)]
+    for seed, sim in enumerate(sims):
+        sim.reset(seed)
+
+    start = time.perf_counter()
+    for tick in range(ticks):
+        tick_inputs = inputs[tick].tolist()
+        for sim, sim_inputs in zip(sims, tick_inputs):
+            sim.step(*sim_inputs)
+    return time.perf_counter() - start
+
+
+def bench_batch(config, num_envs, ticks, inputs):
+    """Steps a BatchSimulation of num_envs matches, returns elapsed seconds."""
+    batch = BatchSimulation(num_envs, config)
+    batch.reset(range(num_envs))
+
+    start = time.perf_counter()
+    for tick in range(ticks):
+        batch.step(inputs[tick])
+    return time.perf_counter() - start
+
+
+def main():
+    """Runs the benchmark and prints env-steps per second for both approaches."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--envs", type=int, nargs="+", default=[16, 256, 1024])
+    parser.add_argument("--ticks", type=int, default=600)
+    parser.add_argument("--maze-size", type=int, default=31)
+    parser.add_argument("--players", type=int, default=2)
+    args = parser.parse_args()
+
+    config = SimConfig(
+        maze_width=args.maze_size, maze_height=args.maze_size, player_count=args.players
+    )
+    rng = np.random.default_rng(0)
+
+    print(f"{'envs':>6} {'single loops':>16} {'batch':>16} {'speed-up':>9}")
+    for num_envs in args.envs:
+        # Inputs change every 10 ticks so that players actually travel
+        inputs = rng.integers(0, 16, size=(args.ticks // 10 + 1, num_envs, args.players))
+        inputs = np.repeat(inputs, 10, axis=0)[: args.ticks]
+
+        single = bench_single(config, num_envs, args.ticks, inputs)
+        batch = bench_batch(config, num_envs, args.ticks, inputs)
+        steps = num_envs * args.ticks
+        print(
+            f"{num_envs:>6} {steps / single:>12.0f} st/s {steps / batch:>12.0f} st/s "
+            f"{single / batch:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,5 +2,13 @@
 This module provides utilities for managing the game.
 """
 
+from .controllers import (BotController, RandomWalkController,
+                          ScriptedController)
 from .engine import Engine
+from .ghost import GhostPlayer, GhostRace
+from .headless import HeadlessReport, HeadlessRunner
+from .profiler import FrameProfiler
+from .replay import Replay, ReplayPlayer, ReplayRecorder
+from .snapshots import GameSnapshot, SnapshotRandom, SnapshotRing
 from .state import GameState
+from .state_manager import KEY_LAYOUTS
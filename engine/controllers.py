@@ -0,0 +1,81 @@
+"""
+This module contains scripted and bot input controllers that can drive a player instead of the
+keyboard.
+"""
+
+import random
+
+from simulation.bot import Bot
+from simulation.inputs import INPUT_DOWN, INPUT_LEFT, INPUT_RIGHT, INPUT_UP
+
+DIRECTIONS = [INPUT_UP, INPUT_RIGHT, INPUT_LEFT, INPUT_DOWN]
+
+
+class RandomWalkController:
+    """
+    Holds a random direction for a random number of ticks, then picks another one.
+    """
+
+    def __init__(self, seed=None, min_hold=5, max_hold=40):
+        self.rng = random.Random(seed)
+        self.min_hold = min_hold
+        self.max_hold = max_hold
+        self.input_mask = 0
+        self.hold = 0
+
+    def get_input(self, player, tick):
+        """
+        Returns the input mask for the given player at the given tick.
+        """
+        if self.hold <= 0:
+            self.input_mask = self.rng.choice(DIRECTIONS)
+            self.hold = self.rng.randint(self.min_hold, self.max_hold)
+        self.hold -= 1
+        return self.input_mask
+
+
+class ScriptedController:
+    """
+    Plays back a fixed list of (ticks, input_mask) segments, looping when it runs out.
+    """
+
+    def __init__(self, segments):
+        if not segments:
+            raise ValueError("Scripted controller needs at least one segment.")
+        if all(ticks <= 0 for ticks, _ in segments):
+            raise ValueError("Scripted controller needs a segment of at least one tick.")
+        self.segments = segments
+        self.index = 0
+        self.remaining = segments[0][0]
+
+    def get_input(self, player, tick):
+        """
+        Returns the input mask for the given player at the given tick.
+        """
+        while self.remaining <= 0:
+            self.index = (self.index + 1) % len(self.segments)
+            self.remaining = self.segments[self.index][0]
+        self.remaining -= 1
+        return self.segments[self.index][1]
+
+
+class BotController:
+    """
+    Lets a Bot play in the game's maze.
+    """
+
+    def __init__(self, bot=None):
+        self.bot = bot or Bot()
+
+    def get_input(self, player, tick):
+        """
+        Returns the input mask for the given player at the given tick.
+        """
+        return self.bot.get_input(
+            player.main.maze,
+            player.x,
+            player.y,
+            player.width,
+            player.height,
+            player.reversed_controls,
+        )
@@ -2,10 +2,16 @@
 This module contains the Engine class
 """
 
+import struct
 import sys
+import zlib
 
 import pygame
 
+from simulation.rules import find_winner, win_zone
+from util.tracing import tracer
+
+from .profiler import FrameProfiler
 from .state_manager import GameStateManager
 
 
@@ -15,64 +21,303 @@ class Engine:
     def __init__(self, main):
         self.main = main
         self.win_zone = self._calculate_win_zone()
-        self.state_manager = GameStateManager(main)
+        self.vertical_win_zone = self._calculate_vertical_win_zone()
+        self.profiler = FrameProfiler()
+        self.state_manager = GameStateManager(main, self.profiler)
+
+        # Fixed timestep bookkeeping
+        self.tick = 0
+        self.time_step = 1 / main.settings.tick_rate
+        self.accumulator = 0.0
+
+        # Menus are redrawn only after input or a state change
+        self.needs_redraw = True
+        self.drawn_state = None
+
+        self.recorder = None  # ReplayRecorder saving the inputs of every match
+        self.replay = None  # ReplayPlayer driving the players instead of the keyboard
+        self.bots = {}  # Player number -> controller playing instead of the keyboard
+        self.host = None  # NetHost sending the matches to a LAN client
+        self.client = None  # NetClient showing the matches of a LAN host
+        self.snapshots = None  # SnapshotRing of the last ticks, for rewinding
+        self.ghosts = None  # GhostRace recording the runs and showing the fastest one
+        self.seed = None  # Seed of the current match
+
+    @property
+    def time_ms(self):
+        """Simulation time of the current match in milliseconds."""
+        return self.tick * 1000 // self.main.settings.tick_rate
+
+    def ticks(self, milliseconds):
+        """Converts a duration in milliseconds to simulation ticks."""
+        return max(1, round(milliseconds * self.main.settings.tick_rate / 1000))
+
+    def start_match(self):
+        """
+        Restarts the simulation clock and seeds the match's random number generator,
+        from the replay when one is playing or from the host of a LAN game.
+        """
+        self.tick = 0
+        self.accumulator = 0.0
+
+        if self.replay:
+            seed = self.replay.seed
+        elif self.client:
+            seed = self.client.seed
+        else:
+            seed = self.main.next_match_seed()
+        self.seed = seed
+        self.main.seed_match(seed)
+
+        self.main.powerup_manager.reset()
+        if hasattr(self.main, "event_manager"):
+            self.main.event_manager.reset()
+        if self.snapshots:
+            self.snapshots.clear()
+        if self.ghosts:
+            self.ghosts.start(seed)
+        if self.recorder:
+            self.recorder.start(seed, self.main.settings)
+
+    def end_match(self):
+        """
+        Saves the recorded match, or checks that the replayed one ended as recorded.
+        """
+        winner = self.main.game_state.winner
+        winner_number = winner.player_number if winner else 0
+        checksum = self.state_checksum()
+
+        if self.recorder:
+            path = self.recorder.finish(self.tick, winner_number, checksum)
+            if path:
+                print(f"Replay saved to {path}")
+        if self.host:
+            self.host.finish(self.tick, winner_number)
+        # Replayed runs were already saved when they were played
+        if self.ghosts and not self.replay:
+            path = self.ghosts.finish(self.tick, winner)
+            if path:
+                print(f"Fastest run saved to {path}")
+        if self.replay:
+            if self.replay.verify(self.tick, winner_number, checksum):
+                print(f"Replay finished at tick {self.tick}, state matches")
+            else:
+                print(f"Replay desynchronized, finished at tick {self.tick}")
+            self.replay = None
+
+    def state_checksum(self):
+        """Checksum of the players' state, used to detect diverging replays."""
+        state = bytearray(struct.pack("<q", self.tick))
+        for player in self.main.players:
+            state += struct.pack(
+                "<4d", player.x, player.y, player.width, player.height
+            )
+        return zlib.crc32(state)
 
     def run(self):
         """Main loop of the game."""
-        while True:
-            self._check_events()
+        with tracer.span("Engine.run"):
+            while True:
+                if self.main.game_state.get_current_state() == "running":
+                    frame_time = self.main.clock.tick(self.main.settings.max_fps) / 1000
+                    self.frame(frame_time)
+                else:
+                    self.idle_frame()
+
+    def frame(self, frame_time):
+        """Handles input, advances the simulation by frame_time and draws a frame."""
+        with tracer.span("frame"):
+            with self.profiler.section("input"):
+                self._check_events()
+            self._advance(frame_time)
+            self._render(self.accumulator / self.time_step)
+        self.profiler.end_frame(frame_time)
+
+    def idle_frame(self):
+        """
+        Redraws the current menu if something changed, then sleeps until input arrives
+        or the idle timeout passes, instead of redrawing an unchanged menu every frame.
+        """
+        game_state = self.main.game_state
+        state = (game_state.state, game_state.settings_state)
+        if self.needs_redraw or state != self.drawn_state:
+            self._render(1.0)
+            self.drawn_state = state
+            self.needs_redraw = False
+
+        with tracer.span("idle wait"):
+            if self.client:
+                # The next match may start any moment, so the host is polled often
+                self.client.poll()
+                event = pygame.event.wait(50)
+            else:
+                event = pygame.event.wait(self.main.settings.menu_idle_timeout)
+        if event.type == pygame.NOEVENT:
+            return
+
+        self._check_events([event] + pygame.event.get())
+        self.needs_redraw = True
+
+        if game_state.get_current_state() == "running":
+            # Do not count the time spent in menus as the first frame of the match
+            self.main.clock.tick()
+            self.accumulator = 0.0
+
+    def _advance(self, frame_time):
+        """Runs as many fixed simulation steps as the elapsed time requires."""
+        # Clamp long frames so that a stall does not cause a burst of catch-up steps
+        max_frame_time = self.time_step * self.main.settings.max_steps_per_frame
+        self.accumulator += min(frame_time, max_frame_time)
 
-            self.main.screen.fill((0, 0, 0))
+        while self.accumulator >= self.time_step:
+            with tracer.span("Engine.step"):
+                self.step()
+            self.accumulator -= self.time_step
 
+    def step(self):
+        """Advances the simulation by a single fixed tick."""
+        if self.main.game_state.get_current_state() != "running":
+            return
+
+        if self.client:
+            # The host runs the simulation, the client only shows its ticks
+            if not self.client.step():
+                print("The host left the game")
+                self.main.game_state.main_menu()
+            return
+
+        self.tick += 1
+        profiler = self.profiler
+        players = self.main.players
+
+        if self.replay:
+            self.replay.apply(self.tick, players)
+        else:
+            for player in players:
+                controller = self.bots.get(player.player_number)
+                if controller:
+                    player.set_input(controller.get_input(player, self.tick))
+            if self.recorder:
+                self.recorder.record(
+                    self.tick, tuple(player.get_movement_mask() for player in players)
+                )
+
+        self.main.powerup_manager.update(self.tick)
+
+        with profiler.section("player update"):
+            for player in players:
+                player.update()
+
+        with profiler.section("power-ups"):
+            check_power_up_collision = self.main.maze.check_power_up_collision
+            for player in players:
+                check_power_up_collision(player)
+        with profiler.section("win check"):
+            self.check_win_condition()
+
+        if hasattr(self.main, "event_manager"):
+            with profiler.section("events"):
+                self.main.event_manager.update()
+
+        if self.host:
+            self.host.send_state(self.tick)
+        if self.snapshots:
+            self.snapshots.save()
+        if self.ghosts:
+            self.ghosts.record(players)
+
+        # A replay that was not won ends at its last recorded tick
+        if self.replay and self.tick >= self.replay.end_tick:
             if self.main.game_state.get_current_state() == "running":
-                self.main.maze.check_power_up_collision(self.main.player1)
-                self.main.maze.check_power_up_collision(self.main.player2)
-                self.check_win_condition()
+                self.main.game_state.main_menu()
 
-                if hasattr(self.main, "event_manager"):
-                    self.main.event_manager.update()
+        if self.main.game_state.get_current_state() != "running":
+            self.end_match()
 
-            self.state_manager.draw_current_state()
+    def rewind(self, ticks):
+        """
+        Goes back the given number of ticks, or as far as the kept snapshots reach, and
+        lets a replay continue from there.
+        """
+        if not self.snapshots:
+            return
+        tick = self.snapshots.restore(self.tick - ticks)
+        if tick is None:
+            return
+        self.accumulator = 0.0
+        if self.replay:
+            self.replay.seek(tick)
 
-            if (
-                hasattr(self.main, "event_manager")
-                and self.main.game_state.get_current_state() == "running"
-            ):
+    def _render(self, alpha):
+        """Draws the current state, interpolating between the last two ticks."""
+        with tracer.span("Engine.render"):
+            self._draw(alpha)
+        with tracer.span("display flip"):
+            pygame.display.flip()
+
+    def _draw(self, alpha):
+        """Draws the current state, the event HUD and the profiler overlay."""
+        self.main.screen.fill((0, 0, 0))
+
+        self.state_manager.draw_current_state(alpha)
+
+        if (
+            hasattr(self.main, "event_manager")
+            and self.main.game_state.get_current_state() == "running"
+        ):
+            with self.profiler.section("HUD"):
                 self.main.event_manager.draw_active_events(self.main.screen)
 
-            pygame.display.flip()
-            self.main.clock.tick(60)
+        self.profiler.draw(self.main.screen)
+        self.main.startup_timer.frame_drawn()
 
-    def _check_events(self):
-        for event in pygame.event.get():
+    def _check_events(self, events=None):
+        """Handles the given events, or all pending ones."""
+        for event in pygame.event.get() if events is None else events:
             if event.type == pygame.QUIT or (
                 event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE
             ):
+                if self.main.game_state.get_current_state() == "running":
+                    self.end_match()
                 pygame.quit()
                 sys.exit()
 
-            if hasattr(self.main, "powerup_manager"):
-                self.main.powerup_manager.handle_event(event)
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                self.profiler.toggle()
 
             self.state_manager.handle_event(event)
 
     def check_win_condition(self):
-        """Checks if any player has won the game."""
-        left_zone, right_zone = self.win_zone
-        if self.main.player1.x > left_zone:
-            self.main.game_state.game_won(self.main.player1, self.main.player2)
-        if self.main.player2.x < right_zone:
-            self.main.game_state.game_won(self.main.player2, self.main.player1)
+        """
+        Checks if any player has won the game, by reaching the treasure room in the middle
+        of the map. Players come from outside the room, so crossing into it is enough.
+        """
+        players = self.main.players
+        index = find_winner(
+            [(player.x, player.y) for player in players],
+            self.win_zone,
+            self.vertical_win_zone,
+        )
+        if index is not None:
+            winner = players[index]
+            losers = [other for other in players if other is not winner]
+            self.main.game_state.game_won(winner, losers)
 
     def update_win_zone(self):
         """Updates the win zone based on the current screen size."""
         self.win_zone = self._calculate_win_zone()
+        self.vertical_win_zone = self._calculate_vertical_win_zone()
 
     def _calculate_win_zone(self):
-        mid = self.main.settings.screen_width // 2
-        block_size = self.main.settings.block_size
+        settings = self.main.settings
+        return win_zone(settings.middle[0], settings.block_size, settings.player_width)
 
-        return (
-            mid - block_size * 1.5 - self.main.settings.player_width // 2,
-            mid + block_size * 1.5 - self.main.settings.player_width // 2,
-        )
+    def _calculate_vertical_win_zone(self):
+        """
+        Rows of the win zone on maps with four quadrants, None when it spans the whole
+        height of the map.
+        """
+        settings = self.main.settings
+        if not settings.quadrant_map:
+            return None
+        return win_zone(settings.middle[1], settings.block_size, settings.player_height)
@@ -0,0 +1,212 @@
+"""
+This module contains the ghost runs: GhostRace records the trajectories of the players of
+every match and keeps the fastest winning run on each maze, and GhostPlayer replays such a
+run as a translucent ghost the players can race against.
+
+A ghost file consists of:
+- the magic bytes b"LRGH" and a format version byte,
+- the tick the run was won at, the winner's player number and name, and its size,
+- the starting position, followed by (ticks, dx, dy) runs meaning "move by (dx, dy) on
+  each of the next ticks". Positions are in 1/POSITION_SCALE pixels, deltas are zigzag
+  varints, so a player moving straight for a second takes three bytes.
+
+Ghosts are stored one file per maze, named after the match seed and a checksum of the
+settings that shape the match.
+"""
+
+import json
+import os
+import zlib
+
+import pygame
+
+from .replay import (read_signed_varint, read_varint, settings_snapshot,
+                     write_signed_varint, write_varint)
+
+MAGIC = b"LRGH"
+VERSION = 1
+POSITION_SCALE = 8  # Positions are stored in 1/8 pixels
+GHOST_ALPHA = 90
+
+
+class TrajectoryEncoder:
+    """
+    Encodes the positions of one player, tick by tick, as runs of equal steps.
+    """
+
+    def __init__(self, x, y):
+        self.buffer = bytearray()
+        self.x = round(x * POSITION_SCALE)
+        self.y = round(y * POSITION_SCALE)
+        write_varint(self.buffer, self.x)
+        write_varint(self.buffer, self.y)
+        self.step = (0, 0)
+        self.count = 0  # Ticks the current step was repeated for
+
+    def add(self, x, y):
+        """Adds the position of the next tick."""
+        x = round(x * POSITION_SCALE)
+        y = round(y * POSITION_SCALE)
+        step = (x - self.x, y - self.y)
+        self.x, self.y = x, y
+        if step == self.step:
+            self.count += 1
+            return
+        self._flush()
+        self.step = step
+        self.count = 1
+
+    def _flush(self):
+        if self.count:
+            write_varint(self.buffer, self.count)
+            write_signed_varint(self.buffer, self.step[0])
+            write_signed_varint(self.buffer, self.step[1])
+
+    def finish(self):
+        """Returns the encoded trajectory."""
+        self._flush()
+        self.count = 0
+        return bytes(self.buffer)
+
+
+class GhostPlayer:
+    """
+    Replays a ghost run. The trajectory is decoded while the match goes on, a run of
+    steps at a time, and drawn interpolated between ticks like the players.
+    """
+
+    def __init__(self, data, settings):
+        if data[:4] != MAGIC:
+            raise ValueError("Not a LabyRun ghost file.")
+        if data[4] != VERSION:
+            raise ValueError(f"Unsupported ghost version {data[4]}.")
+
+        self.data = data
+        offset = 5
+        self.end_tick, offset = read_varint(data, offset)
+        self.player_number, offset = read_varint(data, offset)
+        length, offset = read_varint(data, offset)
+        self.player_name = data[offset : offset + length].decode("utf-8")
+        offset += length
+        width, offset = read_varint(data, offset)
+        height, offset = read_varint(data, offset)
+        self.start = offset
+
+        color = settings.player_colors[self.player_number - 1]
+        self.image = pygame.Surface((width, height), pygame.SRCALPHA)
+        self.image.fill((*color[:3], GHOST_ALPHA))
+
+        self.rewind()
+
+    @classmethod
+    def load(cls, path, settings):
+        """Reads a ghost from path."""
+        with open(path, "rb") as file:
+            return cls(file.read(), settings)
+
+    def rewind(self):
+        """Goes back to the start of the run."""
+        self.x, offset = read_varint(self.data, self.start)
+        self.y, self.offset = read_varint(self.data, offset)
+        self.prev_x, self.prev_y = self.x, self.y
+        self.tick = 0
+        self.step = (0, 0)
+        self.count = 0  # Ticks left in the current run of steps
+
+    def advance(self, tick):
+        """Moves the ghost to where the run was at the given tick."""
+        if tick < self.tick:
+            self.rewind()  # The match was rewound
+        data = self.data
+        while self.tick < tick:
+            self.prev_x, self.prev_y = self.x, self.y
+            self.tick += 1
+            if not self.count:
+                if self.offset >= len(data):
+                    continue  # The run is over, the ghost stays at the finish
+                self.count, offset = read_varint(data, self.offset)
+                step_x, offset = read_signed_varint(data, offset)
+                step_y, self.offset = read_signed_varint(data, offset)
+                self.step = (step_x, step_y)
+            self.x += self.step[0]
+            self.y += self.step[1]
+            self.count -= 1
+
+    def draw(self, screen, alpha=1.0):
+        """Draws the ghost, interpolated between the last two ticks."""
+        x = self.prev_x + (self.x - self.prev_x) * alpha
+        y = self.prev_y + (self.y - self.prev_y) * alpha
+        screen.blit(self.image, (x / POSITION_SCALE, y / POSITION_SCALE))
+
+
+class GhostRace:
+    """
+    Records the trajectories of the players of every match and saves the winner's when it
+    is the fastest run on its maze so far. On mazes that were won before, the fastest run
+    is shown as a ghost.
+    """
+
+    def __init__(self, main, directory):
+        self.main = main
+        self.directory = directory
+        self.path = None  # Ghost file of the current maze
+        self.ghost = None  # GhostPlayer of the fastest run on the current maze
+        self.encoders = []
+
+    def start(self, seed):
+        """Loads the ghost of the new match's maze and starts recording it."""
+        settings = settings_snapshot(self.main.settings)
+        checksum = zlib.crc32(json.dumps(settings, sort_keys=True).encode("utf-8"))
+        self.path = os.path.join(self.directory, f"{seed}-{checksum:08x}.lrg")
+
+        self.ghost = None
+        if os.path.exists(self.path):
+            try:
+                self.ghost = GhostPlayer.load(self.path, self.main.settings)
+            except (OSError, ValueError, IndexError) as e:
+                print(f"Error loading ghost: {str(e)}")
+        self.encoders = []
+
+    def record(self, players):
+        """Records the players' positions at the current tick."""
+        if not self.encoders:
+            # The players are placed after the match starts, so they are read at its
+            # first tick
+            self.encoders = [
+                TrajectoryEncoder(player.prev_x, player.prev_y) for player in players
+            ]
+        for encoder, player in zip(self.encoders, players):
+            encoder.add(player.x, player.y)
+
+    def finish(self, tick, winner):
+        """
+        Saves the winner's run if it beat the ghost. Returns the path of the ghost file,
+        or None if it was not saved.
+        """
+        encoders, self.encoders = self.encoders, []
+        if winner is None or not encoders:
+            return None
+        if self.ghost and self.ghost.end_tick <= tick:
+            return None
+
+        name = winner.player_name.encode("utf-8")
+        buffer = bytearray(MAGIC)
+        buffer.append(VERSION)
+        write_varint(buffer, tick)
+        write_varint(buffer, winner.player_number)
+        write_varint(buffer, len(name))
+        buffer += name
+        write_varint(buffer, self.main.settings.player_width)
+        write_varint(buffer, self.main.settings.player_height)
+        buffer += encoders[winner.player_number - 1].finish()
+
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.path, "wb") as file:
+            file.write(buffer)
+        return self.path
+
+    def draw(self, screen, tick, alpha=1.0):
+        """Draws the ghost where its run was at the given tick."""
+        if self.ghost:
+            self.ghost.advance(tick)
+            self.ghost.draw(screen, alpha)
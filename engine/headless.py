@@ -0,0 +1,91 @@
+"""
+This module contains the HeadlessRunner class, which plays matches without rendering.
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Dict
+
+
+@dataclass
+class HeadlessReport:
+    """Summary of a batch of headless matches."""
+
+    matches: int = 0
+    draws: int = 0
+    ticks: int = 0
+    elapsed: float = 0.0  # seconds of wall-clock time
+    wins: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def ticks_per_second(self) -> float:
+        """Simulated ticks per second of wall-clock time."""
+        return self.ticks / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __str__(self):
+        wins = ", ".join(f"{name}: {count}" for name, count in self.wins.items())
+        return (
+            f"{self.matches} matches ({wins or 'no wins'}, draws: {self.draws}), "
+            f"{self.ticks} ticks in {self.elapsed:.2f}s "
+            f"= {self.ticks_per_second:.0f} ticks/s"
+        )
+
+
+class HeadlessRunner:
+    """
+    Plays matches as fast as possible with scripted inputs, without rendering
+    and without a frame cap.
+    """
+
+    def __init__(self, main, controllers, max_ticks=36000, realtime=False):
+        self.main = main
+        self.engine = main.engine
+        self.controllers = controllers  # One controller per player
+        self.max_ticks = max_ticks  # Matches longer than this end in a draw
+        # Paces the ticks at the tick rate, for LAN clients that watch the matches
+        self.realtime = realtime
+
+    def run(self, matches=1):
+        """
+        Plays the given number of matches and returns a HeadlessReport.
+        """
+        report = HeadlessReport()
+        players = self.main.players
+        start = time.perf_counter()
+
+        for _ in range(matches):
+            report.ticks += self._play_match(players)
+            report.matches += 1
+
+            winner = self.main.game_state.winner
+            if winner is None:
+                report.draws += 1
+            else:
+                report.wins[winner.player_name] = (
+                    report.wins.get(winner.player_name, 0) + 1
+                )
+            self.main.game_state.main_menu()
+
+        report.elapsed = time.perf_counter() - start
+        return report
+
+    def _play_match(self, players):
+        """Plays a single match and returns the number of ticks it took."""
+        self.main.game_state.run_game()
+        ticks = 0
+
+        while (
+            self.main.game_state.get_current_state() == "running"
+            and ticks < self.max_ticks
+        ):
+            for player, controller in zip(players, self.controllers):
+                player.set_input(controller.get_input(player, self.engine.tick))
+
+            self.engine.step()
+            ticks += 1
+            if self.realtime:
+                self.main.clock.tick(self.main.settings.tick_rate)
+
+        if self.main.game_state.get_current_state() == "running":
+            self.engine.end_match()  # Drawn after max_ticks
+        return ticks
@@ -0,0 +1,144 @@
+"""
+This module contains the FrameProfiler class, which times the phases of every frame and
+shows rolling statistics in an overlay.
+"""
+
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import pygame
+
+from util.fonts import get_font
+from util.tracing import tracer
+
+PHASES = (
+    "input",
+    "player update",
+    "power-ups",
+    "win check",
+    "events",
+    "maze draw",
+    "hints",
+    "fog",
+    "player draw",
+    "HUD",
+    "menu draw",
+)
+
+
+def percentile(sorted_samples, fraction):
+    """Returns the given percentile (0-1) of an already sorted list of samples."""
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, int(fraction * len(sorted_samples)))
+    return sorted_samples[index]
+
+
+class FrameProfiler:
+    """
+    Times each phase of a frame and keeps the last `window` frames of samples.
+    The overlay is toggled with F3.
+    """
+
+    def __init__(self, window=240):
+        self.window = window
+        self.visible = False
+        self.samples = {phase: deque(maxlen=window) for phase in PHASES}
+        self.frame_times = deque(maxlen=window)  # seconds between frames
+        self.current = dict.fromkeys(PHASES, 0.0)  # time spent in the current frame
+
+        self.font = None
+        self.header = None
+        self.rows = []  # Rendered statistics, refreshed a few times per second
+        self.frames_since_refresh = 0
+
+    @contextmanager
+    def section(self, phase):
+        """Adds the time spent inside the with-block to the given phase."""
+        start = time.perf_counter()
+        try:
+            with tracer.span(phase):
+                yield
+        finally:
+            self.current[phase] += time.perf_counter() - start
+
+    def end_frame(self, frame_time):
+        """Stores the timings of the finished frame and starts a new one."""
+        self.frame_times.append(frame_time)
+        for phase, elapsed in self.current.items():
+            self.samples[phase].append(elapsed)
+            self.current[phase] = 0.0
+
+    def toggle(self):
+        """Shows or hides the overlay."""
+        self.visible = not self.visible
+        self.frames_since_refresh = self.window
+
+    def stats(self, phase):
+        """Returns (p50, p95, p99) of the phase in milliseconds."""
+        ordered = sorted(self.samples[phase])
+        return tuple(percentile(ordered, q) * 1000 for q in (0.5, 0.95, 0.99))
+
+    def draw(self, screen):
+        """Draws the statistics table and the frame time graph."""
+        if not self.visible:
+            return
+        if self.font is None:
+            self.font = get_font("arial", 16)
+
+        self.frames_since_refresh += 1
+        if self.frames_since_refresh >= 15:
+            self._refresh_lines()
+            self.frames_since_refresh = 0
+
+        line_height = self.font.get_linesize()
+        width = 360
+        graph_height = 60
+        height = line_height * (len(self.rows) + 1) + graph_height + 20
+        x = screen.get_width() - width - 10
+        y = 10
+
+        panel = pygame.Surface((width, height), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 180))
+        screen.blit(panel, (x, y))
+
+        screen.blit(self.header, (x + 8, y + 5))
+        for i, row in enumerate(self.rows, start=1):
+            for column, cell in zip((0, 130, 200, 270), row):
+                screen.blit(cell, (x + 8 + column, y + 5 + i * line_height))
+
+        self._draw_graph(screen, x + 8, y + height - graph_height - 8, width - 16, graph_height)
+
+    def _refresh_lines(self):
+        """Re-renders the statistics text."""
+        frame_times = sorted(self.frame_times)
+        mean = sum(frame_times) / len(frame_times) if frame_times else 0.0
+        fps = 1 / mean if mean > 0 else 0.0
+
+        header = (
+            f"FPS {fps:.1f}   frame p50 {percentile(frame_times, 0.5) * 1000:.1f} ms"
+            f"   p99 {percentile(frame_times, 0.99) * 1000:.1f} ms"
+        )
+        table = [("phase (ms)", "p50", "p95", "p99")]
+        for phase in PHASES:
+            table.append((phase, *(f"{value:.2f}" for value in self.stats(phase))))
+
+        render = self.font.render
+        self.header = render(header, True, (255, 255, 255))
+        self.rows = [[render(cell, True, (255, 255, 255)) for cell in row] for row in table]
+
+    def _draw_graph(self, screen, x, y, width, height):
+        """Draws the recent frame times, with a line at the 60 FPS budget."""
+        scale = height / (2 / 60)  # The graph's top is two frame budgets
+        budget_y = y + height - int((1 / 60) * scale)
+        pygame.draw.line(screen, (0, 160, 0), (x, budget_y), (x + width, budget_y))
+
+        if len(self.frame_times) < 2:
+            return
+        step = width / (self.window - 1)
+        points = [
+            (x + i * step, y + height - min(height, int(frame_time * scale)))
+            for i, frame_time in enumerate(self.frame_times)
+        ]
+        pygame.draw.lines(screen, (255, 200, 0), False, points)
@@ -0,0 +1,267 @@
+"""
+This module contains the replay file format together with ReplayRecorder, which records the
+players' inputs of a match, and ReplayPlayer, which feeds them back deterministically.
+
+A replay file consists of:
+- the magic bytes b"LRRP" and a format version byte,
+- the match seed, the settings snapshot as JSON, the final tick, the winner (0 for none)
+  and a checksum of the final state,
+- the number of input changes, followed by one (tick delta, inputs) pair per change, where
+  the tick delta is a varint and the inputs are one byte per two players, holding the mask
+  of the first player in the low nibble and of the second one in the high nibble.
+
+Version 1 replays have no player_count setting and were always played by two players.
+"""
+
+import bisect
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+MAGIC = b"LRRP"
+VERSION = 2
+SUPPORTED_VERSIONS = (1, 2)
+
+# Settings that influence the simulation, stored with every replay
+SNAPSHOT_SETTINGS = (
+    "screen_width",
+    "screen_height",
+    "maze_width",
+    "maze_height",
+    "player_count",
+    "tick_rate",
+    "fog_of_war_enabled",
+    "power_up_duration",
+    "power_ups_enabled",
+    "speed_boost_enabled",
+    "slow_down_enabled",
+    "enlarge_enabled",
+    "teleport_enabled",
+    "freeze_enabled",
+    "reverse_controls_enabled",
+    "events_enabled",
+    "event_min_interval",
+    "event_max_interval",
+    "shortcutreveal_enabled",
+    "teleportation_enabled",
+    "fatigue_enabled",
+    "invisiblewalls_enabled",
+)
+
+
+def write_varint(buffer, value):
+    """Appends a non-negative integer to the bytearray, 7 bits per byte."""
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data, offset):
+    """Reads a varint from data at offset. Returns (value, new offset)."""
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def write_signed_varint(buffer, value):
+    """Appends an integer as a zigzag varint, so that small negative values stay short."""
+    write_varint(buffer, value * 2 if value >= 0 else -value * 2 - 1)
+
+
+def read_signed_varint(data, offset):
+    """Reads a zigzag varint from data at offset. Returns (value, new offset)."""
+    value, offset = read_varint(data, offset)
+    return (value >> 1) if value % 2 == 0 else -(value >> 1) - 1, offset
+
+
+def settings_snapshot(settings):
+    """Returns the settings that influence the simulation, as a JSON-compatible dict."""
+    return {name: getattr(settings, name) for name in SNAPSHOT_SETTINGS}
+
+
+def apply_settings_snapshot(main, snapshot):
+    """Applies a settings snapshot to the game, except for the screen size."""
+    settings = main.settings
+    for name, value in snapshot.items():
+        if name not in ("screen_width", "screen_height"):
+            setattr(settings, name, value)
+    main.engine.time_step = 1 / settings.tick_rate
+    settings.set_maze_size(settings.maze_width, settings.maze_height)
+
+
+@dataclass
+class Replay:
+    """A recorded match: its seed, settings and every change of the players' inputs."""
+
+    seed: int
+    settings: dict
+    end_tick: int = 0
+    winner: int = 0  # Player number of the winner, 0 when nobody won
+    checksum: int = 0  # Engine.state_checksum() at end_tick
+    # (tick, player 1's mask, player 2's mask, ...)
+    inputs: List[Tuple[int, ...]] = field(default_factory=list)
+
+    @property
+    def resolution(self):
+        """Screen size the match was played at."""
+        return self.settings["screen_width"], self.settings["screen_height"]
+
+    def to_bytes(self):
+        """Encodes the replay."""
+        settings = json.dumps(self.settings, separators=(",", ":")).encode("utf-8")
+        buffer = bytearray(MAGIC)
+        buffer.append(VERSION)
+        write_varint(buffer, self.seed)
+        write_varint(buffer, len(settings))
+        buffer += settings
+        write_varint(buffer, self.end_tick)
+        write_varint(buffer, self.winner)
+        write_varint(buffer, self.checksum)
+
+        write_varint(buffer, len(self.inputs))
+        last_tick = 0
+        for tick, *masks in self.inputs:
+            write_varint(buffer, tick - last_tick)
+            for index in range(0, len(masks), 2):
+                high = masks[index + 1] if index + 1 < len(masks) else 0
+                buffer.append(masks[index] | high << 4)
+            last_tick = tick
+        return bytes(buffer)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Decodes a replay, raising ValueError if the data is not a replay."""
+        if data[:4] != MAGIC:
+            raise ValueError("Not a LabyRun replay file.")
+        if data[4] not in SUPPORTED_VERSIONS:
+            raise ValueError(f"Unsupported replay version {data[4]}.")
+
+        offset = 5
+        seed, offset = read_varint(data, offset)
+        length, offset = read_varint(data, offset)
+        settings = json.loads(data[offset : offset + length].decode("utf-8"))
+        offset += length
+        end_tick, offset = read_varint(data, offset)
+        winner, offset = read_varint(data, offset)
+        checksum, offset = read_varint(data, offset)
+
+        player_count = settings.setdefault("player_count", 2)
+        mask_bytes = (player_count + 1) // 2
+
+        count, offset = read_varint(data, offset)
+        inputs = []
+        tick = 0
+        for _ in range(count):
+            delta, offset = read_varint(data, offset)
+            tick += delta
+            masks = []
+            for byte in data[offset : offset + mask_bytes]:
+                masks += (byte & 0x0F, byte >> 4)
+            offset += mask_bytes
+            inputs.append((tick, *masks[:player_count]))
+
+        return cls(seed, settings, end_tick, winner, checksum, inputs)
+
+    def save(self, path):
+        """Writes the replay to path."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "wb") as file:
+            file.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        """Reads a replay from path."""
+        with open(path, "rb") as file:
+            return cls.from_bytes(file.read())
+
+    def apply_settings(self, main):
+        """Applies the recorded settings to the game before the match is replayed."""
+        apply_settings_snapshot(main, self.settings)
+
+
+class ReplayRecorder:
+    """
+    Records the inputs of every match and writes each finished match to its own file in
+    the given directory.
+    """
+
+    def __init__(self, directory=".data/replays"):
+        self.directory = directory
+        self.replay = None
+        self.last_inputs = None
+        self.last_path = None
+
+    def start(self, seed, settings):
+        """Starts recording a new match."""
+        self.replay = Replay(seed, settings_snapshot(settings))
+        self.last_inputs = (0,) * settings.player_count
+
+    def record(self, tick, masks):
+        """Records the input masks of the players at the given tick, if they changed."""
+        if masks != self.last_inputs:
+            self.replay.inputs.append((tick, *masks))
+            self.last_inputs = masks
+
+    def finish(self, end_tick, winner, checksum):
+        """Writes the recorded match. Returns the path of the replay file."""
+        if self.replay is None:
+            return None
+        self.replay.end_tick = end_tick
+        self.replay.winner = winner
+        self.replay.checksum = checksum
+
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{self.replay.seed}.lrr"
+        self.last_path = os.path.join(self.directory, name)
+        self.replay.save(self.last_path)
+        self.replay = None
+        return self.last_path
+
+
+class ReplayPlayer:
+    """Feeds the inputs of a replay to the players, tick by tick."""
+
+    def __init__(self, replay):
+        self.replay = replay
+        self.index = 0
+
+    @property
+    def seed(self):
+        """Seed of the replayed match."""
+        return self.replay.seed
+
+    @property
+    def end_tick(self):
+        """Tick at which the replayed match ended."""
+        return self.replay.end_tick
+
+    def apply(self, tick, players):
+        """Sets the players' movements to the recorded inputs for the given tick."""
+        inputs = self.replay.inputs
+        while self.index < len(inputs) and inputs[self.index][0] <= tick:
+            for player, mask in zip(players, inputs[self.index][1:]):
+                player.set_movement_mask(mask)
+            self.index += 1
+
+    def seek(self, tick):
+        """Continues with the inputs recorded after the given tick."""
+        self.index = bisect.bisect_right(
+            self.replay.inputs, tick, key=lambda entry: entry[0]
+        )
+
+    def verify(self, end_tick, winner, checksum):
+        """Checks whether the replayed match ended exactly like the recorded one."""
+        replay = self.replay
+        return (end_tick, winner, checksum) == (
+            replay.end_tick,
+            replay.winner,
+            replay.checksum,
+        )
@@ -0,0 +1,204 @@
+"""
+This module contains GameSnapshot, which saves the whole state of a match at one tick so that
+it can be restored later, and SnapshotRing, which keeps the snapshots of the last ticks for
+rewinding replays and rolling back networked matches.
+"""
+
+import random
+from array import array
+
+DEFAULT_CAPACITY = 300  # Five seconds at the default tick rate
+
+
+class SnapshotRandom(random.Random):
+    """
+    A Random whose getstate is cheap while nothing was drawn from it. Copying the state
+    of the generator takes longer than a whole tick, but most ticks draw no numbers, so
+    the last copy is kept until the state changes.
+    """
+
+    def __init__(self, x=None):
+        self.changes = 0  # Counts the calls that changed the state
+        self.saved_changes = None
+        self.saved_state = None
+        super().__init__(x)
+
+    def seed(self, *args, **kwargs):
+        self.changes += 1
+        super().seed(*args, **kwargs)
+
+    def random(self):
+        self.changes += 1
+        return super().random()
+
+    def getrandbits(self, k):
+        self.changes += 1
+        return super().getrandbits(k)
+
+    def getstate(self):
+        if self.saved_changes != self.changes:
+            self.saved_state = super().getstate()
+            self.saved_changes = self.changes
+        return self.saved_state
+
+    def setstate(self, state):
+        if state is self.saved_state and self.saved_changes == self.changes:
+            return
+        super().setstate(state)
+        self.changes += 1
+        self.saved_state = state
+        self.saved_changes = self.changes
+
+
+class GameSnapshot:
+    """
+    The state of a match at one tick.
+
+    Player positions and sizes are kept in arrays, everything else as the immutable values
+    returned by the save_state methods of the parts of the match. Sprites are shared with
+    the match instead of copied, so saving and restoring take microseconds. A snapshot is
+    overwritten in place by every save.
+    """
+
+    __slots__ = (
+        "tick",
+        "positions",
+        "sizes",
+        "effects",
+        "rng_state",
+        "power_ups",
+        "maze",
+        "events",
+        "game_state",
+    )
+
+    def __init__(self):
+        self.tick = None  # None until the first save
+        self.positions = array("d")  # x, y, prev_x and prev_y of every player
+        self.sizes = array("i")  # Width, height and input mask of every player
+        self.effects = ()  # EffectStack state of every player
+        self.rng_state = None
+        self.power_ups = None
+        self.maze = None
+        self.events = None
+        self.game_state = None
+
+    def save(self, main):
+        """Saves the current state of the match."""
+        players = main.players
+        if len(self.sizes) != 3 * len(players):
+            self.positions = array("d", bytes(32 * len(players)))
+            self.sizes = array("i", bytes(12 * len(players)))
+        positions = self.positions
+        sizes = self.sizes
+        for index, player in enumerate(players):
+            position = 4 * index
+            positions[position] = player.x
+            positions[position + 1] = player.y
+            positions[position + 2] = player.prev_x
+            positions[position + 3] = player.prev_y
+            size = 3 * index
+            sizes[size] = player.width
+            sizes[size + 1] = player.height
+            sizes[size + 2] = player.get_movement_mask()
+        self.effects = tuple(player.effects.save_state() for player in players)
+
+        self.tick = main.engine.tick
+        self.rng_state = main.rng.getstate()
+        self.power_ups = main.powerup_manager.save_state()
+        self.maze = main.maze.save_state()
+        self.events = main.event_manager.save_state()
+        game_state = main.game_state
+        self.game_state = (game_state.state, game_state.winner, tuple(game_state.losers))
+
+    def restore(self, main):
+        """Puts the match back into the saved state."""
+        # The tiles go first, so that events are shown on the restored maze
+        main.maze.load_state(self.maze)
+
+        positions = self.positions
+        sizes = self.sizes
+        for index, player in enumerate(main.players):
+            position = 4 * index
+            player.x = positions[position]
+            player.y = positions[position + 1]
+            player.prev_x = positions[position + 2]
+            player.prev_y = positions[position + 3]
+            size = 3 * index
+            width, height = sizes[size], sizes[size + 1]
+            player.set_movement_mask(sizes[size + 2])
+            player.effects.load_state(self.effects[index])
+
+            if (width, height) != (player.width, player.height):
+                player.width = width
+                player.height = height
+                player.update_image()
+            else:
+                player.rect.x = player.x
+                player.rect.y = player.y
+
+        main.rng.setstate(self.rng_state)
+        main.powerup_manager.load_state(self.power_ups)
+        main.event_manager.load_state(self.events)
+        game_state = main.game_state
+        game_state.state, game_state.winner, losers = self.game_state
+        game_state.losers = list(losers)
+        main.engine.tick = self.tick
+
+
+class SnapshotRing:
+    """
+    Snapshots of the last ticks of a match, saved every tick into a fixed ring of reused
+    GameSnapshot objects, so that saving allocates next to nothing.
+    """
+
+    def __init__(self, main, capacity=DEFAULT_CAPACITY):
+        self.main = main
+        self.snapshots = [GameSnapshot() for _ in range(capacity)]
+        self.oldest_tick = None  # None before the first save
+        self.newest_tick = None
+
+    @property
+    def capacity(self):
+        """Number of ticks kept."""
+        return len(self.snapshots)
+
+    def clear(self):
+        """Forgets all snapshots, used when a new match starts."""
+        for snapshot in self.snapshots:
+            snapshot.tick = None
+        self.oldest_tick = None
+        self.newest_tick = None
+
+    def save(self):
+        """Saves the state of the current tick, replacing the oldest snapshot."""
+        tick = self.main.engine.tick
+        self.snapshots[tick % self.capacity].save(self.main)
+        if self.oldest_tick is None:
+            self.oldest_tick = tick
+        # Ticks undone by restore stay overwritten, so the oldest tick never goes back
+        self.oldest_tick = max(self.oldest_tick, tick - self.capacity + 1)
+        self.newest_tick = tick
+
+    def get(self, tick):
+        """Returns the snapshot of the given tick, or None if it is not kept."""
+        if self.newest_tick is None or not self.oldest_tick <= tick <= self.newest_tick:
+            return None
+        snapshot = self.snapshots[tick % self.capacity]
+        return snapshot if snapshot.tick == tick else None
+
+    def restore(self, tick):
+        """
+        Restores the given tick, or the oldest one kept if it is older. Snapshots of
+        later ticks are dropped, as the match goes on from there. Returns the restored
+        tick, or None if there is no snapshot.
+        """
+        if self.newest_tick is None:
+            return None
+        tick = min(max(tick, self.oldest_tick), self.newest_tick)
+        snapshot = self.get(tick)
+        if snapshot is None:
+            return None
+        snapshot.restore(self.main)
+        self.newest_tick = tick
+        return tick
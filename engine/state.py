@@ -2,6 +2,8 @@
 This module contains the GameState class.
 """
 
+from util.tracing import tracer
+
 
 class GameState:
     """
@@ -10,23 +12,28 @@ class GameState:
 
     def __init__(self, main):
         self.winner = None
-        self.loser = None
+        self.losers = []
         self.main = main
 
         self.state = "main_menu"  # Default state is main_menu
         self.settings_state = "main"  # Default state is main
 
-    def game_won(self, winner, loser):
+    def game_won(self, winner, losers):
         """
         Sets the game state to game over.
         """
         self.state = "game_over"  # Set state to game_over
         self.winner = winner
-        self.loser = loser
+        self.losers = losers
+
+        # Replayed matches were already counted when they were played, and LAN matches
+        # are counted by their host
+        if self.main.engine.replay or self.main.engine.client:
+            return
 
         self.main.stats_manager.record_game_result(
             winner_name=self.winner.player_name,
-            loser_name=self.loser.player_name,
+            loser_names=[loser.player_name for loser in self.losers],
             maze_width=self.main.settings.maze_width,
             maze_height=self.main.settings.maze_height,
         )
@@ -37,6 +44,7 @@ class GameState:
         """
         self.state = "set_names"  # Set state to set_names
 
+    @tracer.traced("GameState.run_game")
     def run_game(self):
         """
         Sets the game state to running.
@@ -44,11 +52,14 @@ class GameState:
         self.state = "running"  # Set state to running
 
         self.winner = None
+        self.main.engine.start_match()
         self.main.generate_maze()
-        self.main.player1.reset()  # Reinitialize player1
-        self.main.player2.reset()  # Reinitialize player2
+        for player in self.main.players:
+            player.reset()  # Reinitialize the players
 
         self.main.stats_manager.start_game_timer()
+        if self.main.engine.host:
+            self.main.engine.host.start(self.main.engine.seed)
 
     def open_stats_menu(self):
         """
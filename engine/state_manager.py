@@ -4,48 +4,48 @@ This module contains the GameStateManager class for handling different game stat
 
 import pygame
 
+# Keys of the human players as (up, right, left, down), players beyond these are bots
+KEY_LAYOUTS = [
+    (pygame.K_w, pygame.K_d, pygame.K_a, pygame.K_s),
+    (pygame.K_UP, pygame.K_RIGHT, pygame.K_LEFT, pygame.K_DOWN),
+    (pygame.K_i, pygame.K_l, pygame.K_j, pygame.K_k),
+    (pygame.K_KP8, pygame.K_KP6, pygame.K_KP4, pygame.K_KP5),
+]
+
 
 class GameStateManager:
     """This class manages the different game states and their respective handlers."""
 
-    def __init__(self, main):
+    def __init__(self, main, profiler):
         self.main = main
+        self.profiler = profiler
+        self.alpha = 1.0  # Interpolation factor between the last two ticks
 
         self.states = {
             "running": {
                 "handle_events": self._handle_running_events,
                 "draw": self._draw_running_state,
             },
-            "main_menu": {
-                "handle_events": self.main.menu.handle_events,
-                "draw": self.main.menu.draw,
-            },
-            "set_names": {
-                "handle_events": self.main.set_name_menu.handle_events,
-                "draw": self.main.set_name_menu.draw,
-            },
-            "stats_menu": {
-                "handle_events": self.main.stats_menu.handle_events,
-                "draw": self.main.stats_menu.draw,
-            },
-            "game_over": {
-                "handle_events": self.main.gameover_menu.handle_events,
-                "draw": self.main.gameover_menu.draw,
-            },
+            "main_menu": self._menu_state("menu"),
+            "set_names": self._menu_state("set_name_menu"),
+            "stats_menu": self._menu_state("stats_menu"),
+            "game_over": self._menu_state("gameover_menu"),
             "settings_menu": {
                 "handle_events": self._handle_settings_events,
                 "draw": self._draw_settings_state,
             },
         }
 
-        self.player_keys = {
-            self.main.player1: [pygame.K_w, pygame.K_d, pygame.K_a, pygame.K_s],
-            self.main.player2: [
-                pygame.K_UP,
-                pygame.K_RIGHT,
-                pygame.K_LEFT,
-                pygame.K_DOWN,
-            ],
+    def _menu_state(self, menu_attribute):
+        """
+        Returns the handlers of a menu state. The menu is looked up on every call, so it
+        is only built when the state is first visited.
+        """
+        return {
+            "handle_events": lambda event: getattr(
+                self.main, menu_attribute
+            ).handle_events(event),
+            "draw": lambda: getattr(self.main, menu_attribute).draw(),
         }
 
     def handle_event(self, event):
@@ -55,23 +55,42 @@ class GameStateManager:
         if state and "handle_events" in state:
             state["handle_events"](event)
 
-    def draw_current_state(self):
+    def draw_current_state(self, alpha=1.0):
         """Draw the current state"""
+        self.alpha = alpha
         current_state = self.main.game_state.get_current_state()
         state = self.states.get(current_state)
         if state and "draw" in state:
-            state["draw"]()
+            if current_state == "running":
+                state["draw"]()
+            else:
+                with self.profiler.section("menu draw"):
+                    state["draw"]()
 
     def _handle_running_events(self, event):
         """Passes keyboard event handling to the appropriate players."""
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_h:
+            self.main.settings.hints_enabled = not self.main.settings.hints_enabled
+
+        # While a replay is playing, the players follow the recorded inputs and the
+        # left arrow rewinds it by a second
+        engine = self.main.engine
+        if engine.replay:
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_LEFT:
+                engine.rewind(self.main.settings.tick_rate)
+            return
+
+        # A LAN client controls only its own player, with the first key layout
+        client = engine.client
+        if client:
+            if event.type in (pygame.KEYDOWN, pygame.KEYUP):
+                client.player.handle_key_event(event, *KEY_LAYOUTS[0])
+            return
+
         if event.type in (pygame.KEYDOWN, pygame.KEYUP):
             # Pass key handling to players
-            self.main.player1.handle_key_event(
-                event, pygame.K_w, pygame.K_d, pygame.K_a, pygame.K_s
-            )
-            self.main.player2.handle_key_event(
-                event, pygame.K_UP, pygame.K_RIGHT, pygame.K_LEFT, pygame.K_DOWN
-            )
+            for player, keys in zip(self.main.players, KEY_LAYOUTS):
+                player.handle_key_event(event, *keys)
 
     def _handle_settings_events(self, event):
         """
@@ -92,9 +111,19 @@ class GameStateManager:
                 pass
 
     def _draw_running_state(self):
-        self.main.maze.draw()
-        self.main.player1.update()
-        self.main.player2.update()
+        with self.profiler.section("maze draw"):
+            self.main.maze.draw()
+        if self.main.settings.hints_enabled:
+            with self.profiler.section("hints"):
+                self.main.maze.hints.draw(self.main.screen, self.main.players)
+        with self.profiler.section("fog"):
+            self.main.maze.draw_fog()
+        with self.profiler.section("player draw"):
+            ghosts = self.main.engine.ghosts
+            if ghosts:
+                ghosts.draw(self.main.screen, self.main.engine.tick, self.alpha)
+            for player in self.main.players:
+                player.draw(self.alpha)
 
     def _draw_settings_state(self):
         """Draws the settings menu."""
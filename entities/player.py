@@ -1,6 +1,9 @@
 """This module defines the Player class, which represents a player in the game."""
 import pygame
 
+from simulation.effects import EffectStack
+from simulation.inputs import decode_input, encode_input
+
 
 class Player(pygame.sprite.Sprite):
     """
@@ -16,27 +19,82 @@ class Player(pygame.sprite.Sprite):
         self.player_no = player_no
         self.player_name = f"Player {player_no}"
 
-        self.speed = None
         self.width = None
         self.height = None
         self.movements = None
         self.color = None
+        self.corner = None  # Start corner as (right, bottom)
         self.pos = None
         self.x = None
         self.y = None
+        self.prev_x = None  # Position at the previous tick, used for interpolation
+        self.prev_y = None
 
         self.rect = None  # Adding the rect attribute
         self.image = None  # Adding the image attribute required by sprite
 
         self.alpha = 255  # Player transparency
-        self.frozen = False  # Frozen state
-        self.old_speed = None  # Stores speed before freezing
-        self.reversed_controls = False
+        self.effects = EffectStack()  # Active power-up and event effects
 
         self.player_number = player_no
 
         self.reset()
 
+    @property
+    def speed(self):
+        """Current speed with all active effects applied, 0 while frozen."""
+        return self.effects.speed
+
+    @property
+    def frozen(self):
+        """Whether an active effect freezes the player."""
+        return self.effects.frozen
+
+    @property
+    def reversed_controls(self):
+        """Whether an active effect reverses the player's controls."""
+        return self.effects.reversed_controls
+
+    def add_effect(self, effect):
+        """
+        Puts a status effect on the player. Returns a handle for remove_effect.
+        """
+        handle = self.effects.push(effect)
+        self._apply_size()
+        return handle
+
+    def remove_effect(self, handle):
+        """
+        Removes a status effect added by add_effect.
+        """
+        self.effects.pop(handle)
+        self._apply_size()
+
+    def _apply_size(self):
+        """
+        Resizes the player to the size given by its effects, keeping its center in place.
+        """
+        width, height = self.effects.size
+        if (width, height) == (self.width, self.height):
+            return
+        grown = width > self.width or height > self.height
+        old_x, old_y = self.x, self.y
+
+        center_x = self.x + self.width / 2
+        center_y = self.y + self.height / 2
+        self.width = width
+        self.height = height
+        self.x = int(center_x - width / 2)
+        self.y = int(center_y - height / 2)
+
+        self.update_image()
+        if grown:
+            self.push_out_of_wall()
+
+        # The previous position moves along, so the resize is not drawn as a slide
+        self.prev_x += self.x - old_x
+        self.prev_y += self.y - old_y
+
     def update_image(self):
         """
         Updates the player's image after resizing.
@@ -80,6 +138,40 @@ class Player(pygame.sprite.Sprite):
             elif event.key == key_down:
                 self.movements["down"] = action_value
 
+    def set_input(self, input_mask):
+        """
+        Sets the movement state from a bit mask of simulation.inputs flags.
+        Used by scripted and bot controllers instead of keyboard events.
+        """
+        up, right, left, down = decode_input(input_mask, self.reversed_controls)
+
+        self.movements["up"] = up
+        self.movements["right"] = right
+        self.movements["left"] = left
+        self.movements["down"] = down
+
+    def get_movement_mask(self):
+        """
+        Returns the current movement state as an input mask, with reversed controls
+        already applied.
+        """
+        movements = self.movements
+        return encode_input(
+            movements["up"], movements["right"], movements["left"], movements["down"]
+        )
+
+    def set_movement_mask(self, input_mask):
+        """
+        Sets the movement state from a mask returned by get_movement_mask.
+        Used to replay recorded inputs.
+        """
+        up, right, left, down = decode_input(input_mask)
+
+        self.movements["up"] = up
+        self.movements["right"] = right
+        self.movements["left"] = left
+        self.movements["down"] = down
+
     def set_name(self, name):
         """
         Sets the player's name.
@@ -88,32 +180,35 @@ class Player(pygame.sprite.Sprite):
 
     def reset_speed(self):
         """
-        Resets the player's speed to the default value.
+        Resets the player's base speed to the default value. Active effects still apply.
         """
-        self.speed = self.settings.player_speed
+        self.effects.set_base(self.settings.player_speed, self.effects.base_size)
 
     def reset(self):
         """
         Resets the player's position and movement state.
         """
-        self.speed = self.settings.player_speed
         self.width = self.settings.player_width
         self.height = self.settings.player_height
+        self.effects.clear()
+        self.effects.set_base(self.settings.player_speed, (self.width, self.height))
         self.movements = {"up": False, "down": False, "left": False, "right": False}
 
-        # depending on the player, set the color and initial position
-        if self.player_no == 1:
-            self.color = self.settings.player1_color
-            self.pos = self.settings.player1_initial_position
-        elif self.player_no == 2:
-            self.color = self.settings.player2_color
-            self.pos = self.settings.player2_initial_position
-        else:
-            raise ValueError("Player must be 1 or 2")
+        # depending on the player, set the color, start corner and initial position
+        index = self.player_no - 1
+        if not 0 <= index < self.settings.player_count:
+            raise ValueError(
+                f"Player must be between 1 and {self.settings.player_count}"
+            )
+        self.color = self.settings.player_colors[index]
+        self.corner = self.settings.player_corner(index)
+        self.pos = self.settings.player_initial_positions[index]
 
         self.original_color = self.color  # Save the original color
         self.x = self.pos[0]
         self.y = self.pos[1]
+        self.prev_x = self.x
+        self.prev_y = self.y
 
         # Initialize image and rect
         self.image = pygame.Surface([self.width, self.height])
@@ -122,7 +217,14 @@ class Player(pygame.sprite.Sprite):
         self.rect.x = self.x
         self.rect.y = self.y
 
-        self.reset_speed()
+    def teleport(self, x, y):
+        """
+        Moves the player instantly, without interpolating from the old position.
+        """
+        self.x = self.prev_x = x
+        self.y = self.prev_y = y
+        self.rect.x = x
+        self.rect.y = y
 
     def push_out_of_wall(self):
         """
@@ -130,50 +232,12 @@ class Player(pygame.sprite.Sprite):
         """
         # Check if the player collides with the wall
         if self.main.maze.check_collision(self.rect):
-            # List of directions to check (right, left, down, up, right-down, right-up, left-down, left-up)
-            directions = [
-                (1, 0),
-                (-1, 0),
-                (0, 1),
-                (0, -1),
-                (1, 1),
-                (1, -1),
-                (-1, 1),
-                (-1, -1),
-            ]
-
-            # Maximum search distance (e.g. half a block)
-            max_distance = self.main.settings.block_size // 2
-
-            # Find the nearest free space
-            best_distance = float("inf")
-            best_position = (self.x, self.y)
-
-            for distance in range(1, max_distance + 1):
-                for dx, dy in directions:
-                    new_x = self.x + dx * distance
-                    new_y = self.y + dy * distance
-
-                    # Check if the new position is within the screen bounds
-                    if (
-                        new_x < 0
-                        or new_x + self.width > self.screen.get_width()
-                        or new_y < 0
-                        or new_y + self.height > self.screen.get_height()
-                    ):
-                        continue
-
-                    # Check if there is no collision at the new position
-                    test_rect = pygame.Rect(new_x, new_y, self.width, self.height)
-                    if not self.main.maze.check_collision(test_rect):
-                        # Calculate the distance from the original position
-                        dist = abs(new_x - self.x) + abs(new_y - self.y)
-                        if dist < best_distance:
-                            best_distance = dist
-                            best_position = (new_x, new_y)
+            best_position = self.main.maze.collider.push_out_of_wall(
+                self.x, self.y, self.width, self.height
+            )
 
             # Set the player to the found position
-            if best_distance < float("inf"):
+            if best_position is not None:
                 self.x, self.y = best_position
                 self.rect.x, self.rect.y = best_position
                 self.update_image()
@@ -181,70 +245,32 @@ class Player(pygame.sprite.Sprite):
     def update(self):
         """
         Updates the player's position based on the current movement state.
+        Called once per simulation tick.
         """
+        self.prev_x = self.x
+        self.prev_y = self.y
+
         # If the player is frozen, do not update the position
         if self.frozen:
-            self.draw()
             return
 
-        # Check if speed is not None
-        if self.speed is None:
-            self.speed = self.settings.player_speed
-
-        new_x = self.x
-        new_y = self.y
-
-        # Calculate the new position based on the pressed keys
-        if self.movements["up"]:
-            new_y = self.y - self.speed if self.y - self.speed > 0 else 0
-        if self.movements["down"]:
-            new_y = min(self.y + self.speed, self.screen.get_height() - self.height)
-        if self.movements["left"]:
-            new_x = self.x - self.speed if self.x - self.speed > 0 else 0
-        if self.movements["right"]:
-            new_x = min(self.x + self.speed, self.screen.get_width() - self.width)
-
-        # Handle collisions in the horizontal direction (X)
-        if new_x != self.x:
-            tmp_rect_x = pygame.Rect(new_x, self.y, self.width, self.height)
-            if self.main.maze.check_collision(tmp_rect_x):
-                # If a collision is detected, find the nearest allowed position
-                step = 1 if new_x > self.x else -1
-                test_x = self.x
-                while test_x != new_x:
-                    test_x += step
-                    test_rect = pygame.Rect(test_x, self.y, self.width, self.height)
-                    if self.main.maze.check_collision(test_rect):
-                        new_x = test_x - step
-                        break
-
-        # Update X position
-        self.x = new_x
-        self.rect.x = new_x
-
-        # Handle collisions in the vertical direction (Y)
-        if new_y != self.y:
-            tmp_rect_y = pygame.Rect(self.x, new_y, self.width, self.height)
-            if self.main.maze.check_collision(tmp_rect_y):
-                # If a collision is detected, find the nearest allowed position
-                step = 1 if new_y > self.y else -1
-                test_y = self.y
-                while test_y != new_y:
-                    test_y += step
-                    test_rect = pygame.Rect(self.x, test_y, self.width, self.height)
-                    if self.main.maze.check_collision(test_rect):
-                        new_y = test_y - step
-                        break
-
-        # Update Y position
-        self.y = new_y
-        self.rect.y = new_y
-
-        self.draw()
-
-    def draw(self):
+        movement = (
+            self.movements["up"],
+            self.movements["right"],
+            self.movements["left"],
+            self.movements["down"],
+        )
+
+        # Move along X and then Y, stopping flush against any wall in the way
+        self.x, self.y = self.main.maze.collider.move(
+            self.x, self.y, self.width, self.height, self.speed, movement
+        )
+        self.rect.x = self.x
+        self.rect.y = self.y
+
+    def draw(self, alpha=1.0):
         """
-        Draws the player on the screen.
+        Draws the player on the screen, interpolated between the last two ticks.
         """
         curr_color = self.color
         if self.frozen and self.reversed_controls:
@@ -254,4 +280,7 @@ class Player(pygame.sprite.Sprite):
         elif self.reversed_controls:
             curr_color = self.settings.reverse_controls_color
 
-        self.screen.fill(curr_color, (self.x, self.y, self.width, self.height))
+        draw_x = self.prev_x + (self.x - self.prev_x) * alpha
+        draw_y = self.prev_y + (self.y - self.prev_y) * alpha
+
+        self.screen.fill(curr_color, (draw_x, draw_y, self.width, self.height))
@@ -1,8 +1,8 @@
-"""Manages random events that affect both players during gameplay."""
+"""Manages random events that affect all players during gameplay."""
 
-import random
-
-import pygame
+from simulation.rules import event_interval
+from util.fonts import get_font, render_text
+from util.tracing import tracer
 
 from .events import (FatigueEvent, InvisibleWallsEvent, ShortcutRevealEvent,
                      TeleportationEvent)
@@ -32,15 +32,15 @@ class EventManager:
         min_interval = getattr(self.main.settings, "event_min_interval", 10000)
         max_interval = getattr(self.main.settings, "event_max_interval", 20000)
 
-        # Add some progression - events become more frequent over time
-        game_time = pygame.time.get_ticks()
-        progression_factor = min(1.0, game_time / 60000)
-
-        min_interval = int(min_interval * (1 - progression_factor * 0.3))
-        max_interval = int(max_interval * (1 - progression_factor * 0.3))
+        game_time = self.main.engine.time_ms
+        interval = event_interval(game_time, min_interval, max_interval, self.main.rng)
+        self.next_event_time = game_time + interval
 
-        interval = random.randint(min_interval, max_interval)
-        self.next_event_time = pygame.time.get_ticks() + interval
+    def reset(self):
+        """Forget the events of the previous match and schedule the first one."""
+        self.active_events = []
+        self.next_event_time = 0
+        self._schedule_next_event()
 
     def _events_enabled(self):
         """Check if events are enabled in settings."""
@@ -64,7 +64,7 @@ class EventManager:
         if not self._events_enabled():
             return
 
-        current_time = pygame.time.get_ticks()
+        current_time = self.main.engine.time_ms
 
         if (
             current_time >= self.next_event_time
@@ -87,11 +87,36 @@ class EventManager:
         if self.active_events:
             return
 
-        event_class = random.choice(enabled_events)
+        event_class = self.main.rng.choice(enabled_events)
         event = event_class()
-        event.activate(self.main)
+        with tracer.span("EventManager.activate", event=event.name):
+            event.activate(self.main)
         self.active_events.append(event)
 
+    def save_state(self):
+        """Returns the active events and the event timers as a value for load_state."""
+        return (
+            tuple((event, event.save_state()) for event in self.active_events),
+            self.last_event_time,
+            self.next_event_time,
+        )
+
+    def load_state(self, state):
+        """
+        Restores the events saved by save_state. The maze and the players are restored
+        separately, so events are only shown or hidden again.
+        """
+        events, self.last_event_time, self.next_event_time = state
+        restored = [event for event, _ in events]
+        for event in self.active_events:
+            if event not in restored:
+                event.hide(self.main)
+        for event, event_state in events:
+            if event not in self.active_events:
+                event.show(self.main)
+            event.load_state(event_state)
+        self.active_events = restored
+
     def get_active_events(self):
         """Get list of currently active events."""
         return [event.name for event in self.active_events]
@@ -101,7 +126,7 @@ class EventManager:
         if not self.active_events:
             return
 
-        font = pygame.font.SysFont("arial", 24)
+        font = get_font("arial", 24)
         y_offset = 10
 
         for event in self.active_events:
@@ -118,10 +143,10 @@ class EventManager:
             text = f"ACTIVE: {event.name}"
             if event.duration > 0:  # Show remaining time for timed events
                 remaining = max(
-                    0, event.duration - (pygame.time.get_ticks() - event.start_time)
+                    0, event.duration - (self.main.engine.time_ms - event.start_time)
                 )
                 text += f" ({remaining // 1000}s)"
 
-            text_surface = font.render(text, True, color)
+            text_surface = render_text(font, text, color)
             screen.blit(text_surface, (10, y_offset))
             y_offset += 30
@@ -1,10 +1,9 @@
 """This module defines classes for various game events that can occur during gameplay."""
 
-import random
-
-import pygame
-
 from maze.maze import Floor
+from simulation.effects import FATIGUE
+from simulation.rules import (EVENT_DURATIONS, mirror_floor, shortcut_cells,
+                              teleportation_floors)
 
 
 class GameEvent:
@@ -19,7 +18,7 @@ class GameEvent:
     def activate(self, main):
         """Activate the event."""
         self.active = True
-        self.start_time = pygame.time.get_ticks()
+        self.start_time = main.engine.time_ms
         self._apply_effect(main)
 
     def _apply_effect(self, main):
@@ -29,7 +28,7 @@ class GameEvent:
     def update(self, main):
         """Update the event state and check if it should be deactivated."""
         if self.active:
-            current_time = pygame.time.get_ticks()
+            current_time = main.engine.time_ms
             if current_time - self.start_time >= self.duration:
                 self.deactivate(main)
                 return True
@@ -44,148 +43,152 @@ class GameEvent:
         """Restore original state after event ends. Override in subclasses."""
         raise NotImplementedError("This method should be overridden by subclasses.")
 
+    def show(self, main):
+        """
+        Shows an event whose effects on the simulation are already in place, activated
+        on the host of a LAN game or restored from a snapshot. Only what is drawn
+        locally is changed.
+        """
+        self.active = True
+        self.start_time = main.engine.time_ms
+
+    def hide(self, main):
+        """Hides an event shown by show, without undoing its effects on the simulation."""
+        self.active = False
+
+    def save_state(self):
+        """Returns the event's state as a value for load_state."""
+        return self.active, self.start_time
+
+    def load_state(self, state):
+        """Restores the state saved by save_state."""
+        self.active, self.start_time = state
+
 
 class InvisibleWallsEvent(GameEvent):
     """Event that makes maze walls temporarily invisible."""
 
     def __init__(self):
-        super().__init__("Invisible Walls", 5000)
+        super().__init__("Invisible Walls", EVENT_DURATIONS["invisible_walls"])
 
     def _apply_effect(self, main):
         """Make all walls invisible by changing their color to white."""
-        for wall in main.maze.walls:
-            wall.image.fill(main.settings.invis_wall_color)
+        main.maze.wall_image.fill(main.settings.invis_wall_color)
+        main.maze.refresh()
 
     def _restore_effect(self, main):
         """Restore the recolored walls."""
-        for wall in main.maze.walls:
-            wall.image.fill(main.settings.wall_color)
+        main.maze.wall_image.fill(main.settings.wall_color)
+        main.maze.refresh()
+
+    def show(self, main):
+        """The recolored walls are only drawn, so the client recolors them itself."""
+        super().show(main)
+        self._apply_effect(main)
+
+    def hide(self, main):
+        """Restore the recolored walls."""
+        super().hide(main)
+        self._restore_effect(main)
 
 
 class ShortcutRevealEvent(GameEvent):
     """Event that reveals shortcuts by temporarily removing walls next to players."""
 
     def __init__(self):
-        super().__init__("Shortcut Reveal", 5000)
+        super().__init__("Shortcut Reveal", EVENT_DURATIONS["shortcut_reveal"])
         self.revealed_walls = []
         self.original_wall_positions = []
 
     def _apply_effect(self, main):
-        """Remove walls next to both players."""
+        """Remove walls next to all players."""
         self.revealed_walls = []
         self.original_wall_positions = []
 
-        players = [main.player1, main.player2]
-
-        for player in players:
-            player_grid_x = (
-                player.rect.centerx - main.maze.offset_x
-            ) // main.settings.block_size
-            player_grid_y = (
-                player.rect.centery - main.maze.offset_y
-            ) // main.settings.block_size
-
-            adjacent_positions = [
-                (player_grid_x, player_grid_y),
-                (player_grid_x, player_grid_y - 1),
-                (player_grid_x, player_grid_y + 1),
-                (player_grid_x - 1, player_grid_y),
-                (player_grid_x + 1, player_grid_y),
-            ]
-
-            for grid_x, grid_y in adjacent_positions:
-                if (
-                    0 < grid_x < len(main.maze.maze[0]) - 1
-                    and 0 < grid_y < len(main.maze.maze) - 1
-                    and main.maze.maze[grid_y][grid_x] == 1
-                ):
-
-                    pixel_x = main.maze.offset_x + grid_x * main.settings.block_size
-                    pixel_y = main.maze.offset_y + grid_y * main.settings.block_size
-
-                    for wall in main.maze.walls:
-                        if wall.rect.x == pixel_x and wall.rect.y == pixel_y:
-                            main.maze.walls.remove(wall)
-                            self.revealed_walls.append(wall)
-
-                            main.maze.maze[grid_y][grid_x] = 0
-
-                            floor = Floor(
-                                (main.settings.shortcut_color),
-                                pixel_x,
-                                pixel_y,
-                                main.settings.block_size,
-                            )
-                            main.maze.floors.add(floor)
-
-                            self.original_wall_positions.append(
-                                (grid_x, grid_y, wall, floor)
-                            )
-                            break
+        maze = main.maze
+        block_size = main.settings.block_size
+        tiles = [
+            (
+                (player.rect.centerx - maze.offset_x) // block_size,
+                (player.rect.centery - maze.offset_y) // block_size,
+            )
+            for player in main.players
+        ]
 
-    def _restore_effect(self, main):
-        """Restore the removed walls after the event ends."""
-        for grid_x, grid_y, wall, floor in self.original_wall_positions:
-            main.maze.floors.remove(floor)
+        for grid_x, grid_y in shortcut_cells(maze.maze, tiles):
+            pixel_x = maze.offset_x + grid_x * block_size
+            pixel_y = maze.offset_y + grid_y * block_size
+
+            wall = maze.tiles[(grid_x, grid_y)]
+            self.revealed_walls.append(wall)
 
-            main.maze.walls.add(wall)
+            floor = Floor(main.settings.shortcut_color, pixel_x, pixel_y, block_size)
+            maze.replace_tile(grid_x, grid_y, 0, floor)
 
-            main.maze.maze[grid_y][grid_x] = 1
+            self.original_wall_positions.append((grid_x, grid_y, wall, floor))
+
+    def _restore_effect(self, main):
+        """Restore the removed walls after the event ends."""
+        for grid_x, grid_y, wall, _ in self.original_wall_positions:
+            main.maze.replace_tile(grid_x, grid_y, 1, wall)
 
         self.revealed_walls.clear()
         self.original_wall_positions.clear()
 
-        for player in [main.player1, main.player2]:
+        for player in main.players:
             player.push_out_of_wall()
 
+    def save_state(self):
+        """The removed walls are saved as well, the maze saves the tiles themselves."""
+        return (
+            super().save_state(),
+            tuple(self.revealed_walls),
+            tuple(self.original_wall_positions),
+        )
+
+    def load_state(self, state):
+        """Restores the state saved by save_state."""
+        event, revealed_walls, original_wall_positions = state
+        super().load_state(event)
+        self.revealed_walls = list(revealed_walls)
+        self.original_wall_positions = list(original_wall_positions)
+
 
 class TeleportationEvent(GameEvent):
-    """Event that teleports both players to random mirrored locations."""
+    """Event that teleports all players to random mirrored locations."""
 
     def __init__(self):
-        super().__init__("Teleportation", 0)
+        super().__init__("Teleportation", EVENT_DURATIONS["teleportation"])
 
     def _apply_effect(self, main):
-        """Teleport both players to mirrored random locations."""
-        available_floors = []
-        block_offset_p1 = (main.settings.block_size - main.player1.width) // 2
-        block_offset_p2 = (main.settings.block_size - main.player2.width) // 2
-
-        mid_x = main.settings.screen_width // 2
-        safe_margin = main.settings.block_size * 3
-
-        left_zone, right_zone = main.engine.win_zone
-
-        for floor in main.maze.floors:
-            floor_center_x = floor.rect.centerx
-
-            is_in_win_zone = left_zone <= floor_center_x <= right_zone
-
-            if not is_in_win_zone and floor.rect.centerx < mid_x - safe_margin:
-                available_floors.append(floor)
+        """
+        Teleport all players to mirrored random locations: a floor on the left of the map,
+        in its top left quadrant on maps with four quadrants, mirrored into every
+        player's own part of the map.
+        """
+        settings = main.settings
+        available_floors = teleportation_floors(
+            [(floor.rect.x, floor.rect.y) for floor in main.maze.floors],
+            settings.middle,
+            settings.block_size,
+            main.engine.win_zone,
+            settings.quadrant_map,
+        )
 
         if available_floors:
-            new_floor1 = random.choice(available_floors)
-
-            p1_x = new_floor1.rect.x
-            p1_y = new_floor1.rect.y
-            p2_x = main.settings.screen_width - p1_x - main.settings.block_size
-            p2_y = p1_y
-
-            p1_x += block_offset_p1
-            p1_y += block_offset_p1
-            p2_x += block_offset_p2
-            p2_y += block_offset_p2
-
-            main.player1.x = p1_x
-            main.player1.y = p1_y
-            main.player1.rect.x = main.player1.x
-            main.player1.rect.y = main.player1.y
-
-            main.player2.x = p2_x
-            main.player2.y = p2_y
-            main.player2.rect.x = main.player2.x
-            main.player2.rect.y = main.player2.y
+            new_floor = main.rng.choice(available_floors)
+
+            for player in main.players:
+                player.teleport(
+                    *mirror_floor(
+                        new_floor,
+                        player.corner,
+                        player.width,
+                        settings.middle,
+                        settings.block_size,
+                        settings.quadrant_map,
+                    )
+                )
 
     def update(self, main):
         """Teleportation is instant, so deactivate immediately."""
@@ -199,24 +202,29 @@ class TeleportationEvent(GameEvent):
 
 
 class FatigueEvent(GameEvent):
-    """Event that reduces both players' speed for a duration."""
+    """Event that reduces all players' speed for a duration."""
 
     def __init__(self):
-        super().__init__("Fatigue", 5000)
-        self.original_speeds = {}
+        super().__init__("Fatigue", EVENT_DURATIONS["fatigue"])
+        self.effect_handles = {}
 
     def _apply_effect(self, main):
-        """Reduce both players' speed."""
-        self.original_speeds[1] = main.player1.speed
-        self.original_speeds[2] = main.player2.speed
-
-        main.player1.speed = int(main.player1.speed * 0.5)
-        main.player2.speed = int(main.player2.speed * 0.5)
+        """Reduce all players' speed."""
+        for player in main.players:
+            self.effect_handles[player] = player.add_effect(FATIGUE)
 
     def _restore_effect(self, main):
-        """Restore original speeds."""
-        if 1 in self.original_speeds:
-            main.player1.speed = self.original_speeds[1]
-        if 2 in self.original_speeds:
-            main.player2.speed = self.original_speeds[2]
-        self.original_speeds.clear()
+        """Lift the fatigue, other speed effects stay in place."""
+        for player, handle in self.effect_handles.items():
+            player.remove_effect(handle)
+        self.effect_handles.clear()
+
+    def save_state(self):
+        """The handles are saved as well, the players save the effects themselves."""
+        return super().save_state(), tuple(self.effect_handles.items())
+
+    def load_state(self, state):
+        """Restores the state saved by save_state."""
+        event, effect_handles = state
+        super().load_state(event)
+        self.effect_handles = dict(effect_handles)
@@ -1,19 +1,33 @@
 """
-LabyRun is a 2D maze game where two players race through a maze to reach the treasure.
+LabyRun is a 2D maze game where players race through a maze to reach the treasure.
 Authors: Paweł Czajczyk, Jakub Psarski
 """
 
+import argparse
+import os
+import random
+import time
+from functools import cached_property
+
 import pygame
 
-from engine import Engine, GameState
+from engine import (KEY_LAYOUTS, BotController, Engine, GameState, GhostRace,
+                    HeadlessRunner, RandomWalkController, Replay, ReplayPlayer,
+                    ReplayRecorder, SnapshotRandom, SnapshotRing)
 from entities import Player
 from events import EventManager
 from maze import Maze, MazeGenerator
 from menu import (EventMenu, GameMenu, GameOverMenu, MainMenu, PowerupMenu,
                   SetNames, SettingsMenu, StatsMenu)
+from net import DEFAULT_PORT, NetClient, NetHost
 from powerups import PowerUpManager
 from stats import StatsManager
-from util import Settings
+from util import MAX_PLAYERS, SamplingProfiler, Settings, StartupTimer, tracer
+from util.sampling import DEFAULT_PROFILE_FILE
+from util.tracing import DEFAULT_TRACE_FILE
+
+
+HEADLESS_RESOLUTION = (1920, 1080)
 
 
 class LabyRunGame:
@@ -21,57 +35,380 @@ class LabyRunGame:
     Main class for the game.
     """
 
-    def __init__(self):
-        pygame.init()
+    def __init__(self, headless=False, resolution=None, seed=None, startup_timing=False):
+        self.startup_timer = StartupTimer(verbose=startup_timing)
+        self.headless = headless
+        if headless:
+            # SDL has to pick the dummy drivers before pygame is initialized
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+            os.environ["SDL_AUDIODRIVER"] = "dummy"
 
-        self.screen = pygame.display.set_mode()
-        self.settings = Settings(self)
+        # The game has no sound, so only the modules it uses are initialized
+        pygame.display.init()
+        pygame.font.init()
+        self.startup_timer.mark("pygame init")
 
-        self.screen = pygame.display.set_mode(
-            (self.settings.screen_width, self.settings.screen_height)
-        )
+        # Without a resolution the window covers the whole desktop
+        if headless:
+            resolution = resolution or HEADLESS_RESOLUTION
+        self.screen = pygame.display.set_mode(resolution or (0, 0))
         pygame.display.set_caption("LabyRun")
+        self.startup_timer.mark("display")
 
+        self.settings = Settings(self)
         self.powerup_manager = PowerUpManager(self)
-
         self.clock = pygame.time.Clock()
-        pygame.display.set_caption("LabyRun")
 
+        # Every match is seeded from seed_source, and all of its randomness comes from rng
+        self.seed_source = random.Random(seed)
+        self.rng = SnapshotRandom()
+
+        # The first maze is generated when a match starts
         self.maze = None
-        self.generate_maze()
 
-        self.player1 = Player(self, 1)
-        self.player2 = Player(self, 2)
+        self.players = []
+        self.update_players()
 
         self.game_state = GameState(self)
-        self.menu = MainMenu(self)
-        self.gameover_menu = GameOverMenu(self)
-        self.settings_menu = SettingsMenu(self)
-        self.set_name_menu = SetNames(self)
-        self.stats_menu = StatsMenu(self)
-        self.game_menu = GameMenu(self)
-        self.powerup_menu = PowerupMenu(self)
-        self.event_menu = EventMenu(self)
-
         self.engine = Engine(self)
         self.event_manager = EventManager(self)
-        self.stats_manager = StatsManager(".data/player_stats.json")
+        self.startup_timer.mark("game objects")
+
+        # Headless matches must not pollute the real leaderboard
+        self.stats_manager = StatsManager(
+            ".data/headless_stats.json" if headless else ".data/player_stats.json"
+        )
+        self.startup_timer.mark("stats")
+
+    @property
+    def player1(self):
+        """First player, controlled with WASD."""
+        return self.players[0]
+
+    @property
+    def player2(self):
+        """Second player, controlled with the arrow keys."""
+        return self.players[1]
+
+    def update_players(self):
+        """
+        Adds or removes players to match the number in the settings and resets them.
+        """
+        count = self.settings.player_count
+        del self.players[count:]
+        for number in range(len(self.players) + 1, count + 1):
+            self.players.append(Player(self, number))
+        for player in self.players:
+            player.reset()
+
+    # Menus are built on their first visit
+    @cached_property
+    def menu(self):
+        """Main menu."""
+        return MainMenu(self)
+
+    @cached_property
+    def gameover_menu(self):
+        """Menu shown after a match."""
+        return GameOverMenu(self)
+
+    @cached_property
+    def settings_menu(self):
+        """Main settings page."""
+        return SettingsMenu(self)
+
+    @cached_property
+    def set_name_menu(self):
+        """Player name entry page."""
+        return SetNames(self)
+
+    @cached_property
+    def stats_menu(self):
+        """Leaderboard."""
+        return StatsMenu(self)
+
+    @cached_property
+    def game_menu(self):
+        """Maze size and fog settings page."""
+        return GameMenu(self)
+
+    @cached_property
+    def powerup_menu(self):
+        """Power-up settings page."""
+        return PowerupMenu(self)
+
+    @cached_property
+    def event_menu(self):
+        """Random event settings page."""
+        return EventMenu(self)
 
     def generate_maze(self):
         """
         Generates the maze.
         """
-        MazeGenerator.create_map(self.settings.maze_width, self.settings.maze_height)
-        self.maze = Maze(self, ".maps/map.json")
+        MazeGenerator.create_map(
+            self.settings.maze_width,
+            self.settings.maze_height,
+            self.rng,
+            quadrants=self.settings.quadrant_map,
+        )
+        # Next to this file, where create_map writes it, whatever the working directory
+        map_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".maps", "map.json")
+        self.maze = Maze(self, map_file)
         self.settings.calculate_initial_positions()
 
+    def next_match_seed(self):
+        """
+        Returns the seed for the next match.
+        """
+        return self.seed_source.randrange(2**32)
+
+    def seed_match(self, seed):
+        """
+        Reseeds the random number generator used by the maze, power-ups and events.
+        """
+        self.rng.seed(seed)
+
     def run(self):
         """
         Runs the game.
         """
         self.engine.run()
 
+    def run_replay(self, replay):
+        """
+        Plays back a recorded match, in the window or as fast as possible when headless.
+        In the window, the left arrow rewinds it by a second.
+        """
+        replay.apply_settings(self)
+        self.engine.replay = ReplayPlayer(replay)
+        if not self.headless:
+            self.engine.snapshots = SnapshotRing(self)
+        self.game_state.run_game()
+
+        if not self.headless:
+            self.run()
+            return
+
+        start = time.perf_counter()
+        while self.game_state.get_current_state() == "running":
+            self.engine.step()
+        elapsed = time.perf_counter() - start
+        print(
+            f"Replayed {self.engine.tick} ticks in {elapsed:.2f}s "
+            f"= {self.engine.tick / elapsed:.0f} ticks/s"
+        )
+
+    def run_headless(self, matches, max_ticks, seed=None, bots=(), host=None):
+        """
+        Plays matches with scripted inputs as fast as possible and prints a report.
+        Players whose numbers are in bots are driven by bots instead of random walks.
+        With a LAN host, its client plays one of the players and the matches run in
+        real time.
+        """
+        seed = 0 if seed is None else seed
+        controllers = [
+            BotController() if number in bots else RandomWalkController(seed + number - 1)
+            for number in range(1, self.settings.player_count + 1)
+        ]
+        if host:
+            controllers[host.player_number - 1] = host
+        report = HeadlessRunner(self, controllers, max_ticks, realtime=bool(host)).run(
+            matches
+        )
+        print(report)
+        if host:
+            print(f"Network: {host.stats}")
+            host.close()
+        return report
+
+    def run_client(self, client, seed=None, bots=()):
+        """
+        Plays the matches of a LAN host without a window until the host leaves, then
+        prints the network statistics. The client's player is driven by a bot if its
+        number is in bots, by a random walk otherwise.
+        """
+        seed = 0 if seed is None else seed
+        if client.player_number in bots:
+            controller = BotController()
+        else:
+            controller = RandomWalkController(seed)
+        matches = 0
+        connected = True
+        while connected:
+            if self.game_state.get_current_state() == "running":
+                player = client.player
+                player.set_input(controller.get_input(player, self.engine.tick))
+                connected = client.step()
+                if self.game_state.get_current_state() == "running":
+                    connected = connected and client.poll(timeout=self.engine.time_step)
+                if self.game_state.get_current_state() != "running":
+                    matches += 1
+            else:
+                connected = client.poll(timeout=self.engine.time_step)
+        print(f"Played {matches} matches, network: {client.stats}")
+
+
+def parse_args():
+    """
+    Parses the command line arguments.
+    """
+    parser = argparse.ArgumentParser(description="LabyRun maze racing game")
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="play scripted matches without a window and without a frame cap",
+    )
+    parser.add_argument(
+        "--matches", type=int, default=10, help="number of headless matches"
+    )
+    parser.add_argument(
+        "--max-ticks",
+        type=int,
+        default=36000,
+        help="ticks after which a headless match ends in a draw",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="seed for the matches and the scripted inputs",
+    )
+    parser.add_argument(
+        "--players",
+        type=int,
+        choices=range(2, MAX_PLAYERS + 1),
+        default=2,
+        metavar="N",
+        help=f"number of players, 2 to {MAX_PLAYERS}; more than 2 race on a map of "
+        "four quadrants",
+    )
+    parser.add_argument(
+        "--bot",
+        type=int,
+        choices=range(1, MAX_PLAYERS + 1),
+        action="append",
+        default=[],
+        metavar="PLAYER",
+        help="let a bot control the player with the given number, may be repeated; "
+        f"in a window, players after the first {len(KEY_LAYOUTS)} are always bots",
+    )
+    parser.add_argument(
+        "--startup-timing",
+        action="store_true",
+        help="print how long each startup phase took until the first frame",
+    )
+    parser.add_argument(
+        "--record",
+        nargs="?",
+        const=".data/replays",
+        default=None,
+        metavar="DIR",
+        help="save a replay of every match (default directory .data/replays)",
+    )
+    parser.add_argument(
+        "--replay",
+        default=None,
+        metavar="FILE",
+        help="play back a replay file, combine with --headless to skip rendering",
+    )
+    parser.add_argument(
+        "--ghost",
+        action="store_true",
+        help="race against a ghost of the fastest run on the same maze, saved next to "
+        "the stats; mazes repeat between sessions started with the same --seed",
+    )
+    parser.add_argument(
+        "--trace",
+        nargs="?",
+        const=DEFAULT_TRACE_FILE,
+        default=None,
+        metavar="PATH",
+        help=f"record a Chrome/Perfetto trace, written at exit (default {DEFAULT_TRACE_FILE})",
+    )
+    parser.add_argument(
+        "--sample",
+        nargs="?",
+        const=DEFAULT_PROFILE_FILE,
+        default=None,
+        metavar="PATH",
+        help="sample the call stack and write collapsed stacks for flamegraph tools "
+        f"at exit (default {DEFAULT_PROFILE_FILE})",
+    )
+    parser.add_argument(
+        "--sample-interval",
+        type=float,
+        default=5.0,
+        metavar="MS",
+        help="milliseconds between stack samples",
+    )
+    parser.add_argument(
+        "--host",
+        nargs="?",
+        type=int,
+        const=DEFAULT_PORT,
+        default=None,
+        metavar="PORT",
+        help="host a LAN game, a client joining on the port plays player 2 "
+        f"(default port {DEFAULT_PORT})",
+    )
+    parser.add_argument(
+        "--connect",
+        default=None,
+        metavar="ADDRESS",
+        help="join the LAN game hosted at HOST[:PORT]",
+    )
+    parser.add_argument(
+        "--name", default="", help="name of your player in a LAN game"
+    )
+    return parser.parse_args()
+
 
 if __name__ == "__main__":
-    game = LabyRunGame()
-    game.run()
+    args = parse_args()
+    if args.trace:
+        tracer.enable(args.trace)
+    if args.sample:
+        SamplingProfiler(args.sample, args.sample_interval / 1000).start()
+    replay = Replay.load(args.replay) if args.replay else None
+    # The matches of a LAN host are drawn at the host's resolution
+    client = NetClient.connect(args.connect, args.name) if args.connect else None
+    if replay:
+        resolution = replay.resolution
+    else:
+        resolution = client.resolution if client else None
+    game = LabyRunGame(
+        headless=args.headless,
+        resolution=resolution,
+        seed=args.seed,
+        startup_timing=args.startup_timing,
+    )
+    game.settings.set_player_count(args.players)
+    if args.record:
+        game.engine.recorder = ReplayRecorder(args.record)
+    if args.ghost:
+        game.engine.ghosts = GhostRace(game, game.stats_manager.ghost_directory)
+    host = NetHost(game, args.host) if args.host is not None else None
+
+    if replay:
+        game.run_replay(replay)
+    elif client:
+        client.attach(game)
+        if args.headless:
+            game.run_client(client, args.seed, args.bot)
+        else:
+            game.run()
+    elif args.headless:
+        if host:
+            host.wait_for_client()
+        game.run_headless(args.matches, args.max_ticks, args.seed, args.bot, host)
+    else:
+        # Players without a keyboard layout are driven by bots
+        game.engine.bots = {
+            number: BotController()
+            for number in range(1, MAX_PLAYERS + 1)
+            if number in args.bot or number > len(KEY_LAYOUTS)
+        }
+        if host:
+            host.wait_for_client()
+        game.run()
@@ -0,0 +1,78 @@
+"""
+This module contains the HintOverlay class, which draws each player's shortest way to the
+win zone.
+"""
+
+import pygame
+
+TRANSPARENT = (0, 0, 0)  # Color key of the path surfaces
+
+
+class HintOverlay:
+    """
+    Draws the shortest path from every player's tile to the win zone.
+
+    Paths follow the maze's distance field, which is only updated when the grid changes.
+    Each path is drawn once onto a surface covering just the path, and redrawn only when
+    its player enters another tile or the distance field changes.
+    """
+
+    def __init__(self, maze):
+        self.maze = maze
+        self.settings = maze.settings
+        self.paths = {}  # Player -> (tile, field version, surface, position)
+
+    def draw(self, screen, players):
+        """
+        Draws the hints of the given players.
+        """
+        field = self.maze.distance_field
+        tile_at = self.maze.collider.tile_at
+        for player in players:
+            tile = tile_at(player.x + player.width / 2, player.y + player.height / 2)
+            cached = self.paths.get(player)
+            if cached is None or cached[0] != tile or cached[1] != field.version:
+                cached = (tile, field.version, *self._render_path(field.path(*tile)))
+                self.paths[player] = cached
+
+            surface, position = cached[2], cached[3]
+            if surface is not None:
+                screen.blit(surface, position)
+
+    def _render_path(self, tiles):
+        """
+        Returns a surface with a line through the centers of the tiles and the screen
+        position to draw it at, or (None, None) if there is no path to draw.
+        """
+        if len(tiles) < 2:
+            return None, None
+
+        block_size = self.maze.block_size
+        width = max(2, block_size // 4)
+        half = block_size // 2
+        points = [
+            (
+                self.maze.offset_x + col * block_size + half,
+                self.maze.offset_y + row * block_size + half,
+            )
+            for col, row in tiles
+        ]
+
+        left = min(x for x, _ in points) - width
+        top = min(y for _, y in points) - width
+        right = max(x for x, _ in points) + width
+        bottom = max(y for _, y in points) + width
+
+        # Most of the surface is transparent, run-length encoding lets blits skip it
+        surface = pygame.Surface((right - left + 1, bottom - top + 1))
+        surface.set_colorkey(TRANSPARENT, pygame.RLEACCEL)
+        surface.set_alpha(self.settings.hint_alpha, pygame.RLEACCEL)
+        surface.fill(TRANSPARENT)
+
+        local_points = [(x - left, y - top) for x, y in points]
+        color = self.settings.hint_color
+        pygame.draw.lines(surface, color, False, local_points, width)
+        for point in local_points:
+            # Rounds off the corners of the thick line
+            pygame.draw.circle(surface, color, point, width // 2)
+        return surface, (left, top)
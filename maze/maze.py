@@ -5,12 +5,17 @@ and managing the maze, including fog of war and power-ups.
 
 import json
 import math
-import random
 
 import pygame.sprite
 
 from powerups import (Enlarge, Freeze, ReverseControls, SlowDown, SpeedBoost,
                       Teleport)
+from simulation.fields import DistanceField, win_columns, win_rows
+from simulation.physics import GridCollider
+from simulation.rules import power_up_count, power_up_positions
+from util.tracing import tracer
+
+from .hints import HintOverlay
 
 
 class Maze:
@@ -27,6 +32,12 @@ class Maze:
         self.walls = pygame.sprite.Group()
         self.floors = pygame.sprite.Group()
         self.power_ups = pygame.sprite.Group()  # New group for power-ups
+        self.wall_image = None  # Image shared by all walls
+        self.tiles = {}  # (column, row) -> wall or floor sprite drawn there
+        self.original_tiles = {}  # (column, row) -> (cell, sprite) before it changed
+        self.changed_tiles = {}  # (column, row) -> (cell, sprite), in the order they changed
+        self.tile_state = ()  # changed_tiles as saved by save_state
+        self.picked = []  # Power-ups picked up so far, in order
 
         self.maze = []
         self.load_maze(maze_json)
@@ -36,6 +47,17 @@ class Maze:
         self.offset_x = (self.screen.get_width() - self.maze_width) // 2
         self.offset_y = (self.screen.get_height() - self.maze_height) // 2
 
+        # Tile-based collisions against self.maze, confined to the screen
+        self.collider = GridCollider(
+            self.maze,
+            self.block_size,
+            (self.offset_x, self.offset_y),
+            (0, 0, self.screen.get_width(), self.screen.get_height()),
+        )
+        self._distance_field = None  # Built on first use
+        self.hints = HintOverlay(self)
+        self.background = None  # Walls and floors drawn once, see refresh()
+
         # Creating surface for the fog of war
         self.fog_surface = pygame.Surface(
             (self.screen.get_width(), self.screen.get_height()), pygame.SRCALPHA
@@ -53,22 +75,32 @@ class Maze:
         with open(maze_json, "r", encoding="utf-8") as file:
             self.maze = json.load(file)["maze"]
 
+    @tracer.traced("Maze.create_sprites")
     def create_sprites(self):
         """
         Creates wall and floor sprites based on the maze data.
         """
+        self.wall_image = pygame.Surface([self.block_size, self.block_size])
+        self.wall_image.fill(self.settings.wall_color)
         for y, row in enumerate(self.maze):
             for x, cell in enumerate(row):
                 pos_x = self.offset_x + x * self.block_size
                 pos_y = self.offset_y + y * self.block_size
                 if cell == 1:
-                    self.walls.add(
-                        Wall(self.settings.wall_color, pos_x, pos_y, self.block_size)
+                    sprite = Wall(
+                        self.settings.wall_color,
+                        pos_x,
+                        pos_y,
+                        self.block_size,
+                        self.wall_image,
                     )
+                    self.walls.add(sprite)
                 else:
-                    self.floors.add(
-                        Floor(self.settings.floor_color, pos_x, pos_y, self.block_size)
+                    sprite = Floor(
+                        self.settings.floor_color, pos_x, pos_y, self.block_size
                     )
+                    self.floors.add(sprite)
+                self.tiles[(x, y)] = sprite
 
     def generate_power_ups(self):
         """
@@ -82,8 +114,8 @@ class Maze:
             return
 
         # Number of power-ups depends on maze size
-        num_power_ups = max(
-            1, (self.settings.maze_width * self.settings.maze_height) // 25
+        num_power_ups = power_up_count(
+            self.settings.maze_width, self.settings.maze_height
         )
 
         # List of available power-ups
@@ -115,71 +147,118 @@ class Maze:
 
         if not power_up_types:
             return
-        # Divide available positions into two groups
-        player1_positions = []
-        player2_positions = []
-
-        for y, row in enumerate(self.maze):
-            for x, cell in enumerate(row):
-                # if center of the maze, do not add a modifier
-                center_x = len(row) // 2
-                center_y = len(self.maze) // 2
-
-                if (center_x - 2 <= x <= center_x + 2) and (
-                    center_y - 2 <= y <= center_y + 2
-                ):
-                    continue
-
-                # if the field is empty (0), add it as a potential modifier position
-                if cell == 0:
-                    pos_x = self.offset_x + x * self.block_size
-                    pos_y = self.offset_y + y * self.block_size
-
-                    # Get the starting positions of the players
-                    player1_pos = self.main.settings.player1_initial_position
-                    player2_pos = self.main.settings.player2_initial_position
-
-                    # Add positions to the appropriate group based on distance
-                    if not (
-                        (pos_x, pos_y) == player1_pos or (pos_x, pos_y) == player2_pos
-                    ):
-                        distance_to_player1 = abs(pos_x - player1_pos[0]) + abs(
-                            pos_y - player1_pos[1]
-                        )
-                        distance_to_player2 = abs(pos_x - player2_pos[0]) + abs(
-                            pos_y - player2_pos[1]
-                        )
-
-                        if distance_to_player1 < distance_to_player2:
-                            player1_positions.append((pos_x, pos_y))
-                        else:
-                            player2_positions.append((pos_x, pos_y))
-
-        # Randomly select positions for both players
-        selected_positions = []
-        p1_count = min(num_power_ups // 2, len(player1_positions))
-        p2_count = min(num_power_ups // 2, len(player2_positions))
-
-        if player1_positions and p1_count > 0:
-            selected_positions += random.sample(player1_positions, p1_count)
-        if player2_positions and p2_count > 0:
-            selected_positions += random.sample(player2_positions, p2_count)
+        # Positions are drawn from one group per start position
+        selected_positions = power_up_positions(
+            self.maze,
+            self.block_size,
+            (self.offset_x, self.offset_y),
+            self.settings.player_initial_positions,
+            num_power_ups,
+            self.main.rng,
+        )
 
         # Create power-ups
         for pos in selected_positions:
-            power_up_class = random.choice(power_up_types)
+            power_up_class = self.main.rng.choice(power_up_types)
             power_up = power_up_class(self.main, pos[0], pos[1], self.block_size)
             self.power_ups.add(power_up)
 
+    def set_cell(self, col, row, value):
+        """
+        Changes a cell of the maze grid (1 is a wall, 0 a floor).
+        """
+        self.collider.set_cell(col, row, value)
+        self.refresh()
+        if self._distance_field is not None:
+            if value == 1:
+                self._distance_field.close_cell(col, row)
+            else:
+                self._distance_field.open_cell(col, row)
+
+    def replace_tile(self, col, row, value, sprite):
+        """
+        Changes a cell of the maze grid and replaces the wall or floor sprite drawn there.
+        """
+        key = (col, row)
+        current = self.tiles[key]
+        self.original_tiles.setdefault(key, (self.maze[row][col], current))
+        current.kill()
+        (self.walls if value == 1 else self.floors).add(sprite)
+        self.tiles[key] = sprite
+
+        # Tiles changing again move to the end, like their sprites in the groups
+        self.changed_tiles.pop(key, None)
+        if self.original_tiles[key][1] is not sprite:
+            self.changed_tiles[key] = (value, sprite)
+        self.tile_state = None
+        self.set_cell(col, row, value)
+
+    def restore_tile(self, col, row):
+        """
+        Puts back the cell and the sprite a tile had when the maze was loaded.
+        """
+        original = self.original_tiles.get((col, row))
+        if original is not None:
+            self.replace_tile(col, row, *original)
+
+    def save_state(self):
+        """
+        Returns the changed tiles and the picked up power-ups as a value for load_state.
+        Sprites are shared with the maze, not copied.
+        """
+        if self.tile_state is None:
+            self.tile_state = tuple(self.changed_tiles.items())
+        return len(self.picked), self.tile_state
+
+    def load_state(self, state):
+        """
+        Restores the tiles and power-ups saved by save_state.
+        """
+        picked, tiles = state
+        for power_up in self.picked[picked:]:
+            power_up.active = True
+        del self.picked[picked:]
+
+        if tiles == self.tile_state:
+            return
+        # The groups must end up in the same order as when the state was saved, as
+        # events pick random floors from them
+        for col, row in list(self.changed_tiles):
+            self.restore_tile(col, row)
+        for (col, row), (value, sprite) in tiles:
+            self.replace_tile(col, row, value, sprite)
+        self.tile_state = tiles
+
+    @property
+    def distance_field(self):
+        """
+        Steps from every tile to the win zone that Engine.win_zone covers: the three
+        middle columns of the maze, or its middle 3x3 tiles on maps with four quadrants.
+        Built on first use and kept up to date by set_cell.
+        """
+        if self._distance_field is None:
+            rows = win_rows(len(self.maze)) if self.settings.quadrant_map else None
+            self._distance_field = DistanceField(
+                self.maze, win_columns(len(self.maze[0])), rows
+            )
+        return self._distance_field
+
+    def power_up_tiles(self):
+        """
+        Returns (column, row, kind) of every power-up that can still be picked up.
+        """
+        tile_at = self.collider.tile_at
+        return [
+            (*tile_at(power_up.rect.centerx, power_up.rect.centery), power_up.kind)
+            for power_up in self.power_ups
+            if power_up.active
+        ]
+
     def check_collision(self, rect):
         """
         Checks collisions with the maze walls.
         """
-        temp_sprite = pygame.sprite.Sprite()
-        temp_sprite.rect = rect
-        collisions = pygame.sprite.spritecollide(temp_sprite, self.walls, False)
-
-        return collisions
+        return self.collider.rect_hits_wall(rect.x, rect.y, rect.width, rect.height)
 
     def check_power_up_collision(self, player):
         """
@@ -196,15 +275,13 @@ class Maze:
         for power_up in collided_power_ups:
             if power_up.active:
                 power_up.apply_effect(player)
+                self.picked.append(power_up)
 
     def reset_player_speed(self, player_number):
         """
         Resets player speed after the power-up effect duration.
         """
-        if player_number == 1:
-            self.main.player1.reset_speed()
-        else:
-            self.main.player2.reset_speed()
+        self.main.players[player_number - 1].reset_speed()
 
     def update_fog_of_war(self):
         """
@@ -214,19 +291,18 @@ class Maze:
         self.fog_surface.fill((0, 0, 0))  # Semi-transparent black fog
 
         # Reveal the area around players
-        if hasattr(self.main, "player1") and hasattr(self.main, "player2"):
-            for player in [self.main.player1, self.main.player2]:
-                # Player center
-                center_x = int(player.x + player.width // 2)
-                center_y = int(player.y + player.height // 2)
-
-                # Draw only one transparent circle instead of a gradient
-                pygame.draw.circle(
-                    self.fog_surface,
-                    (0, 0, 0, 0),
-                    (center_x, center_y),
-                    self.fog_radius,
-                )
+        for player in self.main.players:
+            # Player center
+            center_x = int(player.x + player.width // 2)
+            center_y = int(player.y + player.height // 2)
+
+            # Draw only one transparent circle instead of a gradient
+            pygame.draw.circle(
+                self.fog_surface,
+                (0, 0, 0, 0),
+                (center_x, center_y),
+                self.fog_radius,
+            )
 
     def _create_visibility_gradient(self, center_pos):
         """
@@ -257,12 +333,32 @@ class Maze:
                     # Set the new pixel color
                     self.fog_surface.set_at((x, y), (0, 0, 0, new_alpha))
 
+    def refresh(self):
+        """
+        Redraws the walls and floors on the next draw, after they changed.
+        """
+        self.background = None
+
+    def _draw_background(self):
+        """
+        Draws the walls and floors onto a surface covering the maze, so that a frame
+        blits one surface instead of a sprite per block.
+        """
+        self.background = pygame.Surface((self.maze_width, self.maze_height)).convert()
+        offset = (-self.offset_x, -self.offset_y)
+        for group in (self.walls, self.floors):
+            self.background.blits(
+                [(sprite.image, sprite.rect.move(offset)) for sprite in group],
+                doreturn=False,
+            )
+
     def draw(self):
         """
         Draws the maze on the screen.
         """
-        self.walls.draw(self.screen)
-        self.floors.draw(self.screen)
+        if self.background is None:
+            self._draw_background()
+        self.screen.blit(self.background, (self.offset_x, self.offset_y))
 
         # Draw active modifiers if enabled
         if (
@@ -273,7 +369,10 @@ class Maze:
                 if power_up.active:
                     power_up.draw(self.screen)
 
-        # Update and draw the fog of war if the game is running and the option is enabled
+    def draw_fog(self):
+        """
+        Updates and draws the fog of war if the game is running and the option is enabled.
+        """
         if (
             self.main.game_state.state == "running"
             and hasattr(self.settings, "fog_of_war_enabled")
@@ -313,9 +412,12 @@ class Wall(pygame.sprite.Sprite):
     This class represents walls in the maze.
     """
 
-    def __init__(self, color, x, y, block_size):
+    def __init__(self, color, x, y, block_size, image=None):
         super().__init__()
 
-        self.image = pygame.Surface([block_size, block_size])
-        self.image.fill(color)
+        # The walls of a maze share one image, so recoloring them is a single fill
+        if image is None:
+            image = pygame.Surface([block_size, block_size])
+            image.fill(color)
+        self.image = image
         self.rect = self.image.get_rect(topleft=(x, y))
@@ -1,105 +1,36 @@
 """
 This module contains the logic utilized to generate a random maze using the Kruskal's algorithm.
+The grids themselves are built by simulation.generation, so that the simulation core can
+generate them without loading pygame.
 """
 
 import json
 import os
-import random
 
-
-class FindUnion:
-    """
-    This class implements the Disjoint Set Union data structure with path compression and union
-    by rank optimizations.
-    """
-
-    def __init__(self, elements):
-        self.parent = {e: e for e in elements}
-        self.rank = {e: 0 for e in elements}
-
-    def find(self, item):
-        """
-        Finds the root of the set that contains the given item.
-        Applies path compression to flatten the structure for faster future queries.
-        """
-        if self.parent[item] != item:
-            self.parent[item] = self.find(self.parent[item])  # Path compression
-        return self.parent[item]
-
-    def union(self, set1, set2):
-        """
-        Merges the sets containing 'set1' and 'set2'.
-        Uses union by rank to keep the tree shallow.
-        """
-        root1 = self.find(set1)
-        root2 = self.find(set2)
-
-        if root1 != root2:
-            if self.rank[root1] > self.rank[root2]:
-                self.parent[root2] = root1
-            else:
-                self.parent[root1] = root2
-                if self.rank[root1] == self.rank[root2]:
-                    self.rank[root2] += 1
+from simulation.generation import (FindUnion, generate_maze, mirror_maze,
+                                   mirror_maze_quadrants)
+from util.tracing import tracer
 
 
 class MazeGenerator:
     """This class contains the logic to generate a random maze using Kruskal's algorithm."""
 
-    @staticmethod
-    def generate_maze(width: int, height: int):
-        """
-        Generates a maze with given dimensions.
-        """
-
-        if not (isinstance(width, int) and isinstance(height, int)):
-            raise ValueError("Maze dimensions must be integers.")
-
-        if width < 0 or height < 0:
-            raise ValueError("Maze dimensions must be positive.")
-
-        if width % 4 != 3 or height % 4 != 3:
-            raise ValueError("Maze dimensions must be equal to a multiple of 4 - 1.")
-
-        maze = [[1 for _ in range(width)] for _ in range(height)]
-        cells = [
-            (row, col) for row in range(1, height, 2) for col in range(1, width, 2)
-        ]
-        walls = []
-
-        for row, col in cells:
-            maze[row][col] = 0
-
-        fu = FindUnion(cells)
-
-        for row, col in cells:
-            if row + 2 < height:
-                walls.append(((row + 1, col), (row, col), (row + 2, col)))
-            if col + 2 < width:
-                walls.append(((row, col + 1), (row, col), (row, col + 2)))
-
-        random.shuffle(walls)
-
-        for wall, cell1, cell2 in walls:
-            if fu.find(cell1) != fu.find(cell2):
-                row, col = wall
-                maze[row][col] = 0
-                fu.union(cell1, cell2)
-
-        return maze
+    generate_maze = staticmethod(generate_maze)
+    mirror_maze = staticmethod(mirror_maze)
+    mirror_maze_quadrants = staticmethod(mirror_maze_quadrants)
 
     @staticmethod
-    def create_map(width, height):
+    @tracer.traced("MazeGenerator.create_map")
+    def create_map(width, height, rng=None, quadrants=False):
         """
-        Create a 2-player maze map consisting of two mazes with the given dimensions.
+        Create a maze map consisting of two mazes with the given dimensions, or of four
+        with quadrants for more than 2 players.
         """
-        maze = MazeGenerator.generate_maze(width, height)
-
-        maze_map = [row + [1] * 3 + row[::-1] for row in maze]
-
-        maze_map[height // 2 - 1][width : width + 3] = [0] * 3
-        maze_map[height // 2][width - 1 : width + 4] = [0] * 5
-        maze_map[height // 2 + 1][width : width + 3] = [0] * 3
+        maze = MazeGenerator.generate_maze(width, height, rng)
+        if quadrants:
+            maze_map = MazeGenerator.mirror_maze_quadrants(maze)
+        else:
+            maze_map = MazeGenerator.mirror_maze(maze)
 
         maze_json = {"maze": maze_map}
 
@@ -4,6 +4,8 @@ This module contains the MenuElement class.
 
 import pygame
 
+from util.fonts import get_font, render_text
+
 
 class MenuElement:
     """Base class for all menu elements."""
@@ -13,7 +15,7 @@ class MenuElement:
         self.screen = main.screen
         self.text = text
         self.active = active
-        self.font = pygame.font.SysFont("arialblack", 40)
+        self.font = get_font("arialblack", 40)
         self.text_color = (255, 255, 255)
         self.background_color = (0, 0, 0)
         self.outline_color = (255, 255, 255)
@@ -58,7 +60,7 @@ class Button(MenuElement):
             self.background_color,
             (self.x, self.y, self.width, self.height),
         )
-        text_render = self.font.render(self.text, True, self.text_color)
+        text_render = render_text(self.font, self.text, self.text_color)
         self.screen.blit(text_render, (self.x + 10, self.y))
 
     def is_clicked(self, mouse_pos):
@@ -99,7 +101,7 @@ class TextInput(MenuElement):
         border_color = self.outline_color_active if self.active else self.outline_color
         pygame.draw.rect(self.screen, border_color, self.rect, 2)
 
-        text_surface = self.font.render(self.text, True, self.text_color)
+        text_surface = render_text(self.font, self.text, self.text_color)
         # Center the text vertically and align left with some padding
         text_pos = (
             self.x + 10,
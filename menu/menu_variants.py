@@ -5,6 +5,7 @@ import sys
 import pygame
 
 from menu.menu_elements import Button
+from util.fonts import get_font, render_text
 
 
 class Menu:
@@ -31,7 +32,7 @@ class Menu:
             for i, item in enumerate(self.items)
         ]
         self.background_color = (0, 0, 0)
-        self.font = pygame.font.SysFont("arialblack", 40)
+        self.font = get_font("arialblack", 40)
         self.title = title
         self.text_width, self.text_height = self.font.size(title)
         self.text_color = (255, 255, 255)
@@ -62,7 +63,7 @@ class Menu:
 
     def draw(self):
         """Draws the menu on the screen."""
-        text_render = self.font.render(self.title, True, self.text_color)
+        text_render = render_text(self.font, self.title, self.text_color)
         self.screen.blit(text_render, (self.x - self.text_width // 2, self.ys[0]))
 
         for i, button in enumerate(self.buttons):
@@ -118,8 +119,8 @@ class StatsMenu:
     def __init__(self, main):
         self.main = main
         self.screen = main.screen
-        self.font = pygame.font.SysFont("arialblack", 40)
-        self.small_font = pygame.font.SysFont("arialblack", 24)
+        self.font = get_font("arialblack", 40)
+        self.small_font = get_font("arialblack", 24)
         self.text_color = (255, 255, 255)
         self.background_color = (0, 0, 0)
 
@@ -147,7 +148,7 @@ class StatsMenu:
 
     def draw(self):
         """Draw the statistics screen."""
-        title_render = self.font.render(self.title, True, self.text_color)
+        title_render = render_text(self.font, self.title, self.text_color)
         self.screen.blit(title_render, (self.title_x, self.title_y))
 
         leaderboard = self.main.stats_manager.get_leaderboard()
@@ -163,7 +164,7 @@ class StatsMenu:
 
         for i, header in enumerate(headers):
             x = table_start_x + sum(col_widths[:i])
-            header_surface = self.small_font.render(header, True, self.text_color)
+            header_surface = render_text(self.small_font, header, self.text_color)
             # Center text in its column
             x_centered = x + (col_widths[i] - header_surface.get_width()) // 2
             self.screen.blit(header_surface, (x_centered, start_y))
@@ -179,7 +180,7 @@ class StatsMenu:
             ]
             for j, data in enumerate(row_data):
                 x = table_start_x + sum(col_widths[:j])
-                data_surface = self.small_font.render(data, True, self.text_color)
+                data_surface = render_text(self.small_font, data, self.text_color)
                 if j == 0:
                     x_pos = x + 10
                 else:
@@ -3,6 +3,14 @@
 import pygame
 
 from menu.menu_elements import Button, TextInput
+from util.fonts import get_font, render_text
+from util.settings import MAX_PLAYERS
+
+# Maze widths and heights offered in the game settings
+MAZE_SIZES = [7, 11, 15, 23, 31, 55]
+
+# Numbers of players offered in the game settings
+PLAYER_COUNTS = list(range(2, MAX_PLAYERS + 1))
 
 
 class SettingsOptions:
@@ -18,7 +26,7 @@ class SettingsOptions:
         self.current_values = [0] * len(options_names)  # Indexes of selected values
 
         # Text settings
-        self.font = pygame.font.SysFont("arialblack", 40)
+        self.font = get_font("arialblack", 40)
         self.text_color = (255, 255, 255)
         self.active_color = (255, 0, 0)
         self.background_color = (0, 0, 0)
@@ -207,7 +215,7 @@ class SettingsOptions:
     def draw(self):
         """Draw the settings page on the screen."""
         # Draw title
-        title_render = self.font.render(self.title, True, self.text_color)
+        title_render = render_text(self.font, self.title, self.text_color)
         self.screen.blit(title_render, (self.title_x, self.title_y))
 
         # Draw options and their values
@@ -223,14 +231,14 @@ class SettingsOptions:
                 )
 
             # Option name
-            option_render = self.font.render(option_name, True, option_color)
+            option_render = render_text(self.font, option_name, option_color)
             self.screen.blit(
                 option_render, (self.option_x - option_render.get_width(), option_y)
             )
 
             # Option value
             current_value = self.options_values[i][self.current_values[i]]
-            value_render = self.font.render(str(current_value), True, option_color)
+            value_render = render_text(self.font, str(current_value), option_color)
             value_width = value_render.get_width()
             self.screen.blit(value_render, (self.value_x - value_width // 2, option_y))
 
@@ -269,15 +277,16 @@ class SettingsOptions:
 
 
 class GameMenu(SettingsOptions):
-    """Settings page for maze size."""
+    """Settings page for maze size and the number of players."""
 
     def __init__(self, main):
         # Define options for maze size
-        options_names = ["Width", "Height", "Fog of War"]
+        options_names = ["Width", "Height", "Fog of War", "Players"]
         options_values = [
-            [7, 11, 15, 23, 31, 55],  # possible widths
-            [7, 11, 15, 23, 31, 55],  # possible heights
+            MAZE_SIZES,  # possible widths
+            MAZE_SIZES,  # possible heights
             ["On", "Off"],  # Fog of war options
+            PLAYER_COUNTS,  # possible numbers of players
         ]
 
         # Find current values in options_values
@@ -296,11 +305,13 @@ class GameMenu(SettingsOptions):
                 self.current_values[1] = i
                 break
         self.current_values[2] = 0 if main.settings.fog_of_war_enabled else 1
+        self.current_values[3] = PLAYER_COUNTS.index(main.settings.player_count)
 
     def _apply_setting(self, index):
         """Apply the selected maze size setting."""
         width = self.options_values[0][self.current_values[0]]
         height = self.options_values[1][self.current_values[1]]
+        self.main.settings.player_count = self.options_values[3][self.current_values[3]]
         self.main.settings.set_maze_size(width, height)
         self.main.settings.fog_of_war_enabled = self.current_values[2] == 0
 
@@ -447,7 +458,7 @@ class SetNames:
         """Initialize the name input menu."""
         self.main = main
         self.screen = main.screen
-        self.font = pygame.font.SysFont("arialblack", 40)
+        self.font = get_font("arialblack", 40)
 
         screen_width = self.screen.get_width()
         screen_height = self.screen.get_height()
@@ -538,7 +549,7 @@ class SetNames:
         """Draw the name input menu screen."""
 
         for text, pos in self.labels:
-            self.screen.blit(self.font.render(text, True, (255, 255, 255)), pos)
+            self.screen.blit(render_text(self.font, text, (255, 255, 255)), pos)
 
         self.p1_input.draw()
         self.p2_input.draw()
@@ -0,0 +1,12 @@
+"""
+This module provides LAN multiplayer: a host running the matches and a client joining them.
+The match server hosting many headless matches is run as python -m net.server, and a client
+playing on it with a bot as python -m net.server_client.
+"""
+
+from .client import NetClient
+from .delta import (SimStateDecoder, SimStateEncoder, StateDecoder,
+                    StateEncoder)
+from .host import NetHost
+from .protocol import (DEFAULT_PORT, PROTOCOL_VERSION, SERVER_PROTOCOL_VERSION,
+                       Connection, NetStats)
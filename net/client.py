@@ -0,0 +1,153 @@
+"""
+This module contains the NetClient class, which joins a LAN game hosted by NetHost.
+"""
+
+import json
+import time
+
+from engine.replay import apply_settings_snapshot, read_varint, write_varint
+from simulation.inputs import decode_input, encode_input
+
+from .delta import StateDecoder
+from .protocol import (ACCEPT, END, INPUT, JOIN, PROTOCOL_VERSION, REJECT, START,
+                       STATE, Connection)
+
+
+class NetClient:
+    """
+    A client of a LAN game. It sends the inputs of its player whenever they change and
+    shows the matches with the changes the host sends every tick.
+    """
+
+    def __init__(self, connection, player_number, resolution, pending):
+        self.connection = connection
+        self.player_number = player_number
+        self.resolution = resolution  # Screen size of the host, the matches' pixels
+        self.pending = pending  # Messages that arrived with ACCEPT
+        self.main = None
+        self.decoder = None
+        self.seed = None
+        self.input_mask = None
+        self.input_sequence = 0
+        self.sent_at = {}  # Input sequence number -> time it was sent
+
+    @classmethod
+    def connect(cls, address, name="", timeout=10.0):
+        """Joins the game hosted at "host:port"."""
+        connection = Connection.connect(address, timeout)
+        connection.send(JOIN, bytes([PROTOCOL_VERSION]) + name.encode("utf-8"))
+
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline and not connection.closed:
+            messages = connection.receive(timeout=0.1)
+            for index, (kind, payload) in enumerate(messages):
+                if kind == REJECT:
+                    connection.close()
+                    raise ConnectionError(
+                        f"The host at {address} refused to join: "
+                        f"{payload.decode('utf-8', 'replace')}"
+                    )
+                if kind == ACCEPT:
+                    width, offset = read_varint(payload, 1)
+                    height, offset = read_varint(payload, offset)
+                    return cls(
+                        connection, payload[0], (width, height), messages[index + 1 :]
+                    )
+        connection.close()
+        raise ConnectionError(f"The host at {address} did not accept the connection")
+
+    @property
+    def stats(self):
+        """NetStats of the connection to the host."""
+        return self.connection.stats
+
+    @property
+    def player(self):
+        """The player this client controls."""
+        return self.main.players[self.player_number - 1]
+
+    def attach(self, main):
+        """Lets the game show the host's matches."""
+        self.main = main
+        self.decoder = StateDecoder(main)
+        main.engine.client = self
+
+    def step(self):
+        """Sends the player's input if it changed and applies what the host sent."""
+        mask = self.player.get_movement_mask()
+        if self.player.reversed_controls:
+            # The host reverses the controls itself
+            mask = encode_input(*decode_input(mask, True))
+        self.send_input(mask)
+        return self.poll()
+
+    def send_input(self, mask):
+        """Sends the input mask of the player, unless it did not change."""
+        if mask == self.input_mask:
+            return
+        self.input_mask = mask
+        self.input_sequence += 1
+        self.sent_at[self.input_sequence] = time.perf_counter()
+
+        payload = bytearray()
+        write_varint(payload, self.input_sequence)
+        payload.append(mask)
+        self.connection.send(INPUT, bytes(payload))
+
+    def poll(self, timeout=0.0):
+        """
+        Applies the messages from the host, waiting up to timeout seconds for them.
+        Returns False once the host closed the connection.
+        """
+        messages, self.pending = self.pending, []
+        if not messages:
+            messages = self.connection.receive(timeout)
+        for kind, payload in messages:
+            if kind == START:
+                self._start_match(payload)
+            elif kind == STATE:
+                self._apply_state(payload)
+            elif kind == END:
+                self._end_match(payload)
+        return not self.connection.closed
+
+    def _start_match(self, payload):
+        self.seed, offset = read_varint(payload, 0)
+        match = json.loads(payload[offset:].decode("utf-8"))
+        apply_settings_snapshot(self.main, match["settings"])
+        for player, name in zip(self.main.players, match["names"]):
+            player.set_name(name)
+
+        self.main.game_state.run_game()
+        self.decoder.reset()
+        self.input_mask = None
+
+    def _apply_state(self, payload):
+        if self.main.game_state.get_current_state() != "running":
+            return
+        tick, ack = self.decoder.apply(payload)
+        self.main.engine.tick = tick
+
+        if ack is not None:
+            now = time.perf_counter()
+            for sequence in [sequence for sequence in self.sent_at if sequence <= ack]:
+                self.stats.latencies.append(now - self.sent_at.pop(sequence))
+
+    def _end_match(self, payload):
+        tick, offset = read_varint(payload, 0)
+        winner, offset = read_varint(payload, offset)
+        self.main.engine.tick = tick
+
+        game_state = self.main.game_state
+        if game_state.get_current_state() != "running":
+            return
+        if winner:
+            players = self.main.players
+            winner = players[winner - 1]
+            game_state.game_won(winner, [other for other in players if other is not winner])
+        else:
+            game_state.main_menu()
+
+    def close(self):
+        """Leaves the game."""
+        self.connection.close()
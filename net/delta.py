@@ -0,0 +1,488 @@
+"""
+This module contains StateEncoder and StateDecoder, which send the changes of a hosted match
+tick by tick instead of full snapshots.
+
+Both sides start from the state the match seed builds: the same maze, power-ups and players.
+A STATE payload then holds:
+- the tick as a varint delta from the previous one and a byte of SECTION_* flags,
+- SECTION_ACK: the sequence number of the last input the host applied,
+- SECTION_PLAYERS: a varint bitmask of the players that changed, and for each of them a
+  byte of CHANGED_* flags followed by the changed fields: zigzag varint deltas of x and y
+  in 1/POSITION_SCALE pixels, the width and height, and a byte of effect flags,
+- SECTION_CELLS: the number of changed grid cells, then (column, row, value) of each,
+- SECTION_PICKUPS: the number of power-ups picked up, then their indexes in the maze,
+- SECTION_EVENTS: the started and the ended events, each as a count followed by indexes
+  into EventManager.events, or into simulation.EVENT_TYPES for SimStateEncoder.
+SimStateEncoder and SimStateDecoder do the same for a simulation.Simulation match.
+"""
+
+from engine.replay import (read_signed_varint, read_varint,
+                           write_signed_varint, write_varint)
+from maze.maze import Floor
+from simulation.effects import FREEZE, REVERSE_CONTROLS, Effect
+from simulation.simulation import EVENT_TYPES, SimEvent
+
+POSITION_SCALE = 8  # Positions are sent in 1/8 pixels
+
+SECTION_ACK = 1
+SECTION_PLAYERS = 2
+SECTION_CELLS = 4
+SECTION_PICKUPS = 8
+SECTION_EVENTS = 16
+
+CHANGED_X = 1
+CHANGED_Y = 2
+CHANGED_SIZE = 4
+CHANGED_EFFECTS = 8
+
+# Effect flags, the effects the client shows
+FROZEN = 1
+REVERSED_CONTROLS = 2
+
+
+def _player_state(player):
+    """Returns the sent state of a player: (x, y, width, height, effect flags)."""
+    flags = (FROZEN if player.frozen else 0) | (
+        REVERSED_CONTROLS if player.reversed_controls else 0
+    )
+    return (
+        round(player.x * POSITION_SCALE),
+        round(player.y * POSITION_SCALE),
+        player.width,
+        player.height,
+        flags,
+    )
+
+
+def add_ack(payload, ack):
+    """Returns a STATE payload that also acknowledges the given input sequence number."""
+    _, offset = read_varint(payload, 0)
+    ack_section = bytearray()
+    write_varint(ack_section, ack)
+    return (
+        payload[:offset]
+        + bytes([payload[offset] | SECTION_ACK])
+        + ack_section
+        + payload[offset + 1 :]
+    )
+
+
+class StateEncoder:
+    """
+    Encodes the changes of a match since the previous encoded tick. The grid is only
+    compared when the collider's version changed.
+    """
+
+    def __init__(self, main):
+        self.main = main
+        self.tick = 0
+        self.ack = 0
+        self.players = []
+        self.grid = []
+        self.grid_version = None
+        self.power_ups = []
+        self.picked = set()
+        self.events = {}  # Active event -> index of its type
+
+    # The parts of the match, read from the game here and from a Simulation by
+    # SimStateEncoder
+
+    def _players(self):
+        return self.main.players
+
+    def _grid(self):
+        return self.main.maze.maze
+
+    def _collider(self):
+        return self.main.maze.collider
+
+    def _power_ups(self):
+        return self.main.maze.power_ups
+
+    def _active_events(self):
+        """Returns (event, index of its type) of the active events."""
+        event_manager = self.main.event_manager
+        return [
+            (event, event_manager.events.index(type(event)))
+            for event in event_manager.active_events
+        ]
+
+    def reset(self):
+        """Starts from the state of a new match, after its maze and players are set up."""
+        self.tick = 0
+        self.ack = 0
+        self.players = [_player_state(player) for player in self._players()]
+        self.grid = [row[:] for row in self._grid()]
+        self.grid_version = self._collider().version
+        self.power_ups = list(self._power_ups())
+        self.picked = {
+            index for index, power_up in enumerate(self.power_ups) if not power_up.active
+        }
+        self.events = {}
+
+    def encode(self, tick, ack=None):
+        """
+        Returns the STATE payload of the changes up to the given tick, acknowledging the
+        input sequence number ack if it changed.
+        """
+        payload = self.encode_changes(tick)
+        if ack is not None and ack != self.ack:
+            self.ack = ack
+            payload = add_ack(payload, ack)
+        return payload
+
+    def encode_changes(self, tick):
+        """
+        Returns the STATE payload of the changes up to the given tick, without an ack.
+        Servers sending it to several clients add their acks with add_ack.
+        """
+        sections = 0
+        body = bytearray()
+
+        players = self._encode_players()
+        if players:
+            sections |= SECTION_PLAYERS
+            body += players
+
+        cells = self._changed_cells()
+        if cells:
+            sections |= SECTION_CELLS
+            write_varint(body, len(cells))
+            for col, row, value in cells:
+                write_varint(body, col)
+                write_varint(body, row)
+                write_varint(body, value)
+
+        pickups = [
+            index
+            for index, power_up in enumerate(self.power_ups)
+            if not power_up.active and index not in self.picked
+        ]
+        if pickups:
+            sections |= SECTION_PICKUPS
+            self.picked.update(pickups)
+            write_varint(body, len(pickups))
+            for index in pickups:
+                write_varint(body, index)
+
+        started, ended = self._changed_events()
+        if started or ended:
+            sections |= SECTION_EVENTS
+            for indexes in (started, ended):
+                write_varint(body, len(indexes))
+                for index in indexes:
+                    write_varint(body, index)
+
+        payload = bytearray()
+        write_varint(payload, tick - self.tick)
+        payload.append(sections)
+        self.tick = tick
+        return bytes(payload + body)
+
+    def _encode_players(self):
+        changed = 0
+        fields = bytearray()
+        for index, player in enumerate(self._players()):
+            state = _player_state(player)
+            old = self.players[index]
+            if state == old:
+                continue
+            changed |= 1 << index
+            self.players[index] = state
+
+            changes = 0
+            if state[0] != old[0]:
+                changes |= CHANGED_X
+            if state[1] != old[1]:
+                changes |= CHANGED_Y
+            if state[2:4] != old[2:4]:
+                changes |= CHANGED_SIZE
+            if state[4] != old[4]:
+                changes |= CHANGED_EFFECTS
+
+            fields.append(changes)
+            if changes & CHANGED_X:
+                write_signed_varint(fields, state[0] - old[0])
+            if changes & CHANGED_Y:
+                write_signed_varint(fields, state[1] - old[1])
+            if changes & CHANGED_SIZE:
+                write_varint(fields, state[2])
+                write_varint(fields, state[3])
+            if changes & CHANGED_EFFECTS:
+                fields.append(state[4])
+
+        if not changed:
+            return b""
+        players = bytearray()
+        write_varint(players, changed)
+        return players + fields
+
+    def _changed_cells(self):
+        collider = self._collider()
+        if collider.version == self.grid_version:
+            return []
+        self.grid_version = collider.version
+
+        cells = []
+        for row, (old_line, line) in enumerate(zip(self.grid, self._grid())):
+            if old_line != line:
+                cells += [
+                    (col, row, value)
+                    for col, (old, value) in enumerate(zip(old_line, line))
+                    if old != value
+                ]
+                old_line[:] = line
+        return cells
+
+    def _changed_events(self):
+        active_events = self._active_events()
+        active = {event for event, _ in active_events}
+        started = []
+        for event, index in active_events:
+            if event not in self.events:
+                self.events[event] = index
+                started.append(index)
+        ended = [
+            self.events.pop(event) for event in list(self.events) if event not in active
+        ]
+        return started, ended
+
+
+class SimStateEncoder(StateEncoder):
+    """
+    Encodes the changes of a simulation.Simulation match, e.g. for the clients of the
+    match server.
+    """
+
+    def __init__(self, sim):
+        super().__init__(None)
+        self.sim = sim
+
+    def _players(self):
+        return self.sim.players
+
+    def _grid(self):
+        return self.sim.grid
+
+    def _collider(self):
+        return self.sim.collider
+
+    def _power_ups(self):
+        return self.sim.power_ups
+
+    def _active_events(self):
+        return [(event, EVENT_TYPES.index(event.kind)) for event in self.sim.active_events]
+
+
+class StateDecoder:
+    """
+    Applies the STATE payloads of a StateEncoder to the client's copy of the match.
+    Effects and sizes are shown by putting effects on the players, changed cells swap
+    their wall and floor sprites.
+    """
+
+    def __init__(self, main):
+        self.main = main
+        self.tick = 0
+        self.players = []
+        self.effect_handles = []  # Per player, effect name -> handle
+        self.power_ups = []
+
+    # The parts of the match, changed in the game here and in a Simulation by
+    # SimStateDecoder
+
+    def _players(self):
+        return self.main.players
+
+    def _power_ups(self):
+        return self.main.maze.power_ups
+
+    def reset(self):
+        """Starts from the state of a new match, after its maze and players are set up."""
+        self.tick = 0
+        self.players = [list(_player_state(player)) for player in self._players()]
+        self.effect_handles = [{} for _ in self._players()]
+        self.power_ups = list(self._power_ups())
+
+    def apply(self, payload):
+        """
+        Applies a STATE payload. Returns the tick and the acknowledged input sequence
+        number, or None if the payload does not acknowledge one.
+        """
+        delta, offset = read_varint(payload, 0)
+        self.tick += delta
+        sections = payload[offset]
+        offset += 1
+
+        ack = None
+        if sections & SECTION_ACK:
+            ack, offset = read_varint(payload, offset)
+
+        self._start_tick()
+        if sections & SECTION_PLAYERS:
+            offset = self._apply_players(payload, offset)
+
+        if sections & SECTION_CELLS:
+            count, offset = read_varint(payload, offset)
+            for _ in range(count):
+                col, offset = read_varint(payload, offset)
+                row, offset = read_varint(payload, offset)
+                value, offset = read_varint(payload, offset)
+                self._set_cell(col, row, value)
+
+        if sections & SECTION_PICKUPS:
+            count, offset = read_varint(payload, offset)
+            for _ in range(count):
+                index, offset = read_varint(payload, offset)
+                self.power_ups[index].active = False
+
+        if sections & SECTION_EVENTS:
+            started, offset = self._read_indexes(payload, offset)
+            ended, offset = self._read_indexes(payload, offset)
+            self._apply_events(started, ended)
+
+        return self.tick, ack
+
+    def _start_tick(self):
+        for player in self.main.players:
+            # Interpolation runs from the previous tick, whether the player moved or not
+            player.prev_x, player.prev_y = player.x, player.y
+
+    @staticmethod
+    def _read_indexes(payload, offset):
+        count, offset = read_varint(payload, offset)
+        indexes = []
+        for _ in range(count):
+            index, offset = read_varint(payload, offset)
+            indexes.append(index)
+        return indexes, offset
+
+    def _apply_players(self, payload, offset):
+        changed, offset = read_varint(payload, offset)
+        for index, player in enumerate(self._players()):
+            if not changed & (1 << index):
+                continue
+            state = self.players[index]
+            changes = payload[offset]
+            offset += 1
+            if changes & CHANGED_X:
+                delta, offset = read_signed_varint(payload, offset)
+                state[0] += delta
+            if changes & CHANGED_Y:
+                delta, offset = read_signed_varint(payload, offset)
+                state[1] += delta
+            if changes & CHANGED_SIZE:
+                state[2], offset = read_varint(payload, offset)
+                state[3], offset = read_varint(payload, offset)
+            if changes & CHANGED_EFFECTS:
+                state[4] = payload[offset]
+                offset += 1
+
+            if changes & (CHANGED_SIZE | CHANGED_EFFECTS):
+                self._apply_effects(index, player, state)
+
+            # Resizing moves the player, the host's position wins
+            self._place(player, state[0] / POSITION_SCALE, state[1] / POSITION_SCALE)
+        return offset
+
+    @staticmethod
+    def _place(player, x, y):
+        player.x = x
+        player.y = y
+        player.rect.x, player.rect.y = x, y
+
+    def _apply_effects(self, index, player, state):
+        handles = self.effect_handles[index]
+        width, height, flags = state[2], state[3], state[4]
+        wanted = {
+            "freeze": FREEZE if flags & FROZEN else None,
+            "reverse_controls": REVERSE_CONTROLS if flags & REVERSED_CONTROLS else None,
+            "size": (
+                Effect("size", size=(width, height))
+                if (width, height) != player.effects.base_size
+                else None
+            ),
+        }
+        for name, effect in wanted.items():
+            active = handles.get(name)
+            if active is not None and (effect is None or name == "size"):
+                player.remove_effect(handles.pop(name))
+            if effect is not None and name not in handles:
+                handles[name] = player.add_effect(effect)
+
+    def _set_cell(self, col, row, value):
+        """Turns a floor into a wall or back, the sprites as well as the grid."""
+        maze = self.main.maze
+        if value == 1:
+            # Only the Shortcut Reveal event opens walls, so closing one puts it back
+            maze.restore_tile(col, row)
+        else:
+            block_size = maze.block_size
+            x = maze.offset_x + col * block_size
+            y = maze.offset_y + row * block_size
+            maze.replace_tile(
+                col, row, 0, Floor(self.main.settings.shortcut_color, x, y, block_size)
+            )
+
+    def _apply_events(self, started, ended):
+        """Shows the started events in the HUD and hides the ended ones."""
+        event_manager = self.main.event_manager
+        for index in ended:
+            event_class = event_manager.events[index]
+            for event in event_manager.active_events:
+                if type(event) is event_class:
+                    event.hide(self.main)
+                    event_manager.active_events.remove(event)
+                    break
+        for index in started:
+            event = event_manager.events[index]()
+            event.show(self.main)
+            event_manager.active_events.append(event)
+
+
+class SimStateDecoder(StateDecoder):
+    """
+    Applies the STATE payloads of a SimStateEncoder to a client's copy of the
+    simulation.Simulation match, e.g. so that a Bot can play a seat of the match server.
+    Effects the payloads do not carry, such as speed changes, are not mirrored.
+    """
+
+    def __init__(self, sim):
+        super().__init__(None)
+        self.sim = sim
+
+    def _players(self):
+        return self.sim.players
+
+    def _power_ups(self):
+        return self.sim.power_ups
+
+    def _start_tick(self):
+        pass
+
+    @staticmethod
+    def _place(player, x, y):
+        player.x = x
+        player.y = y
+
+    def _apply_effects(self, index, player, state):
+        player.width, player.height, flags = state[2], state[3], state[4]
+        for name, flag in (("freeze", FROZEN), ("reverse_controls", REVERSED_CONTROLS)):
+            if flags & flag:
+                # The server expires the effect, the tick it does so is not sent
+                player.effects[name] = self.tick
+            else:
+                player.effects.pop(name, None)
+
+    def _set_cell(self, col, row, value):
+        self.sim.set_cell(col, row, value)
+
+    def _apply_events(self, started, ended):
+        active_events = self.sim.active_events
+        for index in ended:
+            for event in active_events:
+                if event.kind == EVENT_TYPES[index]:
+                    active_events.remove(event)
+                    break
+        for index in started:
+            active_events.append(SimEvent(EVENT_TYPES[index], self.tick, self.tick))
@@ -0,0 +1,115 @@
+"""
+This module contains the NetHost class, which runs the matches of a LAN game and plays one
+of the players for a client connected over TCP.
+"""
+
+import json
+import socket
+
+from engine.replay import read_varint, settings_snapshot, write_varint
+
+from .delta import StateEncoder
+from .protocol import (ACCEPT, DEFAULT_PORT, END, INPUT, JOIN, PROTOCOL_VERSION,
+                       REJECT, START, STATE, Connection, check_join)
+
+
+class NetHost:
+    """
+    The host of a LAN game. The whole simulation runs here, the client only sends the
+    inputs of its player, which the host applies as that player's controller, and gets
+    back the changes of every tick.
+    """
+
+    def __init__(self, main, port=DEFAULT_PORT, player_number=2):
+        self.main = main
+        self.port = port
+        self.player_number = player_number
+        self.connection = None
+        self.encoder = StateEncoder(main)
+        self.input_mask = 0
+        self.input_sequence = 0  # Sequence number of the last input received
+
+    @property
+    def stats(self):
+        """NetStats of the connection to the client."""
+        return self.connection.stats
+
+    def wait_for_client(self):
+        """
+        Waits until a client joins, then lets it control its player.
+        """
+        with socket.create_server(("", self.port)) as server:
+            print(f"Waiting for a player on port {self.port}")
+            sock, address = server.accept()
+        self.connection = Connection(sock)
+
+        name = None
+        while name is None:
+            if self.connection.closed:
+                raise ConnectionError("The client left before joining")
+            for kind, payload in self.connection.receive(timeout=1.0):
+                if kind != JOIN:
+                    continue
+                try:
+                    name = check_join(payload, PROTOCOL_VERSION)
+                except ConnectionError as e:
+                    self.connection.send(REJECT, str(e).encode("utf-8"))
+                    self.close()
+                    raise
+
+        player = self.main.players[self.player_number - 1]
+        if name:
+            player.set_name(name)
+        print(f"{player.player_name} joined from {address[0]}")
+
+        accept = bytearray([self.player_number])
+        write_varint(accept, self.main.settings.screen_width)
+        write_varint(accept, self.main.settings.screen_height)
+        self.connection.send(ACCEPT, bytes(accept))
+
+        self.main.engine.host = self
+        self.main.engine.bots[self.player_number] = self
+
+    def get_input(self, player, tick):
+        """Returns the input mask the client last sent for its player."""
+        for kind, payload in self.connection.receive():
+            if kind == INPUT:
+                self.input_sequence, offset = read_varint(payload, 0)
+                self.input_mask = payload[offset]
+        if self.connection.closed:
+            self.input_mask = 0
+        return self.input_mask
+
+    def start(self, seed):
+        """
+        Sends a new match to the client, which builds it from the seed and the settings.
+        """
+        payload = bytearray()
+        write_varint(payload, seed)
+        match = {
+            "settings": settings_snapshot(self.main.settings),
+            "names": [player.player_name for player in self.main.players],
+        }
+        payload += json.dumps(match).encode("utf-8")
+        self.connection.send(START, bytes(payload))
+        self.encoder.reset()
+
+    def send_state(self, tick):
+        """Sends the changes of the given tick."""
+        self.connection.send(STATE, self.encoder.encode(tick, self.input_sequence))
+
+    def finish(self, tick, winner):
+        """Tells the client that the match ended at the given tick."""
+        payload = bytearray()
+        write_varint(payload, tick)
+        write_varint(payload, winner)
+        self.connection.send(END, bytes(payload))
+
+    def close(self):
+        """Sends what is still queued and closes the connection."""
+        self.connection.socket.setblocking(True)
+        try:
+            self.connection.socket.sendall(self.connection.outgoing)
+        except OSError:
+            pass
+        self.connection.close()
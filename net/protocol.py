@@ -0,0 +1,200 @@
+"""
+This module contains the message format of LAN matches and Connection, which exchanges
+messages over a non-blocking TCP socket.
+
+Every message is a varint length, followed by a message type byte and the payload:
+- JOIN (client): the protocol version byte and the name of the client's player,
+- ACCEPT (host): the number of the client's player and the screen size of the matches,
+- START (host): the match seed and the settings snapshot as JSON, from which the client
+  builds the same maze and players as the host,
+- STATE (host): the changes of one tick, see net.delta,
+- END (host): the final tick and the winner (0 for none),
+- INPUT (client): an input sequence number and the input mask of the client's player,
+  sent whenever the mask changes,
+- REJECT (host): why the JOIN was refused, as UTF-8 text, before the host disconnects.
+
+The match server (net.server) uses the same framing and message types with payloads of its
+own, under SERVER_PROTOCOL_VERSION, so that a LAN client joining a server, or a server
+client joining a LAN host, is refused instead of misreading the messages.
+"""
+
+import select
+import socket
+import time
+from dataclasses import dataclass, field
+from typing import List
+
+from engine.replay import read_varint, write_varint
+
+PROTOCOL_VERSION = 1
+# Versions of the server protocol have the high bit set, so they never match a LAN version
+SERVER_PROTOCOL_VERSION = 0x81
+DEFAULT_PORT = 5555
+
+JOIN = 1
+ACCEPT = 2
+START = 3
+STATE = 4
+END = 5
+INPUT = 6
+REJECT = 7
+
+
+def encode_message(kind, payload=b""):
+    """Returns the bytes of a message of the given type."""
+    buffer = bytearray()
+    write_varint(buffer, len(payload) + 1)
+    buffer.append(kind)
+    buffer += payload
+    return bytes(buffer)
+
+
+def check_join(payload, version):
+    """
+    Returns the player name of a JOIN payload, or raises ConnectionError if the client
+    speaks another protocol version.
+    """
+    if payload[:1] != bytes([version]):
+        client_version = payload[0] if payload else None
+        raise ConnectionError(
+            f"The client uses protocol version {client_version}, expected {version}"
+        )
+    return payload[1:].decode("utf-8", "replace")
+
+
+def parse_address(address):
+    """Splits "host:port" into (host, port), the port defaults to DEFAULT_PORT."""
+    host, separator, port = address.rpartition(":")
+    if not separator:
+        return address, DEFAULT_PORT
+    return host, int(port)
+
+
+@dataclass
+class NetStats:
+    """Traffic of a connection, and on the client the latency of its inputs."""
+
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    messages_sent: int = 0
+    messages_received: int = 0
+    started: float = field(default_factory=time.perf_counter)
+    # Seconds from sending an input to receiving the first tick that used it
+    latencies: List[float] = field(default_factory=list)
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the connection was opened."""
+        return time.perf_counter() - self.started
+
+    def __str__(self):
+        elapsed = max(self.elapsed, 1e-9)
+        text = (
+            f"sent {self.bytes_sent} B in {self.messages_sent} messages "
+            f"({self.bytes_sent / elapsed:.0f} B/s), "
+            f"received {self.bytes_received} B in {self.messages_received} messages "
+            f"({self.bytes_received / elapsed:.0f} B/s)"
+        )
+        if self.latencies:
+            latencies = sorted(self.latencies)
+            average = sum(latencies) / len(latencies)
+            text += (
+                f", tick latency avg {average * 1000:.1f} ms, "
+                f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:.1f} ms, "
+                f"max {latencies[-1] * 1000:.1f} ms"
+            )
+        return text
+
+
+class Connection:
+    """
+    A TCP connection exchanging messages without blocking. Messages that cannot be sent
+    right away are queued and sent by later calls.
+    """
+
+    def __init__(self, sock):
+        self.socket = sock
+        sock.setblocking(False)
+        # Ticks are small and must not wait for more data to fill a packet
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.incoming = bytearray()
+        self.outgoing = bytearray()
+        self.closed = False
+        self.stats = NetStats()
+
+    @classmethod
+    def connect(cls, address, timeout=10.0):
+        """Connects to "host:port"."""
+        return cls(socket.create_connection(parse_address(address), timeout))
+
+    def send(self, kind, payload=b""):
+        """Sends a message, or queues it until the socket accepts more data."""
+        if self.closed:
+            return
+        message = encode_message(kind, payload)
+        self.outgoing += message
+        self.stats.bytes_sent += len(message)
+        self.stats.messages_sent += 1
+        self.flush()
+
+    def flush(self):
+        """Sends as much of the queued data as the socket accepts."""
+        while self.outgoing and not self.closed:
+            try:
+                sent = self.socket.send(self.outgoing)
+            except BlockingIOError:
+                return
+            except OSError:
+                self.closed = True
+                return
+            del self.outgoing[:sent]
+
+    def receive(self, timeout=0.0):
+        """
+        Returns the (type, payload) pairs of the messages that arrived, waiting up to
+        timeout seconds for data if none is there yet.
+        """
+        if self.closed:
+            return []
+        if timeout > 0:
+            select.select([self.socket], [], [], timeout)
+
+        while True:
+            try:
+                data = self.socket.recv(65536)
+            except BlockingIOError:
+                break
+            except OSError:
+                data = b""
+            if not data:
+                self.closed = True
+                break
+            self.incoming += data
+            self.stats.bytes_received += len(data)
+
+        self.flush()
+        return self._split_messages()
+
+    def _split_messages(self):
+        messages = []
+        offset = 0
+        while True:
+            try:
+                length, start = read_varint(self.incoming, offset)
+            except IndexError:
+                break  # The length itself is incomplete
+            if start + length > len(self.incoming):
+                break
+            messages.append(
+                (self.incoming[start], bytes(self.incoming[start + 1 : start + length]))
+            )
+            offset = start + length
+
+        del self.incoming[:offset]
+        self.stats.messages_received += len(messages)
+        return messages
+
+    def close(self):
+        """Closes the connection."""
+        self.closed = True
+        self.socket.close()
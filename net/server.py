@@ -0,0 +1,632 @@
+"""
+This module contains MatchServer, which hosts many headless matches at once on one asyncio
+event loop, e.g. for league nights.
+
+Every match is a simulation.Simulation advancing on its own fixed tick. Clients connect over
+TCP, or over a WebSocket on the same port, and exchange the messages of net.protocol, with
+payloads of their own under SERVER_PROTOCOL_VERSION:
+- JOIN (client): the protocol version byte and the name of the client's player,
+- REJECT (server): why the JOIN was refused, e.g. a LAN client's protocol version,
+- ACCEPT (server): the number of the client's player and the id of its match,
+- START (server): the match seed, the number of grid columns and rows, the grid with one bit
+  per cell (1 for a wall), and the SimConfig, names and power-ups of the match as JSON,
+- STATE (server): the changes of one tick, see net.delta,
+- END (server): the final tick and the winner (0 for none),
+- INPUT (client): an input sequence number and the input mask of the client's player.
+Over a WebSocket, every binary frame carries one message. A client sending a message longer
+than MAX_MESSAGE_SIZE is disconnected. Seats nobody took before a match starts, and seats of
+clients that left, are played by bots. After END, a client may send JOIN again to play
+another match. net.server_client contains a client playing with a Bot.
+
+Mazes are generated in a process pool, so starting a match never delays the ticks of the
+others. The server reports the CPU time of every match and how many matches one core runs.
+
+Usage: python -m net.server --port 5600 --bot-matches 48 --duration 60
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import List
+
+from engine.replay import read_varint, write_varint
+from simulation import Bot, SimConfig, Simulation
+from simulation.generation import generate_map
+from simulation.simulation import MAX_PLAYERS
+
+from .delta import SimStateEncoder, add_ack
+from .protocol import (ACCEPT, DEFAULT_PORT, END, INPUT, JOIN, REJECT,
+                       SERVER_PROTOCOL_VERSION, START, STATE, NetStats,
+                       check_join, encode_message)
+
+MAX_NAME_LENGTH = 32
+MAX_MESSAGE_SIZE = 1024  # Longer messages from a client close its connection
+MAX_CATCH_UP_TICKS = 5  # A match running later than this skips ticks instead
+MAX_WRITE_BUFFER = 256 * 1024  # Clients that fall this far behind are disconnected
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+OPCODE_BINARY = 0x2
+OPCODE_CLOSE = 0x8
+OPCODE_PING = 0x9
+OPCODE_PONG = 0xA
+
+
+def pack_grid(grid):
+    """Packs a grid into one bit per cell, row by row, 1 for a wall."""
+    bits = bytearray((len(grid) * len(grid[0]) + 7) // 8)
+    index = 0
+    for row in grid:
+        for cell in row:
+            if cell == 1:
+                bits[index >> 3] |= 1 << (index & 7)
+            index += 1
+    return bytes(bits)
+
+
+class StreamConnection:
+    """A client connected over TCP."""
+
+    def __init__(self, reader, writer, prefix=b""):
+        self.reader = reader
+        self.writer = writer
+        self.buffer = bytearray(prefix)  # Bytes read while telling TCP from WebSocket
+        self.closed = False
+        self.stats = NetStats()
+
+    async def _read(self, count):
+        """Reads exactly count bytes."""
+        if len(self.buffer) < count:
+            self.buffer += await self.reader.readexactly(count - len(self.buffer))
+        data = bytes(self.buffer[:count])
+        del self.buffer[:count]
+        self.stats.bytes_received += count
+        return data
+
+    async def read_message(self):
+        """
+        Returns the next message as (type, payload), or None once the client left.
+        """
+        try:
+            length = shift = 0
+            while True:
+                byte = (await self._read(1))[0]
+                length |= (byte & 0x7F) << shift
+                if length > MAX_MESSAGE_SIZE:
+                    raise ConnectionError("Message too long")
+                if byte < 0x80:
+                    break
+                shift += 7
+            message = await self._read(length) if length else b""
+        except (asyncio.IncompleteReadError, ConnectionError):
+            message = b""
+        if not message:
+            self.closed = True
+            return None
+
+        self.stats.messages_received += 1
+        return message[0], message[1:]
+
+    def send(self, kind, payload=b""):
+        """Queues a message, without waiting for the client to receive it."""
+        if self.closed:
+            return
+        if self.writer.transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+            self.close()
+            return
+        self._write(encode_message(kind, payload))
+        self.stats.messages_sent += 1
+
+    def _write(self, data):
+        self.writer.write(data)
+        self.stats.bytes_sent += len(data)
+
+    def close(self):
+        """Disconnects the client."""
+        self.closed = True
+        self.writer.close()
+
+
+class WebSocketConnection(StreamConnection):
+    """
+    A client connected over a WebSocket. Only unfragmented frames are supported, which is
+    what clients send for messages this small.
+    """
+
+    @classmethod
+    async def accept(cls, reader, writer, prefix=b""):
+        """Completes the handshake of a client whose request starts with prefix."""
+        request = prefix + await reader.readuntil(b"\r\n\r\n")
+        key = None
+        for line in request.decode("latin-1").split("\r\n")[1:]:
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "sec-websocket-key":
+                key = value.strip()
+        if key is None:
+            raise ConnectionError("Not a WebSocket handshake")
+
+        digest = hashlib.sha1((key + WEBSOCKET_GUID).encode("ascii")).digest()
+        writer.write(
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {base64.b64encode(digest).decode('ascii')}\r\n"
+            "\r\n".encode("ascii")
+        )
+        return cls(reader, writer)
+
+    async def read_message(self):
+        while True:
+            try:
+                opcode, data = await self._read_frame()
+            except (asyncio.IncompleteReadError, ConnectionError):
+                opcode, data = OPCODE_CLOSE, b""
+
+            if opcode == OPCODE_CLOSE:
+                self.closed = True
+                return None
+            if opcode == OPCODE_PING:
+                self._send_frame(OPCODE_PONG, data)
+            elif opcode == OPCODE_BINARY and data:
+                length, offset = read_varint(data, 0)
+                message = data[offset : offset + length]
+                if message:
+                    self.stats.messages_received += 1
+                    return message[0], message[1:]
+
+    async def _read_frame(self):
+        """Reads a frame and returns its opcode and unmasked payload."""
+        head = await self._read(2)
+        length = head[1] & 0x7F
+        if length == 126:
+            length = int.from_bytes(await self._read(2), "big")
+        elif length == 127:
+            length = int.from_bytes(await self._read(8), "big")
+        # A frame carries one message and its length varint
+        if length > MAX_MESSAGE_SIZE + 2:
+            raise ConnectionError("Frame too long")
+        mask = await self._read(4) if head[1] & 0x80 else None
+        data = await self._read(length)
+
+        if mask:
+            # XORs the whole payload at once, as one big integer
+            key = (mask * (length // 4 + 1))[:length]
+            data = (
+                int.from_bytes(data, "little") ^ int.from_bytes(key, "little")
+            ).to_bytes(length, "little")
+        return head[0] & 0x0F, data
+
+    def _write(self, data):
+        self._send_frame(OPCODE_BINARY, data)
+
+    def _send_frame(self, opcode, data):
+        head = bytearray([0x80 | opcode])  # A single, final frame
+        length = len(data)
+        if length < 126:
+            head.append(length)
+        elif length < 1 << 16:
+            head.append(126)
+            head += length.to_bytes(2, "big")
+        else:
+            head.append(127)
+            head += length.to_bytes(8, "big")
+        super()._write(bytes(head) + data)
+
+
+class Seat:
+    """A player of a server match, played by a client or by a bot."""
+
+    __slots__ = (
+        "number",
+        "name",
+        "connection",
+        "bot",
+        "input_mask",
+        "input_sequence",
+        "acked",
+    )
+
+    def __init__(self, number):
+        self.number = number
+        self.name = f"Player {number}"
+        self.connection = None  # None while a bot plays
+        self.bot = Bot()
+        self.input_mask = 0
+        self.input_sequence = 0  # Sequence number of the client's last input
+        self.acked = 0  # Last sequence number sent back in a STATE message
+
+
+@dataclass
+class MatchReport:
+    """Outcome and CPU cost of a match of the server."""
+
+    match_id: int
+    seed: int
+    clients: int = 0
+    ticks: int = 0
+    winner: int = 0
+    finished: bool = False  # False if the server stopped during the match
+    cpu: float = 0.0  # CPU seconds spent on the match's ticks
+    elapsed: float = 0.0  # Wall-clock seconds from the first to the last tick
+    generation: float = 0.0  # Seconds the match waited for its maze from the pool
+    late_ticks: int = 0  # Ticks run more than a tick after they were due
+
+    @property
+    def load(self) -> float:
+        """Fraction of a core the match kept busy while it ran."""
+        return self.cpu / self.elapsed if self.elapsed > 0 else 0.0
+
+
+@dataclass
+class ServerReport:
+    """CPU cost of the matches of a MatchServer run."""
+
+    matches: List[MatchReport] = field(default_factory=list)
+    elapsed: float = 0.0  # Wall-clock seconds the server ran
+    cpu: float = 0.0  # CPU seconds of the server process, including the event loop
+    peak_matches: int = 0  # Most matches running at once
+
+    @property
+    def concurrent_matches(self) -> float:
+        """Average number of matches running at once."""
+        played = sum(match.elapsed for match in self.matches)
+        return played / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def matches_per_core(self) -> float:
+        """Matches one core can run at the tick rate, from the server's CPU usage."""
+        return self.concurrent_matches * self.elapsed / self.cpu if self.cpu > 0 else 0.0
+
+    def __str__(self):
+        matches = self.matches
+        if not matches:
+            return f"No matches in {self.elapsed:.1f}s"
+        ticks = sum(match.ticks for match in matches)
+        cpu = sum(match.cpu for match in matches)
+        played = sum(match.elapsed for match in matches)
+        generation = sum(match.generation for match in matches) / len(matches)
+        return (
+            f"{len(matches)} matches "
+            f"({sum(match.finished for match in matches)} finished, "
+            f"{sum(match.clients for match in matches)} clients), {ticks} ticks "
+            f"in {self.elapsed:.1f}s, up to {self.peak_matches} at once\n"
+            f"per match: {cpu / played * 1000:.1f} ms CPU per second of play, "
+            f"{cpu / max(ticks, 1) * 1e6:.0f} µs per tick, "
+            f"{generation * 1000:.0f} ms waiting for the maze\n"
+            f"server: {self.cpu / self.elapsed:.0%} of a core for "
+            f"{self.concurrent_matches:.1f} matches on average "
+            f"= {self.matches_per_core:.0f} matches per core, "
+            f"{sum(match.late_ticks for match in matches)} late ticks"
+        )
+
+
+class ServerMatch:
+    """A match of the server: its Simulation, a seat per player and its report."""
+
+    def __init__(self, match_id, seed, config):
+        self.sim = Simulation(config)
+        self.seats = [Seat(number) for number in range(1, config.player_count + 1)]
+        self.encoder = SimStateEncoder(self.sim)
+        self.report = MatchReport(match_id, seed)
+        self.full = asyncio.Event()  # Set once clients took every seat
+
+    def free_seat(self):
+        """Returns a seat no client took yet, or None."""
+        for seat in self.seats:
+            if seat.connection is None:
+                return seat
+        return None
+
+    def start(self, grid):
+        """Starts the match on the given grid and sends it to the clients."""
+        sim = self.sim
+        sim.reset(self.report.seed, grid)
+        self.encoder.reset()
+
+        payload = bytearray()
+        write_varint(payload, self.report.seed)
+        write_varint(payload, len(sim.grid[0]))
+        write_varint(payload, len(sim.grid))
+        payload += pack_grid(sim.grid)
+        match = {
+            "config": asdict(sim.config),
+            "names": [seat.name for seat in self.seats],
+            "power_ups": [
+                [power_up.x, power_up.y, power_up.kind] for power_up in sim.power_ups
+            ],
+        }
+        payload += json.dumps(match).encode("utf-8")
+        self.send(START, bytes(payload))
+
+    def step(self):
+        """Runs a tick with the clients' last inputs and sends its changes."""
+        sim = self.sim
+        inputs = []
+        for seat, player in zip(self.seats, sim.players):
+            if seat.connection is None:
+                seat.input_mask = seat.bot(sim, player)
+            inputs.append(seat.input_mask)
+        sim.step(*inputs)
+
+        payload = self.encoder.encode_changes(sim.tick)
+        for seat in self.seats:
+            if seat.connection is None:
+                continue
+            if seat.input_sequence != seat.acked:
+                seat.acked = seat.input_sequence
+                seat.connection.send(STATE, add_ack(payload, seat.acked))
+            else:
+                seat.connection.send(STATE, payload)
+
+    def finish(self):
+        """Sends the result to the clients and frees their seats."""
+        payload = bytearray()
+        write_varint(payload, self.sim.tick)
+        write_varint(payload, self.sim.winner or 0)
+        self.send(END, bytes(payload))
+        for seat in self.seats:
+            seat.connection = None
+
+    def send(self, kind, payload):
+        """Sends a message to every client of the match."""
+        for seat in self.seats:
+            if seat.connection is not None:
+                seat.connection.send(kind, payload)
+
+
+class MatchServer:
+    """
+    Hosts matches on the running asyncio event loop. Clients joining are seated in the
+    waiting match, which starts once every seat is taken or seat_timeout passed.
+    Matches are paced by sleeping until their next tick is due, so idle matches cost
+    nothing, and CPU time is measured per match around its ticks.
+    """
+
+    def __init__(self, config=None, executor=None, seat_timeout=10.0, seed=None):
+        self.config = config or SimConfig()
+        self.executor = executor  # Runs generate_map, the default executor if None
+        self.seat_timeout = seat_timeout
+        self.seeds = random.Random(seed)
+        self.next_match_id = 1
+        self.waiting = None  # Match with free seats for joining clients
+        self.tasks = set()
+        self.bot_matches = 0  # Matches without clients kept running
+        self.reports = []
+        self.peak_matches = 0
+        self.closing = False
+        self.started = time.perf_counter()
+        self.cpu_started = time.process_time()
+
+    async def serve(self, host="", port=DEFAULT_PORT):
+        """Starts accepting clients. Returns the asyncio server."""
+        return await asyncio.start_server(self._handle_client, host, port)
+
+    def keep_bot_matches(self, count):
+        """Keeps count matches of bots running, starting a new one when one ends."""
+        self.bot_matches = count
+        for _ in range(count):
+            self.start_match(clients=False)
+
+    def start_match(self, clients=True):
+        """Starts a match, waiting for clients to take its seats unless clients is False."""
+        match = ServerMatch(self.next_match_id, self.seeds.randrange(2**32), self.config)
+        self.next_match_id += 1
+        task = asyncio.get_running_loop().create_task(self._play(match, clients))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        self.peak_matches = max(self.peak_matches, len(self.tasks))
+        return match
+
+    async def stop(self):
+        """Stops the running matches and returns the ServerReport."""
+        self.closing = True
+        for task in list(self.tasks):
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        return ServerReport(
+            matches=self.reports,
+            elapsed=time.perf_counter() - self.started,
+            cpu=time.process_time() - self.cpu_started,
+            peak_matches=self.peak_matches,
+        )
+
+    async def _play(self, match, clients):
+        loop = asyncio.get_running_loop()
+        config = self.config
+        report = match.report
+
+        waited = time.perf_counter()
+        grid = await loop.run_in_executor(
+            self.executor,
+            generate_map,
+            config.maze_width,
+            config.maze_height,
+            report.seed,
+            config.quadrant_map,
+        )
+        report.generation = time.perf_counter() - waited
+        if clients:
+            try:
+                await asyncio.wait_for(match.full.wait(), self.seat_timeout)
+            except asyncio.TimeoutError:
+                pass
+            if self.waiting is match:
+                self.waiting = None
+
+        cpu = time.thread_time()
+        match.start(grid)
+        report.cpu += time.thread_time() - cpu
+
+        time_step = 1 / config.tick_rate
+        first_tick = next_tick = loop.time()
+        try:
+            while not match.sim.done:
+                next_tick += time_step
+                delay = next_tick - loop.time()
+                if delay < -time_step:
+                    report.late_ticks += 1
+                    if delay < -time_step * MAX_CATCH_UP_TICKS:
+                        next_tick = loop.time()
+                # Sleeping even when the tick is due lets the other matches run
+                await asyncio.sleep(max(0.0, delay))
+
+                cpu = time.thread_time()
+                match.step()
+                report.cpu += time.thread_time() - cpu
+            report.finished = True
+        finally:
+            report.elapsed = loop.time() - first_tick
+            report.ticks = match.sim.tick
+            report.winner = match.sim.winner or 0
+            self.reports.append(report)
+            match.finish()
+            if not clients and not self.closing:
+                self.start_match(clients=False)
+
+    def _take_seat(self, connection, name):
+        """Seats a client in the waiting match, starting a new one if there is none."""
+        if self.waiting is None:
+            self.waiting = self.start_match()
+        match = self.waiting
+        seat = match.free_seat()
+        seat.connection = connection
+        seat.name = name or seat.name
+        seat.input_mask = seat.input_sequence = seat.acked = 0
+        match.report.clients += 1
+
+        accept = bytearray([seat.number])
+        write_varint(accept, match.report.match_id)
+        connection.send(ACCEPT, bytes(accept))
+
+        if match.free_seat() is None:
+            self.waiting = None
+            match.full.set()
+        return seat
+
+    async def _handle_client(self, reader, writer):
+        try:
+            # A WebSocket starts with a GET request, a TCP client with a JOIN message,
+            # which is at least 3 bytes long
+            prefix = await reader.readexactly(3)
+            if prefix == b"GET":
+                connection = await WebSocketConnection.accept(reader, writer, prefix)
+            else:
+                connection = StreamConnection(reader, writer, prefix)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            writer.close()
+            return
+
+        seat = None
+        while not connection.closed:
+            message = await connection.read_message()
+            if message is None:
+                break
+            kind, payload = message
+            if kind == JOIN and (seat is None or seat.connection is not connection):
+                try:
+                    name = check_join(payload, SERVER_PROTOCOL_VERSION)
+                except ConnectionError as e:
+                    print(f"Refused a client: {e}")
+                    connection.send(REJECT, str(e).encode("utf-8"))
+                    break
+                seat = self._take_seat(connection, name[:MAX_NAME_LENGTH])
+            elif kind == INPUT and seat is not None and seat.connection is connection:
+                seat.input_sequence, offset = read_varint(payload, 0)
+                seat.input_mask = payload[offset]
+
+        # A bot plays on in the client's place
+        if seat is not None and seat.connection is connection:
+            seat.connection = None
+        connection.close()
+
+
+def parse_args():
+    """Parses the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="", help="address to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument(
+        "--bot-matches",
+        type=int,
+        default=0,
+        metavar="N",
+        help="keep N matches of bots running besides the matches of clients",
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=0,
+        metavar="SECONDS",
+        help="stop and print the report after this long, 0 to run until interrupted",
+    )
+    parser.add_argument("--maze-size", type=int, default=31)
+    parser.add_argument(
+        "--players",
+        type=int,
+        default=2,
+        choices=range(2, MAX_PLAYERS + 1),
+        metavar="N",
+        help="players per match, more than 2 race on a map of four quadrants",
+    )
+    parser.add_argument(
+        "--max-ticks",
+        type=int,
+        default=36000,
+        help="ticks after which a match ends in a draw",
+    )
+    parser.add_argument(
+        "--seat-timeout",
+        type=float,
+        default=10.0,
+        metavar="SECONDS",
+        help="how long a match waits for clients before bots take the free seats",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="processes generating mazes",
+    )
+    parser.add_argument("--seed", type=int, default=None, help="seed of the match seeds")
+    return parser.parse_args()
+
+
+async def serve(args):
+    """Runs the server until the duration passed or it is interrupted."""
+    config = SimConfig(
+        maze_width=args.maze_size,
+        maze_height=args.maze_size,
+        player_count=args.players,
+        max_ticks=args.max_ticks,
+    )
+    with ProcessPoolExecutor(args.workers) as executor:
+        server = MatchServer(config, executor, args.seat_timeout, args.seed)
+        listener = await server.serve(args.host, args.port)
+        print(f"Serving matches on port {args.port}")
+        server.keep_bot_matches(args.bot_matches)
+        try:
+            if args.duration > 0:
+                await asyncio.sleep(args.duration)
+            else:
+                await asyncio.Event().wait()
+        finally:
+            listener.close()
+            print(await server.stop())
+
+
+def main():
+    """Runs the match server."""
+    try:
+        asyncio.run(serve(parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+This module contains ServerClient, a headless client of the match server (net.server) whose
+seat is played by a policy, a simulation.Bot by default. It keeps a copy of the server's match
+in a simulation.Simulation, built from the START message and updated by the STATE messages.
+
+Usage: python -m net.server_client 127.0.0.1:5600 --name Bot --matches 3
+"""
+
+import argparse
+import json
+import time
+
+from engine.replay import read_varint, write_varint
+from simulation import Bot, SimConfig, Simulation
+from simulation.simulation import SimPowerUp
+
+from .delta import SimStateDecoder
+from .protocol import (ACCEPT, DEFAULT_PORT, END, INPUT, JOIN, REJECT,
+                       SERVER_PROTOCOL_VERSION, START, STATE, Connection)
+
+
+def unpack_grid(data, cols, rows):
+    """Unpacks a grid packed by net.server.pack_grid."""
+    cells = [(data[index >> 3] >> (index & 7)) & 1 for index in range(cols * rows)]
+    return [cells[row * cols : (row + 1) * cols] for row in range(rows)]
+
+
+class ServerClient:
+    """
+    A client of the match server. It sends the input its policy chooses for its player
+    whenever a tick arrived and the input changed.
+    """
+
+    def __init__(self, connection, policy=None):
+        self.connection = connection
+        self.address = None
+        self.policy = policy or Bot()
+        self.player_number = None
+        self.match_id = None
+        self.sim = None  # Copy of the running match, None between matches
+        self.decoder = None
+        self.input_mask = None
+        self.input_sequence = 0
+        self.sent_at = {}  # Input sequence number -> time it was sent
+        self.results = []  # (match id, final tick, winner) of the finished matches
+
+    @classmethod
+    def connect(cls, address, name="", policy=None, timeout=10.0):
+        """Connects to the server at "host:port" and takes a seat in its next match."""
+        client = cls(Connection.connect(address, timeout), policy)
+        client.address = address
+        client.join(name, timeout)
+        return client
+
+    @property
+    def stats(self):
+        """NetStats of the connection to the server."""
+        return self.connection.stats
+
+    @property
+    def player(self):
+        """The SimPlayer this client plays."""
+        return self.sim.players[self.player_number - 1]
+
+    def join(self, name="", timeout=10.0):
+        """Asks for a seat in the next match and waits until the server gives one."""
+        self.match_id = None
+        self.connection.send(
+            JOIN, bytes([SERVER_PROTOCOL_VERSION]) + name.encode("utf-8")
+        )
+        deadline = time.perf_counter() + timeout
+        while self.match_id is None:
+            if self.connection.closed or time.perf_counter() > deadline:
+                self.connection.close()
+                raise ConnectionError(
+                    f"The server at {self.address} did not accept the connection"
+                )
+            self.poll(timeout=0.1)
+
+    def play(self, name="", timeout=10.0):
+        """
+        Plays a match, joining it unless a seat was already given. Returns its
+        (match id, final tick, winner).
+        """
+        if self.match_id is None:
+            self.join(name, timeout)
+        finished = len(self.results)
+        while len(self.results) == finished:
+            if not self.poll(timeout=timeout) and len(self.results) == finished:
+                raise ConnectionError(f"The server at {self.address} closed the connection")
+        self.match_id = None
+        return self.results[-1]
+
+    def poll(self, timeout=0.0):
+        """
+        Applies the messages from the server, waiting up to timeout seconds for them, and
+        sends the policy's input if a tick arrived. Returns False once the server closed
+        the connection.
+        """
+        ticked = False
+        for kind, payload in self.connection.receive(timeout):
+            if kind == REJECT:
+                self.connection.close()
+                raise ConnectionError(
+                    f"The server at {self.address} refused to join: "
+                    f"{payload.decode('utf-8', 'replace')}"
+                )
+            if kind == ACCEPT:
+                self.player_number = payload[0]
+                self.match_id, _ = read_varint(payload, 1)
+            elif kind == START:
+                self._start_match(payload)
+            elif kind == STATE and self.sim is not None:
+                self._apply_state(payload)
+                ticked = True
+            elif kind == END:
+                self._end_match(payload)
+
+        if ticked and self.sim is not None and not self.connection.closed:
+            self.send_input(self.policy(self.sim, self.player))
+        return not self.connection.closed
+
+    def send_input(self, mask):
+        """Sends the input mask of the player, unless it did not change."""
+        if mask == self.input_mask:
+            return
+        self.input_mask = mask
+        self.input_sequence += 1
+        self.sent_at[self.input_sequence] = time.perf_counter()
+
+        payload = bytearray()
+        write_varint(payload, self.input_sequence)
+        payload.append(mask)
+        self.connection.send(INPUT, bytes(payload))
+
+    def _start_match(self, payload):
+        seed, offset = read_varint(payload, 0)
+        cols, offset = read_varint(payload, offset)
+        rows, offset = read_varint(payload, offset)
+        end = offset + (cols * rows + 7) // 8
+        grid = unpack_grid(payload[offset:end], cols, rows)
+        match = json.loads(payload[end:].decode("utf-8"))
+
+        config = SimConfig(
+            **{
+                name: tuple(value) if isinstance(value, list) else value
+                for name, value in match["config"].items()
+            }
+        )
+        self.sim = Simulation(config)
+        self.sim.reset(seed, grid)
+        size = int(config.block_size * 0.6)
+        self.sim.power_ups = [
+            SimPowerUp(x, y, size, kind) for x, y, kind in match["power_ups"]
+        ]
+        self.decoder = SimStateDecoder(self.sim)
+        self.decoder.reset()
+        if hasattr(self.policy, "reset"):
+            self.policy.reset()
+        self.input_mask = None
+        self.send_input(self.policy(self.sim, self.player))
+
+    def _apply_state(self, payload):
+        tick, ack = self.decoder.apply(payload)
+        self.sim.tick = tick
+
+        if ack is not None:
+            now = time.perf_counter()
+            for sequence in [sequence for sequence in self.sent_at if sequence <= ack]:
+                self.stats.latencies.append(now - self.sent_at.pop(sequence))
+
+    def _end_match(self, payload):
+        tick, offset = read_varint(payload, 0)
+        winner, _ = read_varint(payload, offset)
+        self.results.append((self.match_id, tick, winner))
+        self.sim = None
+
+    def close(self):
+        """Leaves the server."""
+        self.connection.close()
+
+
+def parse_args():
+    """Parses the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "address",
+        nargs="?",
+        default=f"127.0.0.1:{DEFAULT_PORT}",
+        help="host:port of the match server",
+    )
+    parser.add_argument("--name", default="Bot", help="name of the client's player")
+    parser.add_argument("--matches", type=int, default=1, help="matches to play")
+    return parser.parse_args()
+
+
+def main():
+    """Plays matches on a match server with a Bot."""
+    args = parse_args()
+    client = ServerClient.connect(args.address, args.name)
+    try:
+        for _ in range(args.matches):
+            match_id, tick, winner = client.play(args.name)
+            result = "won" if winner == client.player_number else f"winner {winner}"
+            print(
+                f"Match {match_id} as player {client.player_number}: {result} "
+                f"at tick {tick}"
+            )
+    finally:
+        client.close()
+    print(client.stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,72 +1,76 @@
 """This module defines the PowerUpManager class, which manages active power-ups in the game."""
 
-import pygame
+from simulation.scheduler import TickScheduler
 
 
 class PowerUpManager:
     """
     This class manages active power-ups in the game.
+    Effects expire after a number of simulation ticks, so matches can be replayed exactly.
     """
 
     def __init__(self, main):
         self.main = main
-        self.active_powerups = {}  # Dictionary containing active power-ups
+        # Active power-up -> (power-up type, number of the affected player)
+        self.active_powerups = {}
+        self.expiries = {}  # Active power-up -> ScheduledCall of its expiry
+        self.scheduler = TickScheduler()
 
     def register_powerup(self, powerup_type, player_num, powerup_instance):
         """
         Register an active power-up for a given player.
+        Its effect is removed once the power-up's duration has passed. A power-up of a type
+        already active on the player replaces the earlier one, so its effect does not stack
+        but lasts for the full duration again.
         """
-        key = (powerup_type, player_num)
-        self.active_powerups[key] = powerup_instance
+        engine = self.main.engine
+        for other, active in list(self.active_powerups.items()):
+            if active == (powerup_type, player_num):
+                del self.active_powerups[other]
+                self.scheduler.cancel(self.expiries.pop(other))
+                other.remove_effect(player_num)
+        self.active_powerups[powerup_instance] = (powerup_type, player_num)
+        self.expiries[powerup_instance] = self.scheduler.schedule(
+            engine.tick + engine.ticks(powerup_instance.duration),
+            self._expire,
+            powerup_instance,
+        )
 
-    def handle_event(self, event):
+    def _expire(self, powerup_instance):
+        _, player_num = self.active_powerups.pop(powerup_instance)
+        del self.expiries[powerup_instance]
+        powerup_instance.remove_effect(player_num)
+
+    def update(self, tick):
         """
-        Handle events related to power-ups.
+        Removes the effects of power-ups that expired at or before the given tick.
         """
-        # Handle events for resetting player speed
-        if event.type == pygame.USEREVENT + 1:  # player 1
-            key = ("speed", 1)
-            if key in self.active_powerups:
-                self.active_powerups[key].remove_effect(1)
-                del self.active_powerups[key]
-        elif event.type == pygame.USEREVENT + 2:  # player 2
-            key = ("speed", 2)
-            if key in self.active_powerups:
-                self.active_powerups[key].remove_effect(2)
-                del self.active_powerups[key]
+        self.scheduler.run_until(tick)
 
-        # Handle events for restoring size
-        elif event.type == pygame.USEREVENT + 21:  # player 1
-            key = ("enlarge", 1)
-            if key in self.active_powerups:
-                self.active_powerups[key].remove_effect(1)
-                del self.active_powerups[key]
-        elif event.type == pygame.USEREVENT + 22:  # player 2
-            key = ("enlarge", 2)
-            if key in self.active_powerups:
-                self.active_powerups[key].remove_effect(2)
-                del self.active_powerups[key]
+    def save_state(self):
+        """
+        Returns the active power-ups and their expiry times as a value for load_state.
+        """
+        return self.scheduler.save_state(), tuple(self.active_powerups.items())
 
-        # Handle events for unfreezing players
-        elif event.type == pygame.USEREVENT + 31:  # player 1
-            key = ("freeze", 1)
-            if key in self.active_powerups:
-                self.active_powerups[key].remove_effect(1)
-                del self.active_powerups[key]
-        elif event.type == pygame.USEREVENT + 32:  # player 2
-            key = ("freeze", 2)
-            if key in self.active_powerups:
-                self.active_powerups[key].remove_effect(2)
-                del self.active_powerups[key]
+    def load_state(self, state):
+        """
+        Restores the active power-ups saved by save_state.
+        """
+        scheduler, active_powerups = state
+        self.scheduler.load_state(scheduler)
+        self.active_powerups = dict(active_powerups)
+        # Restoring the scheduler replaced its calls, so their handles are looked up again
+        self.expiries = {
+            call.args[0]: call
+            for call in self.scheduler.heap
+            if call.callback == self._expire
+        }
 
-        # Handle events for reversing controls
-        elif event.type == pygame.USEREVENT + 41:  # player 1
-            key = ("reverse_controls", 1)
-            if key in self.active_powerups:
-                self.active_powerups[key].remove_effect(1)
-                del self.active_powerups[key]
-        elif event.type == pygame.USEREVENT + 42:  # player 2
-            key = ("reverse_controls", 2)
-            if key in self.active_powerups:
-                self.active_powerups[key].remove_effect(2)
-                del self.active_powerups[key]
+    def reset(self):
+        """
+        Forgets all active power-ups, used when a new match starts.
+        """
+        self.scheduler.clear()
+        self.active_powerups.clear()
+        self.expiries.clear()
@@ -1,15 +1,19 @@
 """This module contains classes for different power-ups in the game."""
 
-import random
-
 import pygame
 
+from simulation.effects import (FREEZE, REVERSE_CONTROLS, SLOW_DOWN, SPEED_BOOST,
+                                Effect)
+from simulation.rules import find_opponent, teleport_floors
+
 
 class PowerUp(pygame.sprite.Sprite):
     """
     Base class for power-ups appearing on the map.
     """
 
+    kind = None  # Name used by the settings and the simulation core, e.g. "speed_boost"
+
     def __init__(self, main, pos_x, pos_y, block_size):
         super().__init__()
         self.main = main
@@ -25,6 +29,7 @@ class PowerUp(pygame.sprite.Sprite):
         self.block_size = block_size
         self.duration = self.main.settings.power_up_duration  # Effect duration in ms
         self.active = True
+        self.effect_handle = None  # Handle of the effect put on the affected player
 
     def apply_effect(self, player):
         """
@@ -35,8 +40,21 @@ class PowerUp(pygame.sprite.Sprite):
     def remove_effect(self, player_num):
         """
         Remove the power-up effect from the player.
-        Method to be overridden by subclasses.
         """
+        self.main.players[player_num - 1].remove_effect(self.effect_handle)
+
+    def find_opponent(self, player):
+        """
+        Returns the opponent a power-up picked up by the player works against: the one
+        closest to the win zone, going through the maze.
+        """
+        players = self.main.players
+        maze = self.main.maze
+        tiles = [
+            maze.collider.tile_at(other.x + other.width / 2, other.y + other.height / 2)
+            for other in players
+        ]
+        return players[find_opponent(players.index(player), tiles, maze.distance_field)]
 
     def draw(self, screen):
         """
@@ -51,6 +69,8 @@ class SpeedBoost(PowerUp):
     Power-up that increases the player's speed.
     """
 
+    kind = "speed_boost"
+
     def __init__(self, main, pos_x, pos_y, block_size):
         super().__init__(main, pos_x, pos_y, block_size)
         self.image.fill((0, 255, 0))  # Green color for speed boost
@@ -74,28 +94,22 @@ class SpeedBoost(PowerUp):
         """
         Increases the player's speed for a specified time.
         """
-        player.speed *= 1.5
+        self.effect_handle = player.add_effect(SPEED_BOOST)
 
-        # Register the power-up with the manager
-        self.main.powerup_manager.register_powerup("speed", player.player_number, self)
-
-        # After a specified time, restore normal speed
-        pygame.time.set_timer(pygame.USEREVENT + player.player_number, self.duration)
+        # Register the power-up with the manager, it removes the boost later
+        self.main.powerup_manager.register_powerup(
+            "speed_boost", player.player_number, self
+        )
         self.active = False
 
-    def remove_effect(self, player_num):
-        """
-        Restores the player's normal speed.
-        """
-        player = self.main.player1 if player_num == 1 else self.main.player2
-        player.reset_speed()
-
 
 class SlowDown(PowerUp):
     """
     Power-up that decreases the opponent's speed.
     """
 
+    kind = "slow_down"
+
     def __init__(self, main, pos_x, pos_y, block_size):
         super().__init__(main, pos_x, pos_y, block_size)
         self.image.fill((255, 0, 0))  # Red color for slow down
@@ -111,36 +125,23 @@ class SlowDown(PowerUp):
         """
         Slows down the player's opponent.
         """
-        # Find the opponent
-        if player.player_number == 1:
-            opponent = player.main.player2
-            opponent_num = 2
-        else:
-            opponent = player.main.player1
-            opponent_num = 1
-
-        opponent.speed *= 0.5
+        opponent = self.find_opponent(player)
+        self.effect_handle = opponent.add_effect(SLOW_DOWN)
 
-        # Register the power-up with the manager
-        self.main.powerup_manager.register_powerup("speed", opponent_num, self)
-
-        # After a specified time, restore normal speed
-        pygame.time.set_timer(pygame.USEREVENT + opponent_num, self.duration)
+        # Register the power-up with the manager, it removes the slowdown later
+        self.main.powerup_manager.register_powerup(
+            "slow_down", opponent.player_number, self
+        )
         self.active = False
 
-    def remove_effect(self, player_num):
-        """
-        Restores the player's normal speed.
-        """
-        player = self.main.player1 if player_num == 1 else self.main.player2
-        player.reset_speed()
-
 
 class Enlarge(PowerUp):
     """
     Power-up that enlarges the player's opponent to exactly the size of a block.
     """
 
+    kind = "enlarge"
+
     def __init__(self, main, pos_x, pos_y, block_size):
         super().__init__(main, pos_x, pos_y, block_size)
         self.image.fill((255, 165, 0))  # Orange color
@@ -162,81 +163,28 @@ class Enlarge(PowerUp):
         """
         Enlarges the player's opponent to exactly the size of a block.
         """
-        # Find the opponent
-        if player.player_number == 1:
-            opponent = self.main.player2
-            opponent_num = 2
-        else:
-            opponent = self.main.player1
-            opponent_num = 1
-
-        # Save the original dimensions
-        original_width = opponent.width
-        original_height = opponent.height
-        block_size = self.main.settings.block_size
-
-        # Save the original center position of the player
-        center_x = opponent.x + original_width / 2
-        center_y = opponent.y + original_height / 2
-
-        # Set the new size exactly to the size of a block
-        new_width = int(block_size * 0.99)
-        new_height = int(block_size * 0.99)
-
-        # Calculate the new position of the player to keep it centered
-        new_x = int(center_x - new_width / 2)
-        new_y = int(center_y - new_height / 2)
-
-        # set the new dimensions
-        opponent.width = new_width
-        opponent.height = new_height
-        opponent.x = new_x
-        opponent.y = new_y
-
-        # Update the image and collision rectangle
-        opponent.update_image()
-        opponent.push_out_of_wall()
-
-        # Register the power-up with the manager
-        self.main.powerup_manager.register_powerup("enlarge", opponent_num, self)
-
-        # Set a timer to restore the normal size
-        pygame.time.set_timer(
-            pygame.USEREVENT + 20 + opponent_num, self.duration, loops=1
+        opponent = self.find_opponent(player)
+
+        # The player keeps its center and is pushed out of any wall it now overlaps
+        size = int(self.main.settings.block_size * 0.99)
+        self.effect_handle = opponent.add_effect(Effect("enlarge", size=(size, size)))
+
+        # Register the power-up with the manager, it restores the normal size later
+        self.main.powerup_manager.register_powerup(
+            "enlarge", opponent.player_number, self
         )
 
         # Deactivate the power-up
         self.active = False
 
-    def remove_effect(self, player_num):
-        """
-        Restores the player's normal size.
-        """
-        player = self.main.player1 if player_num == 1 else self.main.player2
-
-        original_width = self.main.settings.player_width
-        original_height = self.main.settings.player_height
-
-        # Save the player's center
-        center_x = player.x + player.width / 2
-        center_y = player.y + player.height / 2
-
-        # Restore the original size
-        player.width = original_width
-        player.height = original_height
-
-        # Update the position, keeping the center
-        player.x = int(center_x - original_width / 2)
-        player.y = int(center_y - original_height / 2)
-
-        player.update_image()
-
 
 class Teleport(PowerUp):
     """
     Power-up that teleports the player randomly to an available location.
     """
 
+    kind = "teleport"
+
     def __init__(self, main, pos_x, pos_y, block_size):
         super().__init__(main, pos_x, pos_y, block_size)
         self.image.fill((148, 0, 211))  # Purple color for teleport
@@ -252,31 +200,21 @@ class Teleport(PowerUp):
         """
         Teleports the player to a random location in the maze, except for the winning zone.
         """
-        # Get all available floors
-        available_floors = []
-
-        # Get winning zones
-        mid_x = self.main.settings.screen_width // 2
-        safe_margin = self.main.settings.block_size * 2
-
-        for floor in self.main.maze.floors:
-            rect = pygame.Rect(floor.rect.x, floor.rect.y, player.width, player.height)
-
-            # Check if the floor is outside the winning zone and does not collide with walls
-            is_in_win_zone = (
-                player.player_number == 1 and floor.rect.x > mid_x - safe_margin
-            ) or (player.player_number == 2 and floor.rect.x < mid_x + safe_margin)
-
-            if not is_in_win_zone and not self.main.maze.check_collision(rect):
-                available_floors.append(floor)
+        settings = self.main.settings
+        maze = self.main.maze
+        available_floors = teleport_floors(
+            [(floor.rect.x, floor.rect.y) for floor in maze.floors],
+            player.corner,
+            (player.width, player.height),
+            settings.middle,
+            settings.block_size,
+            settings.quadrant_map,
+            maze.collider.rect_hits_wall,
+        )
 
         if available_floors:
             # Randomly select a floor
-            new_floor = random.choice(available_floors)
-            player.x = new_floor.rect.x
-            player.y = new_floor.rect.y
-            player.rect.x = player.x
-            player.rect.y = player.y
+            player.teleport(*self.main.rng.choice(available_floors))
 
         self.active = False
 
@@ -286,6 +224,8 @@ class Freeze(PowerUp):
     Power-up that freezes the opponent for a short time.
     """
 
+    kind = "freeze"
+
     def __init__(self, main, pos_x, pos_y, block_size):
         super().__init__(main, pos_x, pos_y, block_size)
         self.image.fill((173, 216, 230))  # Light blue color for ice
@@ -317,49 +257,23 @@ class Freeze(PowerUp):
         """
         Freezes the player's opponent for a specified time.
         """
-        # Find the opponent
-        if player.player_number == 1:
-            opponent = self.main.player2
-            opponent_num = 2
-        else:
-            opponent = self.main.player1
-            opponent_num = 1
-
-        opponent.frozen = True
-        opponent.old_speed = (
-            opponent.speed
-            if opponent.speed is not None
-            else opponent.settings.player_speed
-        )
-        opponent.speed = 0
+        opponent = self.find_opponent(player)
+        self.effect_handle = opponent.add_effect(FREEZE)
 
-        # Register the power-up with the manager
-        self.main.powerup_manager.register_powerup("freeze", opponent_num, self)
-
-        # Set a timer for unfreezing
-        pygame.time.set_timer(
-            pygame.USEREVENT + 30 + opponent_num, self.duration, loops=1
+        # Register the power-up with the manager, it unfreezes the player later
+        self.main.powerup_manager.register_powerup(
+            "freeze", opponent.player_number, self
         )
         self.active = False
 
-    def remove_effect(self, player_num):
-        """
-        Unfreezes the player.
-        """
-        player = self.main.player1 if player_num == 1 else self.main.player2
-        player.frozen = False
-
-        if hasattr(player, "old_speed") and player.old_speed is not None:
-            player.speed = player.old_speed
-        else:
-            player.reset_speed()
-
 
 class ReverseControls(PowerUp):
     """
     Power-up that reverses the controls of the player's opponent.
     """
 
+    kind = "reverse_controls"
+
     def __init__(self, main, pos_x, pos_y, block_size):
         super().__init__(main, pos_x, pos_y, block_size)
         self.image.fill((255, 215, 0))  # Gold color for reverse controls
@@ -405,35 +319,14 @@ class ReverseControls(PowerUp):
         """
         Reverses the controls of the player's opponent for a specified time.
         """
-        # Find the opponent
-        if player.player_number == 1:
-            self.affected_player = player.main.player2
-            opponent_num = 2
-        else:
-            self.affected_player = player.main.player1
-            opponent_num = 1
+        self.affected_player = self.find_opponent(player)
 
         # Reverse the controls
-        self.affected_player.reversed_controls = True
+        self.effect_handle = self.affected_player.add_effect(REVERSE_CONTROLS)
 
-        # Register the power-up with the manager
+        # Register the power-up with the manager, it restores normal controls later
         self.main.powerup_manager.register_powerup(
-            "reverse_controls", opponent_num, self
-        )
-
-        # Add a timer to restore normal controls
-        pygame.time.set_timer(
-            pygame.USEREVENT + 40 + opponent_num, self.duration, loops=1
+            "reverse_controls", self.affected_player.player_number, self
         )
 
         self.active = False
-
-    def remove_effect(self, player_num):
-        """
-        Removes the reversed control effect from the player.
-        """
-        if player_num == 1:
-            player = self.main.player1
-        else:
-            player = self.main.player2
-        player.reversed_controls = False
@@ -0,0 +1,18 @@
+"""
+This module provides the pygame-free simulation core: tile-grid physics, input flags, status
+effects, distance fields, map generation, match rules shared with the game, a bot, a tick
+scheduler and a deterministic, seedable model of a match.
+"""
+
+from .bot import Bot
+from .effects import (FATIGUE, FREEZE, REVERSE_CONTROLS, SLOW_DOWN, SPEED_BOOST,
+                      Effect, EffectStack)
+from .fields import UNREACHABLE, DistanceField, win_columns, win_rows
+from .generation import (generate_map, generate_maze, mirror_maze,
+                         mirror_maze_quadrants)
+from .inputs import (INPUT_DOWN, INPUT_LEFT, INPUT_RIGHT, INPUT_UP, decode_input,
+                     encode_input)
+from .physics import GridCollider
+from .rules import find_opponent
+from .scheduler import ScheduledCall, TickScheduler
+from .simulation import SimConfig, Simulation
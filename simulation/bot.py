@@ -0,0 +1,177 @@
+"""
+This module contains the Bot class, a computer-controlled player that races to the win zone
+along the maze's distance field and takes short detours to pick up power-ups.
+"""
+
+from collections import deque
+
+from .fields import NEIGHBOURS, UNREACHABLE
+from .inputs import encode_input
+
+# Power-ups not worth a detour, teleports may land anywhere
+AVOIDED_POWER_UPS = ("teleport",)
+
+
+class Bot:
+    """
+    Steers one player through a world: the game's Maze or a Simulation. A world has a
+    collider, a distance_field to the win zone and a power_up_tiles() method returning
+    (column, row, kind) of the power-ups that can still be picked up.
+
+    The bot only plans when its tile, the world or the grid changes. Planning looks for
+    power-ups within detour_steps tiles and takes the cheapest one if it adds at most
+    max_detour steps to the way to the win zone. Otherwise the next tile is a lookup in
+    the distance field. Between plans, every tick only compares positions.
+    """
+
+    def __init__(self, detour_steps=8, max_detour=6, avoided=AVOIDED_POWER_UPS):
+        self.detour_steps = detour_steps
+        self.max_detour = max_detour
+        self.avoided = set(avoided)
+
+        self.world = None
+        self.tile = None
+        self.grid_version = None
+        self.next_tile = None  # Tile the bot is currently heading into
+        self.path = deque()  # Remaining tiles of a detour to a power-up
+        self.targeted = set()  # Power-up tiles already gone for, never targeted again
+
+    def reset(self):
+        """Forgets the current plan."""
+        self.world = None
+        self.tile = None
+        self.grid_version = None
+        self.next_tile = None
+        self.path.clear()
+        self.targeted.clear()
+
+    def __call__(self, sim, player):
+        """Policy interface of LabyRunEnv: returns the input mask of a SimPlayer."""
+        return self.get_input(
+            sim,
+            player.x,
+            player.y,
+            player.width,
+            player.height,
+            player.reversed_controls,
+        )
+
+    def get_input(self, world, x, y, width, height, reversed_controls=False):
+        """
+        Returns the input mask moving the rectangle of the player at (x, y) towards its
+        next tile.
+        """
+        collider = world.collider
+        tile = collider.tile_at(x + width / 2, y + height / 2)
+        if (
+            tile != self.tile
+            or world is not self.world
+            or collider.version != self.grid_version
+        ):
+            self._plan(world, tile)
+
+        if self.next_tile is None:
+            return 0
+
+        # Move until the rectangle lies inside the next tile, on both axes at once
+        col, row = self.next_tile
+        left = collider.origin_x + col * collider.block_size
+        top = collider.origin_y + row * collider.block_size
+        target_x = min(max(x, left), left + collider.block_size - width)
+        target_y = min(max(y, top), top + collider.block_size - height)
+
+        up, down = target_y < y, target_y > y
+        left_pressed, right = target_x < x, target_x > x
+        if reversed_controls:
+            up, down = down, up
+            left_pressed, right = right, left_pressed
+        return encode_input(up, right, left_pressed, down)
+
+    def _plan(self, world, tile):
+        """Chooses the next tile after the bot entered a new tile or the grid changed."""
+        if world is not self.world:
+            self.targeted.clear()
+            self.path.clear()
+        elif world.collider.version != self.grid_version:
+            self.path.clear()  # Paths across the old grid may run through walls now
+        self.world = world
+        self.tile = tile
+        self.grid_version = world.collider.version
+
+        while self.path and self.path[0] == tile:
+            self.path.popleft()
+        if self.path and self.path[0] not in self._neighbours(tile):
+            self.path.clear()  # Pushed or teleported off the detour
+        if not self.path:
+            self.path.extend(self._find_detour(world, tile))
+
+        field = world.distance_field
+        if self.path:
+            self.next_tile = self.path[0]
+        elif field.distance(*tile) == 0:
+            # The win check needs the player well inside the zone, so keep going to the
+            # middle column, and the middle row if the zone is limited to some rows
+            col, row = tile
+            middle_col, middle_row = field.cols // 2, field.rows // 2
+            step_col = (col < middle_col) - (col > middle_col)
+            step_row = (row < middle_row) - (row > middle_row)
+            if step_col:
+                self.next_tile = (col + step_col, row)
+            elif step_row and field.target_rows is not None:
+                self.next_tile = (col, row + step_row)
+            else:
+                self.next_tile = None
+        else:
+            self.next_tile = field.next_tile(*tile)
+
+    @staticmethod
+    def _neighbours(tile):
+        col, row = tile
+        return [(col + dx, row + dy) for dx, dy in NEIGHBOURS]
+
+    def _find_detour(self, world, start):
+        """
+        Returns the path to the power-up with the cheapest detour, without the start tile,
+        or an empty list if none is worth it.
+        """
+        field = world.distance_field
+        start_distance = field.distance(*start)
+        if start_distance == UNREACHABLE or self.max_detour <= 0:
+            return []
+
+        power_ups = {
+            (col, row): kind
+            for col, row, kind in world.power_up_tiles()
+            if kind not in self.avoided and (col, row) not in self.targeted
+        }
+        if not power_ups:
+            return []
+
+        # Breadth-first search over the floor tiles close to the bot
+        parents = {start: None}
+        queue = deque([(start, 0)])
+        best_tile, best_cost = None, self.max_detour + 1
+        while queue:
+            tile, steps = queue.popleft()
+            if tile in power_ups and tile != start:
+                remaining = field.distance(*tile)
+                cost = steps + remaining - start_distance
+                if remaining != UNREACHABLE and cost < best_cost:
+                    best_tile, best_cost = tile, cost
+            if steps == self.detour_steps:
+                continue
+            for neighbour in self._neighbours(tile):
+                if neighbour not in parents and field.distance(*neighbour) != UNREACHABLE:
+                    parents[neighbour] = tile
+                    queue.append((neighbour, steps + 1))
+
+        if best_tile is None:
+            return []
+        self.targeted.add(best_tile)
+        path = []
+        tile = best_tile
+        while tile != start:
+            path.append(tile)
+            tile = parents[tile]
+        path.reverse()
+        return path
@@ -0,0 +1,119 @@
+"""
+This module contains the status effects that power-ups and events put on players, and the
+EffectStack that combines a player's active effects into its current stats.
+"""
+
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Effect:
+    """
+    A modifier of a player's stats. The same Effect may be active several times at once,
+    each push popped on its own handle.
+    """
+
+    name: str
+    speed_factor: float = 1.0
+    truncate_speed: bool = False  # Rounds the speed down after applying speed_factor
+    frozen: bool = False
+    reversed_controls: bool = False
+    size: tuple = None  # (width, height) replacing the base size
+
+
+SPEED_BOOST = Effect("speed_boost", speed_factor=1.5)
+SLOW_DOWN = Effect("slow_down", speed_factor=0.5)
+FREEZE = Effect("freeze", frozen=True)
+REVERSE_CONTROLS = Effect("reverse_controls", reversed_controls=True)
+FATIGUE = Effect("fatigue", speed_factor=0.5, truncate_speed=True)
+
+
+class EffectStack:
+    """
+    The active effects of one player and the stats derived from them.
+
+    Effects are pushed and popped independently, so they cannot undo each other. The
+    derived stats are plain attributes, recomputed only when an effect is added or removed.
+    Speed factors multiply; truncating factors are applied after the others. The most
+    recently pushed size wins.
+    """
+
+    def __init__(self, base_speed=0, base_size=(0, 0)):
+        self.base_speed = base_speed
+        self.base_size = base_size
+        self.effects = {}  # Handle -> Effect, in the order they were pushed
+        self.next_handle = 0
+
+        self.speed = base_speed
+        self.frozen = False
+        self.reversed_controls = False
+        self.size = base_size
+
+    def __len__(self):
+        return len(self.effects)
+
+    def __contains__(self, name):
+        return any(effect.name == name for effect in self.effects.values())
+
+    def push(self, effect):
+        """Activates an effect. Returns a handle for popping it."""
+        handle = self.next_handle
+        self.next_handle += 1
+        self.effects[handle] = effect
+        self._recompute()
+        return handle
+
+    def pop(self, handle):
+        """
+        Deactivates the effect pushed under the given handle and returns it, or None if it
+        is no longer active.
+        """
+        effect = self.effects.pop(handle, None)
+        if effect is not None:
+            self._recompute()
+        return effect
+
+    def clear(self):
+        """Deactivates all effects."""
+        self.effects.clear()
+        self._recompute()
+
+    def save_state(self):
+        """Returns the active effects as an immutable value for load_state."""
+        return tuple(self.effects.items()), self.next_handle
+
+    def load_state(self, state):
+        """Restores the effects saved by save_state."""
+        effects, self.next_handle = state
+        self.effects = dict(effects)
+        self._recompute()
+
+    def set_base(self, speed, size):
+        """Sets the stats the effects are applied to."""
+        self.base_speed = speed
+        self.base_size = size
+        self._recompute()
+
+    def _recompute(self):
+        speed = self.base_speed
+        truncating = []
+        frozen = reversed_controls = False
+        size = self.base_size
+
+        for effect in self.effects.values():
+            if effect.truncate_speed:
+                truncating.append(effect.speed_factor)
+            else:
+                speed *= effect.speed_factor
+            frozen = frozen or effect.frozen
+            reversed_controls = reversed_controls or effect.reversed_controls
+            if effect.size is not None:
+                size = effect.size
+
+        for factor in truncating:
+            speed = int(speed * factor)
+
+        self.speed = 0 if frozen else speed
+        self.frozen = frozen
+        self.reversed_controls = reversed_controls
+        self.size = size
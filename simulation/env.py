@@ -0,0 +1,167 @@
+"""
+This module contains LabyRunEnv, a Gymnasium-style reset()/step() environment around the
+simulation core, for training and evaluating agents. It requires NumPy.
+"""
+
+import numpy as np
+
+from .fields import win_columns, win_rows
+from .simulation import SimConfig, Simulation
+
+# Values of the cells in the observed grid patches
+FLOOR, WALL, POWER_UP, WIN_ZONE = range(4)
+
+# Effects reported in the observation, as remaining fraction of their duration
+OBSERVED_EFFECTS = (
+    "speed_boost",
+    "slow_down",
+    "enlarge",
+    "freeze",
+    "reverse_controls",
+    "fatigue",
+)
+
+ACTION_COUNT = 16  # Every combination of the four INPUT_* flags
+
+
+def idle_policy(_sim, _player):
+    """Opponent policy that never moves."""
+    return 0
+
+
+class LabyRunEnv:
+    """
+    Single-agent environment in which the agent controls one player and a policy
+    controls the others.
+
+    Actions are input masks in range(ACTION_COUNT). Observations are a dict of arrays
+    described by observation_spec: a square grid patch around each player (agent first,
+    then the others in order), the players' positions normalized to the maze size, and
+    their active effects. The
+    reward is +1 for winning and -1 for losing; matches reaching config.max_ticks are
+    truncated.
+    """
+
+    def __init__(self, config=None, agent=1, opponent=idle_policy, view_radius=5):
+        self.config = config or SimConfig(max_ticks=60 * 60 * 3)
+        self.sim = Simulation(self.config)
+        self.agent = agent  # Player number controlled by the agent
+        self.opponent = opponent  # Callable (sim, player) -> input mask
+        self.view_radius = view_radius
+
+        view = 2 * view_radius + 1
+        players = self.config.player_count
+        self.observation_spec = {
+            "grid": ((players, view, view), np.uint8),
+            "position": ((players, 2), np.float32),
+            "effects": ((players, len(OBSERVED_EFFECTS)), np.float32),
+        }
+
+        self._base = None  # Padded walls and win zone layer of the current grid
+        self._base_version = -1
+        self._effect_ticks = {}
+
+    def reset(self, seed=None):
+        """
+        Starts a new match. Returns (observation, info).
+        """
+        self.sim.reset(seed)
+        self._base_version = -1
+        self._effect_ticks = {
+            name: self.config.ticks(self.config.power_up_duration)
+            for name in OBSERVED_EFFECTS
+        }
+        self._effect_ticks["fatigue"] = self.config.ticks(5000)
+        return self.observe(), self._info()
+
+    def step(self, action):
+        """
+        Applies the agent's action for one tick.
+        Returns (observation, reward, terminated, truncated, info).
+        """
+        sim = self.sim
+        agent_player = sim.players[self.agent - 1]
+        sim.step(
+            *(
+                int(action) if player is agent_player else self.opponent(sim, player)
+                for player in sim.players
+            )
+        )
+
+        terminated = sim.winner is not None
+        truncated = not terminated and sim.done
+        reward = 0.0
+        if terminated:
+            reward = 1.0 if sim.winner == agent_player.number else -1.0
+        return self.observe(), reward, terminated, truncated, self._info()
+
+    def observe(self, out=None):
+        """
+        Builds the observation, writing into the arrays of out when it is given.
+        """
+        if out is None:
+            out = {
+                name: np.zeros(shape, dtype=dtype)
+                for name, (shape, dtype) in self.observation_spec.items()
+            }
+
+        sim = self.sim
+        block = self.config.block_size
+        maze_width = len(sim.grid[0]) * block
+        maze_height = len(sim.grid) * block
+        base = self._base_layer()
+        radius = self.view_radius
+        view = 2 * radius + 1
+
+        for index, player in enumerate(self._players()):
+            col = int(player.x + player.width / 2) // block
+            row = int(player.y + player.height / 2) // block
+            patch = out["grid"][index]
+            # The base layer is padded by radius, so (row, col) is the patch's corner
+            patch[:] = base[row : row + view, col : col + view]
+
+            for power_up in sim.power_ups:
+                if power_up.active:
+                    power_up_col = power_up.x // block - col + radius
+                    power_up_row = power_up.y // block - row + radius
+                    if 0 <= power_up_col < view and 0 <= power_up_row < view:
+                        patch[power_up_row, power_up_col] = POWER_UP
+
+            out["position"][index] = (player.x / maze_width, player.y / maze_height)
+            for effect, name in enumerate(OBSERVED_EFFECTS):
+                expiry = player.effects.get(name)
+                out["effects"][index, effect] = (
+                    0.0
+                    if expiry is None
+                    else (expiry - sim.tick) / self._effect_ticks[name]
+                )
+        return out
+
+    def _players(self):
+        """Returns the players, the agent's first."""
+        players = self.sim.players
+        agent_player = players[self.agent - 1]
+        return [agent_player] + [player for player in players if player is not agent_player]
+
+    def _base_layer(self):
+        """Returns the padded wall and win zone layer, rebuilt when the grid changes."""
+        sim = self.sim
+        if self._base_version != sim.grid_version:
+            radius = self.view_radius
+            grid = np.asarray(sim.grid, dtype=np.uint8)
+            base = np.pad(grid, radius, constant_values=WALL)
+
+            columns = win_columns(grid.shape[1])
+            rows = slice(None)
+            if self.config.quadrant_map:
+                win = win_rows(grid.shape[0])
+                rows = slice(radius + win.start, radius + win.stop)
+            win_zone = base[rows, radius + columns.start : radius + columns.stop]
+            win_zone[win_zone == FLOOR] = WIN_ZONE
+
+            self._base = base
+            self._base_version = sim.grid_version
+        return self._base
+
+    def _info(self):
+        return {"tick": self.sim.tick, "winner": self.sim.winner}
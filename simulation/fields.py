@@ -0,0 +1,186 @@
+"""
+This module contains the DistanceField class, which holds the number of steps from every tile
+of a maze grid to the win zone.
+"""
+
+import heapq
+from array import array
+from collections import deque
+
+UNREACHABLE = -1
+
+NEIGHBOURS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+
+
+def win_columns(cols):
+    """
+    Returns the grid columns of the win zone, the three columns in the middle of the grid.
+    """
+    middle = cols // 2
+    return range(middle - 1, middle + 2)
+
+
+def win_rows(rows):
+    """
+    Returns the grid rows of the win zone on maps with four quadrants, the three rows in the
+    middle of the grid.
+    """
+    return win_columns(rows)
+
+
+class DistanceField:
+    """
+    Breadth-first search distances, in steps between neighbouring tiles, from the floor
+    tiles of the target columns, limited to the target rows if given, to every tile of a
+    grid. Walls and tiles that cannot reach
+    a target are UNREACHABLE. Following next_tile from any tile walks down the shortest-path
+    tree to the targets.
+
+    The distances are kept in a flat array of ints. The grid is kept by reference, and
+    changes to it must be passed to open_cell and close_cell, which update only the tiles
+    whose distance changes.
+    """
+
+    def __init__(self, grid, target_columns, target_rows=None):
+        self.grid = grid
+        self.rows = len(grid)
+        self.cols = len(grid[0])
+        self.target_columns = set(target_columns)
+        self.target_rows = None if target_rows is None else set(target_rows)
+        self.version = 0  # Bumped whenever distances change
+        self.distances = array("i", [UNREACHABLE]) * (self.rows * self.cols)
+        self._build()
+
+    def distance(self, col, row):
+        """Returns the distance of the tile, or UNREACHABLE."""
+        if 0 <= col < self.cols and 0 <= row < self.rows:
+            return self.distances[row * self.cols + col]
+        return UNREACHABLE
+
+    def next_tile(self, col, row):
+        """
+        Returns a neighbouring tile one step closer to the targets, or None if the tile is
+        a target or cannot reach one.
+        """
+        distance = self.distance(col, row)
+        if distance <= 0:
+            return None
+        for dx, dy in NEIGHBOURS:
+            if self.distance(col + dx, row + dy) == distance - 1:
+                return col + dx, row + dy
+        return None
+
+    def path(self, col, row):
+        """
+        Returns the tiles of a shortest path from the given tile to a target, both
+        included, or an empty list if the tile cannot reach one.
+        """
+        if self.distance(col, row) == UNREACHABLE:
+            return []
+        tiles = [(col, row)]
+        next_tile = self.next_tile(col, row)
+        while next_tile is not None:
+            tiles.append(next_tile)
+            next_tile = self.next_tile(*next_tile)
+        return tiles
+
+    def _is_target(self, col, row):
+        return col in self.target_columns and (
+            self.target_rows is None or row in self.target_rows
+        )
+
+    def _is_floor(self, col, row):
+        return 0 <= col < self.cols and 0 <= row < self.rows and self.grid[row][col] != 1
+
+    def _build(self):
+        cols = self.cols
+        queue = deque()
+        for row, line in enumerate(self.grid):
+            if self.target_rows is not None and row not in self.target_rows:
+                continue
+            for col in self.target_columns:
+                if 0 <= col < cols and line[col] != 1:
+                    self.distances[row * cols + col] = 0
+                    queue.append((col, row))
+        self._spread(queue)
+
+    def _spread(self, queue):
+        """Lowers the distances of the tiles around the queued ones, breadth first."""
+        cols = self.cols
+        distances = self.distances
+        while queue:
+            col, row = queue.popleft()
+            next_distance = distances[row * cols + col] + 1
+            for dx, dy in NEIGHBOURS:
+                next_col, next_row = col + dx, row + dy
+                if not self._is_floor(next_col, next_row):
+                    continue
+                index = next_row * cols + next_col
+                if distances[index] == UNREACHABLE or distances[index] > next_distance:
+                    distances[index] = next_distance
+                    queue.append((next_col, next_row))
+
+    def open_cell(self, col, row):
+        """Updates the distances after the tile became a floor."""
+        self.version += 1
+        index = row * self.cols + col
+        if self._is_target(col, row):
+            self.distances[index] = 0
+        else:
+            reachable = [
+                self.distance(col + dx, row + dy)
+                for dx, dy in NEIGHBOURS
+                if self.distance(col + dx, row + dy) != UNREACHABLE
+            ]
+            if not reachable:
+                return
+            self.distances[index] = min(reachable) + 1
+        self._spread(deque([(col, row)]))
+
+    def close_cell(self, col, row):
+        """Updates the distances after the tile became a wall."""
+        self.version += 1
+        cols = self.cols
+        distances = self.distances
+        index = row * cols + col
+        if distances[index] == UNREACHABLE:
+            return
+
+        # Every tile whose shortest path could lead through the closed tile lies on a chain
+        # of tiles each one step further away than the previous one
+        affected = set()
+        queue = deque([(col, row)])
+        while queue:
+            tile_col, tile_row = queue.popleft()
+            farther = distances[tile_row * cols + tile_col] + 1
+            for dx, dy in NEIGHBOURS:
+                next_tile = (tile_col + dx, tile_row + dy)
+                if next_tile not in affected and self.distance(*next_tile) == farther:
+                    affected.add(next_tile)
+                    queue.append(next_tile)
+
+        distances[index] = UNREACHABLE
+        for tile_col, tile_row in affected:
+            distances[tile_row * cols + tile_col] = UNREACHABLE
+
+        # Distances outside the affected tiles are still correct, so they seed the search
+        heap = []
+        for tile_col, tile_row in affected:
+            for dx, dy in NEIGHBOURS:
+                distance = self.distance(tile_col + dx, tile_row + dy)
+                if distance != UNREACHABLE and (tile_col + dx, tile_row + dy) not in affected:
+                    heapq.heappush(heap, (distance + 1, tile_col, tile_row))
+
+        while heap:
+            distance, tile_col, tile_row = heapq.heappop(heap)
+            tile_index = tile_row * cols + tile_col
+            if distances[tile_index] != UNREACHABLE:
+                continue
+            distances[tile_index] = distance
+            for dx, dy in NEIGHBOURS:
+                next_tile = (tile_col + dx, tile_row + dy)
+                if (
+                    next_tile in affected
+                    and distances[next_tile[1] * cols + next_tile[0]] == UNREACHABLE
+                ):
+                    heapq.heappush(heap, (distance + 1, *next_tile))
@@ -0,0 +1,136 @@
+"""
+This module contains the generation of map grids: a random maze built with Kruskal's algorithm,
+mirrored into a map for two players or into four quadrants for more.
+"""
+
+import random
+
+
+class FindUnion:
+    """
+    This class implements the Disjoint Set Union data structure with path compression and union
+    by rank optimizations.
+    """
+
+    def __init__(self, elements):
+        self.parent = {e: e for e in elements}
+        self.rank = {e: 0 for e in elements}
+
+    def find(self, item):
+        """
+        Finds the root of the set that contains the given item.
+        Applies path compression to flatten the structure for faster future queries.
+        """
+        if self.parent[item] != item:
+            self.parent[item] = self.find(self.parent[item])  # Path compression
+        return self.parent[item]
+
+    def union(self, set1, set2):
+        """
+        Merges the sets containing 'set1' and 'set2'.
+        Uses union by rank to keep the tree shallow.
+        """
+        root1 = self.find(set1)
+        root2 = self.find(set2)
+
+        if root1 != root2:
+            if self.rank[root1] > self.rank[root2]:
+                self.parent[root2] = root1
+            else:
+                self.parent[root1] = root2
+                if self.rank[root1] == self.rank[root2]:
+                    self.rank[root2] += 1
+
+
+def generate_maze(width: int, height: int, rng=None):
+    """
+    Generates a maze with given dimensions.
+    An optional random.Random instance makes the result reproducible.
+    """
+
+    if not (isinstance(width, int) and isinstance(height, int)):
+        raise ValueError("Maze dimensions must be integers.")
+
+    if width < 0 or height < 0:
+        raise ValueError("Maze dimensions must be positive.")
+
+    if width % 4 != 3 or height % 4 != 3:
+        raise ValueError("Maze dimensions must be equal to a multiple of 4 - 1.")
+
+    maze = [[1 for _ in range(width)] for _ in range(height)]
+    cells = [(row, col) for row in range(1, height, 2) for col in range(1, width, 2)]
+    walls = []
+
+    for row, col in cells:
+        maze[row][col] = 0
+
+    fu = FindUnion(cells)
+
+    for row, col in cells:
+        if row + 2 < height:
+            walls.append(((row + 1, col), (row, col), (row + 2, col)))
+        if col + 2 < width:
+            walls.append(((row, col + 1), (row, col), (row, col + 2)))
+
+    (rng or random).shuffle(walls)
+
+    for wall, cell1, cell2 in walls:
+        if fu.find(cell1) != fu.find(cell2):
+            row, col = wall
+            maze[row][col] = 0
+            fu.union(cell1, cell2)
+
+    return maze
+
+
+def mirror_maze(maze):
+    """
+    Builds a 2-player map from a maze: the maze, a 3-block connector with the
+    treasure room in the middle, and a mirrored copy of the maze.
+    """
+    height = len(maze)
+    width = len(maze[0])
+
+    maze_map = [row + [1] * 3 + row[::-1] for row in maze]
+
+    maze_map[height // 2 - 1][width : width + 3] = [0] * 3
+    maze_map[height // 2][width - 1 : width + 4] = [0] * 5
+    maze_map[height // 2 + 1][width : width + 3] = [0] * 3
+
+    return maze_map
+
+
+def mirror_maze_quadrants(maze):
+    """
+    Builds a map for more than 2 players from a maze: four copies of the maze,
+    mirrored across both axes, separated by 3-block connectors with the treasure
+    room where they cross. Each copy reaches the treasure room through a corridor at
+    its inner corner.
+    """
+    height = len(maze)
+    width = len(maze[0])
+
+    top = [row + [1] * 3 + row[::-1] for row in maze]
+    connector = [[1] * (width * 2 + 3) for _ in range(3)]
+    maze_map = top + connector + [row[:] for row in reversed(top)]
+
+    for row in range(height, height + 3):
+        maze_map[row][width : width + 3] = [0] * 3
+
+    # Corridor of the top left copy, mirrored into the other three
+    corridor = [(height - 2, width - 1), (height - 2, width), (height - 1, width)]
+    for row, col in corridor:
+        for map_row in (row, height * 2 + 2 - row):
+            for map_col in (col, width * 2 + 2 - col):
+                maze_map[map_row][map_col] = 0
+
+    return maze_map
+
+
+def generate_map(width, height, seed=None, quadrants=False):
+    """
+    Generates the map grid of a match from a seed, with four quadrants for more than
+    2 players. Safe to run in worker processes, as it only loads this package.
+    """
+    maze = generate_maze(width, height, random.Random(seed))
+    return mirror_maze_quadrants(maze) if quadrants else mirror_maze(maze)
@@ -0,0 +1,34 @@
+"""
+This module defines the bit flags used to describe a player's input for a single tick.
+"""
+
+INPUT_UP = 1
+INPUT_RIGHT = 2
+INPUT_LEFT = 4
+INPUT_DOWN = 8
+
+
+def encode_input(up, right, left, down):
+    """
+    Converts (up, right, left, down) flags into an input mask.
+    """
+    return (
+        (INPUT_UP if up else 0)
+        | (INPUT_RIGHT if right else 0)
+        | (INPUT_LEFT if left else 0)
+        | (INPUT_DOWN if down else 0)
+    )
+
+
+def decode_input(input_mask, reversed_controls=False):
+    """
+    Converts an input mask into (up, right, left, down) flags, honoring reversed controls.
+    """
+    up, right = bool(input_mask & INPUT_UP), bool(input_mask & INPUT_RIGHT)
+    left, down = bool(input_mask & INPUT_LEFT), bool(input_mask & INPUT_DOWN)
+
+    if reversed_controls:
+        up, down = down, up
+        left, right = right, left
+
+    return up, right, left, down
@@ -0,0 +1,321 @@
+"""
+This module contains the tile-grid collision and movement rules shared by the game and the
+simulation core. Rectangles behave like pygame.Rect: positions are truncated to integers and
+rectangles that only touch do not collide.
+"""
+
+import heapq
+from array import array
+from collections import deque
+
+NEIGHBOURS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+
+
+class GridCollider:
+    """
+    Resolves collisions of axis-aligned rectangles against the walls of a tile grid.
+
+    The grid is a list of rows where 1 marks a wall. It is kept by reference, so changes
+    made to it are picked up immediately, but they must go through set_cell, which updates
+    the nearest floor transform around the changed cell. origin is the pixel position of the
+    grid's top-left corner and bounds is the (left, top, right, bottom) area that rectangles
+    must stay in. Tiles outside the grid are treated as free.
+    """
+
+    def __init__(self, grid, block_size, origin=(0, 0), bounds=None):
+        self.grid = grid
+        self.block_size = block_size
+        self.origin_x, self.origin_y = origin
+        self.rows = len(grid)
+        self.cols = len(grid[0])
+        if bounds is None:
+            bounds = (
+                self.origin_x,
+                self.origin_y,
+                self.origin_x + self.cols * block_size,
+                self.origin_y + self.rows * block_size,
+            )
+        self.bounds = bounds
+
+        self.version = 0  # Bumped by set_cell
+        # Flat arrays of the index of the nearest floor tile of every tile (-1 if there is
+        # none) and the steps to it, built on first use
+        self.nearest = None
+        self.nearest_steps = None
+
+    def set_cell(self, col, row, value):
+        """Changes a grid cell, e.g. to open or close a wall."""
+        was_wall = self.grid[row][col] == 1
+        self.grid[row][col] = value
+        self.version += 1
+        if self.nearest is None or was_wall == (value == 1):
+            return
+        if was_wall:
+            self._open_nearest_floor(col, row)
+        else:
+            self._close_nearest_floor(col, row)
+
+    def _col_span(self, x, width):
+        """Returns the first and last grid column covered by the rectangle."""
+        start = int(x) - self.origin_x
+        return start // self.block_size, (start + width - 1) // self.block_size
+
+    def _row_span(self, y, height):
+        """Returns the first and last grid row covered by the rectangle."""
+        start = int(y) - self.origin_y
+        return start // self.block_size, (start + height - 1) // self.block_size
+
+    def tile_at(self, x, y):
+        """Returns the (column, row) of the tile containing the given pixel."""
+        return (
+            (int(x) - self.origin_x) // self.block_size,
+            (int(y) - self.origin_y) // self.block_size,
+        )
+
+    def _has_wall(self, first_col, last_col, first_row, last_row):
+        first_col = max(first_col, 0)
+        last_col = min(last_col, self.cols - 1)
+        for row in range(max(first_row, 0), min(last_row, self.rows - 1) + 1):
+            line = self.grid[row]
+            for col in range(first_col, last_col + 1):
+                if line[col] == 1:
+                    return True
+        return False
+
+    def rect_hits_wall(self, x, y, width, height):
+        """
+        Checks whether the rectangle overlaps any wall tile.
+        """
+        return self._has_wall(*self._col_span(x, width), *self._row_span(y, height))
+
+    def resolve_horizontal(self, x, y, width, height, new_x):
+        """
+        Moves the rectangle horizontally from x towards new_x and returns the furthest
+        position it can reach without entering a wall.
+        """
+        if new_x == x or not self.rect_hits_wall(new_x, y, width, height):
+            return new_x
+        if self.rect_hits_wall(x, y, width, height):
+            return x  # Stuck in a wall, only moves that free the rectangle are allowed
+
+        first_row, last_row = self._row_span(y, height)
+        if new_x > x:
+            col = self._col_span(x, width)[1]
+            last_col = self._col_span(new_x, width)[1]
+            while col < last_col:
+                col += 1
+                if self._has_wall(col, col, first_row, last_row):
+                    edge = self.origin_x + col * self.block_size
+                    return max(x, edge - width)
+        else:
+            col = self._col_span(x, width)[0]
+            first_col = self._col_span(new_x, width)[0]
+            while col > first_col:
+                col -= 1
+                if self._has_wall(col, col, first_row, last_row):
+                    return min(x, self.origin_x + (col + 1) * self.block_size)
+        return x
+
+    def resolve_vertical(self, x, y, width, height, new_y):
+        """
+        Moves the rectangle vertically from y towards new_y and returns the furthest
+        position it can reach without entering a wall.
+        """
+        if new_y == y or not self.rect_hits_wall(x, new_y, width, height):
+            return new_y
+        if self.rect_hits_wall(x, y, width, height):
+            return y  # Stuck in a wall, only moves that free the rectangle are allowed
+
+        first_col, last_col = self._col_span(x, width)
+        if new_y > y:
+            row = self._row_span(y, height)[1]
+            last_row = self._row_span(new_y, height)[1]
+            while row < last_row:
+                row += 1
+                if self._has_wall(first_col, last_col, row, row):
+                    edge = self.origin_y + row * self.block_size
+                    return max(y, edge - height)
+        else:
+            row = self._row_span(y, height)[0]
+            first_row = self._row_span(new_y, height)[0]
+            while row > first_row:
+                row -= 1
+                if self._has_wall(first_col, last_col, row, row):
+                    return min(y, self.origin_y + (row + 1) * self.block_size)
+        return y
+
+    def move(self, x, y, width, height, speed, movement):
+        """
+        Applies one tick of movement and returns the new (x, y) position.
+
+        movement is an (up, right, left, down) tuple of flags. When opposite directions
+        are held, down and right win, like in the original keyboard handling.
+        """
+        up, right, left, down = movement
+        left_bound, top_bound, right_bound, bottom_bound = self.bounds
+        new_x = x
+        new_y = y
+
+        if up:
+            new_y = y - speed if y - speed > top_bound else top_bound
+        if down:
+            new_y = min(y + speed, bottom_bound - height)
+        if left:
+            new_x = x - speed if x - speed > left_bound else left_bound
+        if right:
+            new_x = min(x + speed, right_bound - width)
+
+        x = self.resolve_horizontal(x, y, width, height, new_x)
+        y = self.resolve_vertical(x, y, width, height, new_y)
+        return x, y
+
+    def nearest_floor(self, col, row):
+        """
+        Returns the (column, row) of the floor tile fewest steps away from the given tile,
+        or None if the grid has no floor. Of equally close floors, the first in row-major
+        order is returned, so the result does not depend on the order of grid changes.
+        """
+        if self.nearest is None:
+            self._build_nearest_floor()
+        index = self.nearest[row * self.cols + col]
+        return None if index < 0 else (index % self.cols, index // self.cols)
+
+    def _build_nearest_floor(self):
+        """Breadth-first search from all floor tiles at once, O(rows * cols)."""
+        cols, rows = self.cols, self.rows
+        nearest = array("i", [-1]) * (rows * cols)
+        steps = array("i", [0]) * (rows * cols)
+        queue = deque()
+        for row, line in enumerate(self.grid):
+            for col, cell in enumerate(line):
+                if cell != 1:
+                    nearest[row * cols + col] = row * cols + col
+                    queue.append((col, row))
+
+        while queue:
+            col, row = queue.popleft()
+            index = row * cols + col
+            floor = nearest[index]
+            next_steps = steps[index] + 1
+            for dx, dy in NEIGHBOURS:
+                next_col, next_row = col + dx, row + dy
+                if 0 <= next_col < cols and 0 <= next_row < rows:
+                    next_index = next_row * cols + next_col
+                    if nearest[next_index] < 0:
+                        nearest[next_index] = floor
+                        steps[next_index] = next_steps
+                        queue.append((next_col, next_row))
+                    elif steps[next_index] == next_steps and floor < nearest[next_index]:
+                        # Still queued, as the whole previous layer goes first
+                        nearest[next_index] = floor
+
+        self.nearest = nearest
+        self.nearest_steps = steps
+
+    def _spread_nearest_floor(self, heap):
+        """
+        Hands the floors of the queued (steps, floor, col, row) entries on to the tiles
+        around them wherever they are closer, or as close and first in row-major order.
+        """
+        cols, rows = self.cols, self.rows
+        nearest = self.nearest
+        steps = self.nearest_steps
+        while heap:
+            tile_steps, floor, col, row = heapq.heappop(heap)
+            index = row * cols + col
+            if (steps[index], nearest[index]) != (tile_steps, floor):
+                continue  # Superseded by a closer floor
+            for dx, dy in NEIGHBOURS:
+                next_col, next_row = col + dx, row + dy
+                if 0 <= next_col < cols and 0 <= next_row < rows:
+                    next_index = next_row * cols + next_col
+                    if nearest[next_index] < 0 or (tile_steps + 1, floor) < (
+                        steps[next_index],
+                        nearest[next_index],
+                    ):
+                        nearest[next_index] = floor
+                        steps[next_index] = tile_steps + 1
+                        heapq.heappush(heap, (tile_steps + 1, floor, next_col, next_row))
+
+    def _open_nearest_floor(self, col, row):
+        """Updates the nearest floors after the tile became a floor."""
+        index = row * self.cols + col
+        self.nearest[index] = index
+        self.nearest_steps[index] = 0
+        self._spread_nearest_floor([(0, index, col, row)])
+
+    def _close_nearest_floor(self, col, row):
+        """Updates the nearest floors after the tile became a wall."""
+        cols, rows = self.cols, self.rows
+        nearest = self.nearest
+        steps = self.nearest_steps
+        closed = row * cols + col
+
+        # The tiles that were closest to the closed floor surround it
+        affected = {(col, row)}
+        queue = deque(affected)
+        while queue:
+            tile_col, tile_row = queue.popleft()
+            for dx, dy in NEIGHBOURS:
+                next_tile = (tile_col + dx, tile_row + dy)
+                if (
+                    next_tile not in affected
+                    and 0 <= next_tile[0] < cols
+                    and 0 <= next_tile[1] < rows
+                    and nearest[next_tile[1] * cols + next_tile[0]] == closed
+                ):
+                    affected.add(next_tile)
+                    queue.append(next_tile)
+        for tile_col, tile_row in affected:
+            nearest[tile_row * cols + tile_col] = -1
+
+        # The nearest floors of the tiles around them are still correct, so they seed the
+        # search
+        heap = []
+        for tile_col, tile_row in affected:
+            for dx, dy in NEIGHBOURS:
+                next_col, next_row = tile_col + dx, tile_row + dy
+                if 0 <= next_col < cols and 0 <= next_row < rows:
+                    index = next_row * cols + next_col
+                    if nearest[index] >= 0:
+                        entry = (steps[index], nearest[index], next_col, next_row)
+                        heapq.heappush(heap, entry)
+        self._spread_nearest_floor(heap)
+
+    def _clamp_to_tile(self, x, y, width, height, col, row):
+        """
+        Returns the position nearest to (x, y) at which the rectangle does not overlap a
+        wall, out of clamping it into the given floor tile along one axis or both.
+        """
+        left = self.origin_x + col * self.block_size
+        top = self.origin_y + row * self.block_size
+        clamped_x = min(max(x, left), left + self.block_size - width)
+        clamped_y = min(max(y, top), top + self.block_size - height)
+
+        # Clamping only one axis moves the rectangle less, if that already frees it
+        if abs(clamped_x - x) <= abs(clamped_y - y):
+            partial = ((clamped_x, y), (x, clamped_y))
+        else:
+            partial = ((x, clamped_y), (clamped_x, y))
+        for position in partial:
+            if position != (x, y) and not self.rect_hits_wall(*position, width, height):
+                return position
+        return clamped_x, clamped_y
+
+    def push_out_of_wall(self, x, y, width, height):
+        """
+        Returns a position near (x, y) at which the rectangle does not overlap a wall, found
+        by clamping it into the floor tile nearest to its center, or None if the rectangle
+        is larger than a tile or the grid has no floor. Costs a lookup in the nearest floor
+        transform and a clamp.
+        """
+        if width > self.block_size or height > self.block_size:
+            return None
+
+        col, row = self.tile_at(x + width / 2, y + height / 2)
+        col = min(max(col, 0), self.cols - 1)
+        row = min(max(row, 0), self.rows - 1)
+        floor = self.nearest_floor(col, row)
+        if floor is None:
+            return None
+        return self._clamp_to_tile(x, y, width, height, *floor)
@@ -0,0 +1,213 @@
+"""
+This module contains rules of a match that depend only on plain positions, so that the game,
+Simulation and BatchSimulation all follow the same ones. Positions are pixels in the caller's
+frame: the game's are on the screen, the simulation's relative to the maze.
+"""
+
+import math
+
+from .fields import UNREACHABLE
+
+# Durations of the events in milliseconds
+EVENT_DURATIONS = {
+    "shortcut_reveal": 5000,
+    "teleportation": 0,
+    "fatigue": 5000,
+    "invisible_walls": 5000,
+}
+
+
+def win_zone(middle, block_size, player_size):
+    """
+    Returns the (low, high) bounds of the positions of a player inside the win zone along
+    one axis, the three blocks around the middle of the map.
+    """
+    return (
+        middle - block_size * 1.5 - player_size // 2,
+        middle + block_size * 1.5 - player_size // 2,
+    )
+
+
+def find_winner(positions, horizontal_zone, vertical_zone=None):
+    """
+    Returns the index of the first player whose position lies inside the win zone, or None.
+    The zone only has vertical bounds on maps with four quadrants. Players come from outside
+    the zone, so crossing into it is enough.
+    """
+    left, right = horizontal_zone
+    for index, (x, y) in enumerate(positions):
+        if not left < x < right:
+            continue
+        if vertical_zone and not vertical_zone[0] < y < vertical_zone[1]:
+            continue
+        return index
+    return None
+
+
+def find_opponent(player, tiles, field):
+    """
+    Returns the index of the opponent a power-up picked up by the player at the given index
+    works against: the one closest to the win zone, going through the maze. tiles holds the
+    (column, row) of the center of every player and field is the DistanceField to the win
+    zone.
+    """
+    opponents = [index for index in range(len(tiles)) if index != player]
+    if len(opponents) == 1:
+        return opponents[0]
+
+    def remaining_steps(opponent):
+        distance = field.distance(*tiles[opponent])
+        return math.inf if distance == UNREACHABLE else distance
+
+    return min(opponents, key=remaining_steps)
+
+
+def is_on_own_side(corner, x, y, middle, margin=0, quadrant_map=False):
+    """
+    Checks if a point lies on the side of the map of a player starting in the given corner,
+    at least margin away from the middle: in its half, or in its quadrant on maps with four
+    quadrants.
+    """
+    right, bottom = corner
+    mid_x, mid_y = middle
+    if x < mid_x + margin if right else x > mid_x - margin:
+        return False
+    if not quadrant_map:
+        return True
+    return y >= mid_y + margin if bottom else y <= mid_y - margin
+
+
+def power_up_count(maze_width, maze_height):
+    """Returns the number of power-ups of a map, shared between its start positions."""
+    return max(1, (maze_width * maze_height) // 25)
+
+
+def power_up_positions(grid, block_size, origin, start_positions, count, rng):
+    """
+    Draws the positions of the power-ups of a map: count // 2 floor tiles, away from the
+    center, closest to every start position. Players sharing a start position share its
+    power-ups.
+    """
+    origin_x, origin_y = origin
+    start_positions = list(dict.fromkeys(start_positions))
+    groups = [[] for _ in start_positions]
+    center_x = len(grid[0]) // 2
+    center_y = len(grid) // 2
+
+    for y, row in enumerate(grid):
+        for x, cell in enumerate(row):
+            if (center_x - 2 <= x <= center_x + 2) and (
+                center_y - 2 <= y <= center_y + 2
+            ):
+                continue
+            if cell != 0:
+                continue
+            pos = (origin_x + x * block_size, origin_y + y * block_size)
+            if pos in start_positions:
+                continue
+            # The closest start position, on a tie the later one
+            closest = 0
+            closest_distance = None
+            for index, (start_x, start_y) in enumerate(start_positions):
+                distance = abs(pos[0] - start_x) + abs(pos[1] - start_y)
+                if closest_distance is None or distance <= closest_distance:
+                    closest, closest_distance = index, distance
+            groups[closest].append(pos)
+
+    selected_positions = []
+    for positions in groups:
+        group_count = min(count // 2, len(positions))
+        if group_count > 0:
+            selected_positions += rng.sample(positions, group_count)
+    return selected_positions
+
+
+def teleport_floors(floors, corner, size, middle, block_size, quadrant_map, hits_wall):
+    """
+    Returns the floors a Teleport power-up can move a player of the given start corner and
+    (width, height) to: those on its side of the map, two blocks away from the middle, where
+    hits_wall(x, y, width, height) finds no wall.
+    """
+    margin = block_size * 2
+    return [
+        (x, y)
+        for x, y in floors
+        if is_on_own_side(corner, x, y, middle, margin, quadrant_map)
+        and not hits_wall(x, y, *size)
+    ]
+
+
+def teleportation_floors(floors, middle, block_size, horizontal_zone, quadrant_map):
+    """
+    Returns the floors a teleportation event can move the players to: those on the left of
+    the map, in its top left quadrant on maps with four quadrants, three blocks away from
+    the middle and outside the win zone.
+    """
+    mid_x, mid_y = middle
+    margin = block_size * 3
+    left, right = horizontal_zone
+    available_floors = []
+    for x, y in floors:
+        center_x = x + block_size // 2
+        center_y = y + block_size // 2
+        if (
+            not left <= center_x <= right
+            and center_x < mid_x - margin
+            and (not quadrant_map or center_y < mid_y - margin)
+        ):
+            available_floors.append((x, y))
+    return available_floors
+
+
+def mirror_floor(floor, corner, player_size, middle, block_size, quadrant_map):
+    """
+    Returns where a teleportation event to the given floor puts a player of the given start
+    corner: the floor mirrored around the middle into the player's own part of the map,
+    with the player centered on it.
+    """
+    right, bottom = corner
+    mid_x, mid_y = middle
+    x, y = floor
+    if right:
+        x = 2 * mid_x - x - block_size
+    if bottom and quadrant_map:
+        y = 2 * mid_y - y - block_size
+    offset = (block_size - player_size) // 2
+    return x + offset, y + offset
+
+
+def shortcut_cells(grid, tiles):
+    """
+    Returns the walls a shortcut reveal opens around the players at the given tiles: the
+    tile itself and its four neighbours, except on the outer walls of the map.
+    """
+    rows = len(grid)
+    cols = len(grid[0])
+    cells = []
+    for grid_x, grid_y in tiles:
+        for col, row in (
+            (grid_x, grid_y),
+            (grid_x, grid_y - 1),
+            (grid_x, grid_y + 1),
+            (grid_x - 1, grid_y),
+            (grid_x + 1, grid_y),
+        ):
+            if (
+                0 < col < cols - 1
+                and 0 < row < rows - 1
+                and grid[row][col] == 1
+                and (col, row) not in cells
+            ):
+                cells.append((col, row))
+    return cells
+
+
+def event_interval(game_time, min_interval, max_interval, rng):
+    """
+    Draws the time in milliseconds until the next event. Events become more frequent over
+    the first minute of the match.
+    """
+    progression_factor = min(1.0, game_time / 60000)
+    min_interval = int(min_interval * (1 - progression_factor * 0.3))
+    max_interval = int(max_interval * (1 - progression_factor * 0.3))
+    return rng.randint(min_interval, max_interval)
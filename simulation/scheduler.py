@@ -0,0 +1,113 @@
+"""
+This module contains the TickScheduler class, a priority queue of callbacks that run once the
+simulation reaches a given tick.
+"""
+
+import heapq
+
+
+class ScheduledCall:
+    """
+    A callback waiting in a TickScheduler. Returned by TickScheduler.schedule as a handle
+    for cancelling it.
+    """
+
+    __slots__ = ("tick", "order", "callback", "args", "cancelled")
+
+    def __init__(self, tick, order, callback, args):
+        self.tick = tick
+        self.order = order  # Calls due on the same tick run in the order they were scheduled
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def __lt__(self, other):
+        return (self.tick, self.order) < (other.tick, other.order)
+
+
+class TickScheduler:
+    """
+    Runs callbacks when the simulation reaches their tick.
+
+    Scheduling is O(log n). Cancelling only marks the call, and cancelled calls are dropped
+    when they reach the top of the heap, so cancelling is O(1) and the heap never has to be
+    searched.
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.next_order = 0
+        self.pending = 0  # Scheduled calls that were neither run nor cancelled
+
+    def __len__(self):
+        return self.pending
+
+    def schedule(self, tick, callback, *args):
+        """
+        Calls callback(*args) once run_until reaches the given tick. Returns a handle that
+        can be passed to cancel.
+        """
+        call = ScheduledCall(tick, self.next_order, callback, args)
+        self.next_order += 1
+        heapq.heappush(self.heap, call)
+        self.pending += 1
+        return call
+
+    def cancel(self, call):
+        """Cancels a scheduled call. Calls that already ran or were cancelled are ignored."""
+        if call.cancelled or call.callback is None:
+            return
+        call.cancelled = True
+        self.pending -= 1
+        # Compact the heap once most of it is cancelled calls
+        if len(self.heap) > 64 and self.pending < len(self.heap) // 4:
+            self.heap = [call for call in self.heap if not call.cancelled]
+            heapq.heapify(self.heap)
+
+    def next_tick(self):
+        """Returns the tick of the earliest pending call, or None if there is none."""
+        self._drop_cancelled()
+        return self.heap[0].tick if self.heap else None
+
+    def run_until(self, tick):
+        """Runs every pending call due at or before the given tick, earliest first."""
+        # Callbacks may schedule or cancel calls, so the heap is looked up every time
+        while self.heap and self.heap[0].tick <= tick:
+            call = heapq.heappop(self.heap)
+            if call.cancelled:
+                continue
+            self.pending -= 1
+            callback, args = call.callback, call.args
+            call.callback = None  # Marks the call as done, cancelling it is a no-op now
+            callback(*args)
+
+    def clear(self):
+        """Drops all pending calls without running them."""
+        for call in self.heap:
+            call.cancelled = True
+        self.heap.clear()
+        self.pending = 0
+
+    def save_state(self):
+        """Returns the pending calls as an immutable value for load_state."""
+        calls = tuple(
+            (call.tick, call.order, call.callback, call.args)
+            for call in self.heap
+            if not call.cancelled
+        )
+        return calls, self.next_order
+
+    def load_state(self, state):
+        """
+        Replaces the pending calls with the ones saved by save_state. Handles returned
+        before are no longer valid.
+        """
+        calls, self.next_order = state
+        self.clear()
+        self.heap = [ScheduledCall(*call) for call in calls]
+        heapq.heapify(self.heap)
+        self.pending = len(self.heap)
+
+    def _drop_cancelled(self):
+        while self.heap and self.heap[0].cancelled:
+            heapq.heappop(self.heap)
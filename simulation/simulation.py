@@ -0,0 +1,619 @@
+"""
+This module contains the Simulation class, a deterministic model of a single LabyRun match.
+It does not touch the display, the SDL event queue or wall-clock time: randomness comes from a
+seeded random.Random and time is counted in simulation ticks.
+"""
+
+import random
+from dataclasses import dataclass
+
+from .fields import DistanceField, win_columns, win_rows
+from .generation import generate_maze, mirror_maze, mirror_maze_quadrants
+from .inputs import decode_input
+from .physics import GridCollider
+from .rules import (EVENT_DURATIONS, event_interval, find_opponent, find_winner,
+                    mirror_floor, power_up_count, power_up_positions, shortcut_cells,
+                    teleport_floors, teleportation_floors, win_zone)
+
+POWER_UP_TYPES = (
+    "speed_boost",
+    "slow_down",
+    "enlarge",
+    "teleport",
+    "freeze",
+    "reverse_controls",
+)
+EVENT_TYPES = ("shortcut_reveal", "teleportation", "fatigue", "invisible_walls")
+
+MAX_PLAYERS = 8
+
+# Start corners of the players as (right, bottom), later players share the first four
+START_CORNERS = [(False, True), (True, True), (False, False), (True, False)]
+
+
+@dataclass
+class SimConfig:
+    """Rules and dimensions of a simulated match."""
+
+    maze_width: int = 31
+    maze_height: int = 31
+    player_count: int = 2  # More than two race on a map of four quadrants
+    block_size: int = 16
+    tick_rate: int = 60
+    max_ticks: int = 0  # 0 means the match only ends when someone wins
+    power_ups_enabled: bool = True
+    power_up_types: tuple = (
+        "speed_boost",
+        "slow_down",
+        "enlarge",
+        "freeze",
+        "reverse_controls",
+    )
+    power_up_duration: int = 5000  # ms
+    events_enabled: bool = False
+    event_types: tuple = EVENT_TYPES
+    event_min_interval: int = 3000  # ms
+    event_max_interval: int = 8000  # ms
+
+    @classmethod
+    def from_settings(cls, settings, **overrides):
+        """Builds a config matching the game's current Settings."""
+        config = cls(
+            maze_width=settings.maze_width,
+            maze_height=settings.maze_height,
+            player_count=settings.player_count,
+            block_size=settings.block_size,
+            tick_rate=settings.tick_rate,
+            power_ups_enabled=settings.power_ups_enabled,
+            power_up_types=tuple(
+                name
+                for name in POWER_UP_TYPES
+                if getattr(settings, f"{name}_enabled", False)
+            ),
+            power_up_duration=settings.power_up_duration,
+            events_enabled=settings.events_enabled,
+            event_types=tuple(
+                name
+                for name in EVENT_TYPES
+                if getattr(settings, f"{name.replace('_', '')}_enabled", True)
+            ),
+            event_min_interval=settings.event_min_interval,
+            event_max_interval=settings.event_max_interval,
+        )
+        for name, value in overrides.items():
+            setattr(config, name, value)
+        return config
+
+    @property
+    def quadrant_map(self):
+        """Whether the map has four quadrants, as it does for more than two players."""
+        return self.player_count > 2
+
+    def ticks(self, milliseconds):
+        """Converts a duration in milliseconds to simulation ticks."""
+        return max(1, round(milliseconds * self.tick_rate / 1000))
+
+
+class SimPlayer:
+    """State of a single simulated player."""
+
+    __slots__ = (
+        "number",
+        "corner",
+        "x",
+        "y",
+        "width",
+        "height",
+        "base_speed",
+        "input_mask",
+        "effects",
+    )
+
+    def __init__(self, number, corner, x, y, size, speed):
+        self.number = number
+        self.corner = corner  # Start corner as (right, bottom)
+        self.x = x
+        self.y = y
+        self.width = size
+        self.height = size
+        self.base_speed = speed
+        self.input_mask = 0
+        self.effects = {}  # Effect name -> tick at which it expires
+
+    @property
+    def frozen(self):
+        """Whether the player is frozen."""
+        return "freeze" in self.effects
+
+    @property
+    def reversed_controls(self):
+        """Whether the player's controls are reversed."""
+        return "reverse_controls" in self.effects
+
+    @property
+    def speed(self):
+        """Current speed in pixels per tick, with all active effects applied."""
+        if self.frozen:
+            return 0
+        speed = self.base_speed
+        if "speed_boost" in self.effects:
+            speed *= 1.5
+        if "slow_down" in self.effects:
+            speed *= 0.5
+        if "fatigue" in self.effects:
+            speed = int(speed * 0.5)
+        return speed
+
+
+class SimPowerUp:
+    """A power-up lying in the maze."""
+
+    __slots__ = ("x", "y", "size", "kind", "active")
+
+    def __init__(self, x, y, size, kind):
+        self.x = x
+        self.y = y
+        self.size = size
+        self.kind = kind
+        self.active = True
+
+
+class SimEvent:
+    """A random event that is currently active."""
+
+    __slots__ = ("kind", "start_tick", "end_tick", "cells")
+
+    def __init__(self, kind, start_tick, end_tick):
+        self.kind = kind
+        self.start_tick = start_tick
+        self.end_tick = end_tick
+        self.cells = []  # Grid cells opened by a shortcut reveal
+
+
+class Simulation:
+    """
+    Deterministic model of a LabyRun match with an explicit tick clock.
+
+    Coordinates are pixels relative to the maze's top-left corner. The same seed and the
+    same sequence of inputs always produce the same match.
+    """
+
+    def __init__(self, config=None):
+        self.config = config or SimConfig()
+        self.rng = random.Random()
+        self.seed = None
+        self.tick = 0
+        self.grid = []
+        self.grid_version = 0
+        self.collider = None
+        self._distance_field = None
+        self.players = []
+        self.power_ups = []
+        self.active_events = []
+        self.next_event_tick = 0
+        self.winner = None
+        self.win_zone = (0, 0)
+        self.vertical_win_zone = None  # Rows of the win zone on maps with four quadrants
+
+    @property
+    def done(self):
+        """Whether the match has ended, by a win or by reaching max_ticks."""
+        max_ticks = self.config.max_ticks
+        return self.winner is not None or (max_ticks > 0 and self.tick >= max_ticks)
+
+    def reset(self, seed=None, grid=None):
+        """
+        Starts a new match and returns its snapshot.
+        A pre-generated map grid can be passed to skip maze generation.
+        """
+        config = self.config
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.tick = 0
+        self.winner = None
+        self.active_events = []
+        # The game schedules the first event when the match starts, before the maze
+        self._schedule_next_event()
+
+        if grid is None:
+            maze = generate_maze(config.maze_width, config.maze_height, self.rng)
+            grid = mirror_maze_quadrants(maze) if config.quadrant_map else mirror_maze(maze)
+        self.grid = [list(row) for row in grid]
+        self.grid_version = 0
+
+        block = config.block_size
+        self.collider = GridCollider(self.grid, block)
+        self._distance_field = None
+
+        size = block // 2
+        speed = block // 8
+        self.players = []
+        for index in range(config.player_count):
+            corner = START_CORNERS[index % len(START_CORNERS)]
+            x, y = self._start_position(corner, size)
+            self.players.append(SimPlayer(index + 1, corner, x, y, size, speed))
+
+        mid_x, mid_y = self.middle()
+        self.win_zone = win_zone(mid_x, block, size)
+        self.vertical_win_zone = None
+        if config.quadrant_map:
+            self.vertical_win_zone = win_zone(mid_y, block, size)
+
+        self.power_ups = []
+        if config.power_ups_enabled and config.power_up_types:
+            self._generate_power_ups()
+        return self.snapshot()
+
+    def middle(self):
+        """
+        Returns the middle of the map in pixels. The game centers the map on a screen of
+        even size, so on maps of odd size the middle is the pixel right of and below it.
+        """
+        width = len(self.grid[0]) * self.config.block_size
+        height = len(self.grid) * self.config.block_size
+        return width - width // 2, height - height // 2
+
+    def _start_position(self, corner, size):
+        """
+        Returns the start position in the given corner of the map, touching the walls of
+        the corner 1.5 blocks from the map's edges, like Settings places the players.
+        """
+        right, bottom = corner
+        block = self.config.block_size
+        if right:
+            x = len(self.grid[0]) * block - 2 * block + size // 2
+        else:
+            x = 1.5 * block - size // 2
+        if bottom:
+            y = len(self.grid) * block - 2 * block + size // 2
+        else:
+            y = 1.5 * block - size // 2
+        return x, y
+
+    def step(self, *inputs):
+        """
+        Advances the match by one tick with one input mask per player.
+        Returns True once the match is over.
+        """
+        if self.done:
+            return True
+
+        self.tick += 1
+        # Like the game's controllers, inputs are read before this tick's effects expire
+        movements = []
+        for player, input_mask in zip(self.players, inputs):
+            player.input_mask = input_mask
+            movements.append(decode_input(input_mask, player.reversed_controls))
+        self._expire_effects()
+
+        for player, movement in zip(self.players, movements):
+            self._move(player, movement)
+
+        for player in self.players:
+            self._check_power_ups(player)
+
+        self._check_win()
+        self._update_events()
+        return self.done
+
+    def snapshot(self):
+        """
+        Returns a plain-data snapshot of the match state.
+        """
+        return {
+            "tick": self.tick,
+            "seed": self.seed,
+            "winner": self.winner,
+            "grid_version": self.grid_version,
+            "players": [
+                {
+                    "number": player.number,
+                    "x": player.x,
+                    "y": player.y,
+                    "width": player.width,
+                    "height": player.height,
+                    "speed": player.speed,
+                    "frozen": player.frozen,
+                    "reversed_controls": player.reversed_controls,
+                    "effects": {
+                        name: expiry - self.tick
+                        for name, expiry in player.effects.items()
+                    },
+                }
+                for player in self.players
+            ],
+            "power_ups": [
+                (power_up.x, power_up.y, power_up.kind, power_up.active)
+                for power_up in self.power_ups
+            ],
+            "events": [
+                (event.kind, max(0, event.end_tick - self.tick))
+                for event in self.active_events
+            ],
+        }
+
+    def set_cell(self, col, row, value):
+        """Changes a grid cell and bumps the grid version."""
+        self.collider.set_cell(col, row, value)
+        self.grid_version += 1
+        if self._distance_field is not None:
+            if value == 1:
+                self._distance_field.close_cell(col, row)
+            else:
+                self._distance_field.open_cell(col, row)
+
+    @property
+    def distance_field(self):
+        """Steps from every tile to the win zone, built on first use."""
+        if self._distance_field is None:
+            rows = win_rows(len(self.grid)) if self.config.quadrant_map else None
+            self._distance_field = DistanceField(
+                self.grid, win_columns(len(self.grid[0])), rows
+            )
+        return self._distance_field
+
+    def _move(self, player, movement):
+        if player.frozen:
+            return
+        player.x, player.y = self.collider.move(
+            player.x, player.y, player.width, player.height, player.speed, movement
+        )
+
+    def _push_out_of_wall(self, player):
+        # The game tests the player's pygame.Rect, which rounds halves up
+        left = int(player.x + 0.5)
+        top = int(player.y + 0.5)
+        if self.collider.rect_hits_wall(left, top, player.width, player.height):
+            position = self.collider.push_out_of_wall(
+                player.x, player.y, player.width, player.height
+            )
+            if position is not None:
+                player.x, player.y = position
+
+    def power_up_tiles(self):
+        """Returns (column, row, kind) of every power-up that can still be picked up."""
+        return [
+            (
+                *self.collider.tile_at(
+                    power_up.x + power_up.size / 2, power_up.y + power_up.size / 2
+                ),
+                power_up.kind,
+            )
+            for power_up in self.power_ups
+            if power_up.active
+        ]
+
+    def _opponent(self, player):
+        """Returns the opponent a power-up picked up by the player works against."""
+        tiles = [
+            self.collider.tile_at(other.x + other.width / 2, other.y + other.height / 2)
+            for other in self.players
+        ]
+        index = find_opponent(self.players.index(player), tiles, self.distance_field)
+        return self.players[index]
+
+    def _check_win(self):
+        """The first player inside the win zone wins."""
+        positions = [(player.x, player.y) for player in self.players]
+        index = find_winner(positions, self.win_zone, self.vertical_win_zone)
+        if index is not None:
+            self.winner = self.players[index].number
+
+    # Power-ups
+
+    def _generate_power_ups(self):
+        """Places power-ups like Maze.generate_power_ups."""
+        config = self.config
+        block = config.block_size
+        selected_positions = power_up_positions(
+            self.grid,
+            block,
+            (0, 0),
+            [(player.x, player.y) for player in self.players],
+            power_up_count(config.maze_width, config.maze_height),
+            self.rng,
+        )
+
+        size = int(block * 0.6)
+        for pos_x, pos_y in selected_positions:
+            kind = self.rng.choice(config.power_up_types)
+            self.power_ups.append(
+                SimPowerUp(
+                    pos_x + (block - size) // 2, pos_y + (block - size) // 2, size, kind
+                )
+            )
+
+    def _check_power_ups(self, player):
+        # The game tests the player's pygame.Rect, which rounds halves up
+        left = int(player.x + 0.5)
+        top = int(player.y + 0.5)
+        right = left + player.width
+        bottom = top + player.height
+        for power_up in self.power_ups:
+            if (
+                power_up.active
+                and left < power_up.x + power_up.size
+                and power_up.x < right
+                and top < power_up.y + power_up.size
+                and power_up.y < bottom
+            ):
+                power_up.active = False
+                self._apply_power_up(power_up.kind, player)
+
+    def _apply_power_up(self, kind, player):
+        # An effect already on the player is refreshed, like in PowerUpManager
+        expiry = self.tick + self.config.ticks(self.config.power_up_duration)
+        if kind == "speed_boost":
+            player.effects["speed_boost"] = expiry
+        elif kind == "teleport":
+            self.teleport(player)
+        elif kind == "enlarge":
+            opponent = self._opponent(player)
+            if "enlarge" not in opponent.effects:
+                self._resize(opponent, int(self.config.block_size * 0.99))
+                self._push_out_of_wall(opponent)
+            opponent.effects["enlarge"] = expiry
+        else:  # slow_down, freeze and reverse_controls affect the opponent
+            self._opponent(player).effects[kind] = expiry
+
+    def _expire_effects(self):
+        for player in self.players:
+            expired = [
+                name for name, expiry in player.effects.items() if expiry <= self.tick
+            ]
+            for name in expired:
+                del player.effects[name]
+                if name == "enlarge":
+                    self._resize(player, self.config.block_size // 2)
+
+    @staticmethod
+    def _resize(player, size):
+        """Changes the player's size, keeping its center in place."""
+        center_x = player.x + player.width / 2
+        center_y = player.y + player.height / 2
+        player.width = size
+        player.height = size
+        player.x = int(center_x - size / 2)
+        player.y = int(center_y - size / 2)
+
+    def teleport(self, player):
+        """
+        Moves the player to a random floor tile on its side of the map, away from the
+        win zone.
+        """
+        position = self.teleport_target(player.corner, player.width, player.height)
+        if position is not None:
+            player.x, player.y = position
+
+    def teleport_target(self, corner, width, height):
+        """
+        Draws the position a player of the given start corner and size is teleported to,
+        or returns None if no floor tile is free.
+        """
+        available_floors = teleport_floors(
+            self.floors(),
+            corner,
+            (width, height),
+            self.middle(),
+            self.config.block_size,
+            self.config.quadrant_map,
+            self.collider.rect_hits_wall,
+        )
+        if available_floors:
+            return self.rng.choice(available_floors)
+        return None
+
+    def floors(self):
+        """
+        Returns the positions of the floor tiles in the order the game lists them, the
+        floors of revealed shortcuts last, in the order they opened.
+        """
+        block = self.config.block_size
+        revealed = [
+            cell
+            for event in self.active_events
+            if event.kind == "shortcut_reveal"
+            for cell in event.cells
+        ]
+        skipped = set(revealed)
+        floors = [
+            (x, y)
+            for y, row in enumerate(self.grid)
+            for x, cell in enumerate(row)
+            if cell == 0 and (x, y) not in skipped
+        ]
+        return [(x * block, y * block) for x, y in floors + revealed]
+
+    # Events
+
+    def _schedule_next_event(self):
+        config = self.config
+        if not config.events_enabled:
+            return
+
+        game_time = self.time_ms
+        interval = event_interval(
+            game_time, config.event_min_interval, config.event_max_interval, self.rng
+        )
+        self.next_event_tick = self._first_tick_at(game_time + interval)
+
+    @property
+    def time_ms(self):
+        """Time of the match in whole milliseconds, the clock the game's events run on."""
+        return self.tick * 1000 // self.config.tick_rate
+
+    def _first_tick_at(self, milliseconds):
+        """Returns the first tick at which time_ms reaches the given time."""
+        return -(-milliseconds * self.config.tick_rate // 1000)
+
+    def _update_events(self):
+        if not self.config.events_enabled:
+            return
+
+        if self.tick >= self.next_event_tick:
+            if self.config.event_types and not self.active_events:
+                self._trigger_event(self.rng.choice(self.config.event_types))
+            self._schedule_next_event()
+
+        for event in self.active_events[:]:
+            if self.tick >= event.end_tick:
+                self._end_event(event)
+                self.active_events.remove(event)
+
+    def _trigger_event(self, kind):
+        duration = EVENT_DURATIONS[kind]
+        end_tick = self._first_tick_at(self.time_ms + duration)
+        event = SimEvent(kind, self.tick, end_tick)
+
+        if kind == "shortcut_reveal":
+            self._reveal_shortcuts(event)
+        elif kind == "teleportation":
+            self._teleport_players()
+        elif kind == "fatigue":
+            for player in self.players:
+                # Lifted by _end_event after the players moved on end_tick
+                player.effects["fatigue"] = end_tick + 1
+        # Invisible walls only change how the maze looks
+
+        self.active_events.append(event)
+
+    def _end_event(self, event):
+        if event.kind == "fatigue":
+            for player in self.players:
+                player.effects.pop("fatigue", None)
+        elif event.kind == "shortcut_reveal":
+            for col, row in event.cells:
+                self.set_cell(col, row, 1)
+            for player in self.players:
+                self._push_out_of_wall(player)
+
+    def _reveal_shortcuts(self, event):
+        block = self.config.block_size
+        tiles = [
+            (
+                int(player.x + player.width // 2) // block,
+                int(player.y + player.height // 2) // block,
+            )
+            for player in self.players
+        ]
+        for col, row in shortcut_cells(self.grid, tiles):
+            self.set_cell(col, row, 0)
+            event.cells.append((col, row))
+
+    def _teleport_players(self):
+        """
+        Teleports the players to a random floor on the left of the map, in its top left
+        quadrant on maps with four quadrants, mirrored into every player's own part.
+        """
+        block = self.config.block_size
+        quadrant_map = self.config.quadrant_map
+        middle = self.middle()
+        available_floors = teleportation_floors(
+            self.floors(), middle, block, self.win_zone, quadrant_map
+        )
+        if available_floors:
+            floor = self.rng.choice(available_floors)
+            for player in self.players:
+                player.x, player.y = mirror_floor(
+                    floor, player.corner, player.width, middle, block, quadrant_map
+                )
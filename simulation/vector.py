@@ -0,0 +1,334 @@
+"""
+This module contains the BatchSimulation class, which advances many independent matches in
+lockstep using NumPy arrays. It requires NumPy, which the rest of the game does not.
+"""
+
+import numpy as np
+
+from .inputs import INPUT_DOWN, INPUT_LEFT, INPUT_RIGHT, INPUT_UP
+from .physics import GridCollider
+from .rules import find_opponent, power_up_count
+from .simulation import START_CORNERS, Simulation
+
+# Effects tracked per player, in the order of the last axis of BatchSimulation.effects
+EFFECTS = ("speed_boost", "slow_down", "enlarge", "freeze", "reverse_controls")
+SPEED_BOOST, SLOW_DOWN, ENLARGE, FREEZE, REVERSE_CONTROLS = range(len(EFFECTS))
+
+POWER_UP_KINDS = (
+    "speed_boost",
+    "slow_down",
+    "enlarge",
+    "teleport",
+    "freeze",
+    "reverse_controls",
+)
+
+
+class BatchSimulation:
+    """
+    Runs num_envs matches with the rules of Simulation, vectorized over matches.
+
+    Every match is seeded and laid out by Simulation.reset, so a batch match and a
+    Simulation reset with the same seed start identical and, given the same inputs,
+    stay identical. Random events are not supported.
+    """
+
+    def __init__(self, num_envs, config):
+        if config.events_enabled:
+            raise ValueError("Random events are not supported by BatchSimulation.")
+
+        self.num_envs = num_envs
+        self.config = config
+        self.block_size = config.block_size
+        self.duration = config.ticks(config.power_up_duration)
+
+        players = config.player_count
+        rows = config.maze_height * 2 + 3 if config.quadrant_map else config.maze_height
+        cols = config.maze_width * 2 + 3
+        num_power_ups = power_up_count(config.maze_width, config.maze_height)
+        # One group of power-ups per start corner
+        max_power_ups = num_power_ups // 2 * min(players, len(START_CORNERS))
+
+        self.sims = [Simulation(config) for _ in range(num_envs)]
+        self.grids = np.ones((num_envs, rows, cols), dtype=np.uint8)  # 1 marks a wall
+        # Collider of every match, on a view of its grid, replaced when the match resets
+        self.colliders = [GridCollider(grid, self.block_size) for grid in self.grids]
+        self.x = np.zeros((num_envs, players))
+        self.y = np.zeros((num_envs, players))
+        self.size = np.zeros((num_envs, players), dtype=np.int64)
+        self.effects = np.zeros((num_envs, players, len(EFFECTS)), dtype=np.int64)
+        self.tick = np.zeros(num_envs, dtype=np.int64)
+        self.winner = np.zeros(num_envs, dtype=np.int8)  # 0 while nobody has won
+
+        self.power_up_size = int(config.block_size * 0.6)
+        self.power_up_x = np.zeros((num_envs, max_power_ups))
+        self.power_up_y = np.zeros((num_envs, max_power_ups))
+        self.power_up_kind = np.zeros((num_envs, max_power_ups), dtype=np.int8)
+        self.power_up_active = np.zeros((num_envs, max_power_ups), dtype=bool)
+
+        self.base_speed = config.block_size // 8
+        self.base_size = config.block_size // 2
+        self.win_zone = (0, 0)
+        self.vertical_win_zone = None  # Rows of the win zone on maps with four quadrants
+        self._env_index = np.arange(num_envs)[:, None]
+
+    @property
+    def done(self):
+        """Boolean array telling which matches have ended."""
+        done = self.winner != 0
+        if self.config.max_ticks > 0:
+            done |= self.tick >= self.config.max_ticks
+        return done
+
+    def reset(self, seeds, indices=None):
+        """
+        Starts new matches with the given seeds, for all matches or only the given indices.
+        """
+        if indices is None:
+            indices = range(self.num_envs)
+
+        for env, seed in zip(indices, seeds):
+            sim = self.sims[env]
+            sim.reset(seed)
+            self.win_zone = sim.win_zone
+            self.vertical_win_zone = sim.vertical_win_zone
+
+            self.grids[env] = sim.grid
+            self.colliders[env] = GridCollider(self.grids[env], self.block_size)
+            for slot, player in enumerate(sim.players):
+                self.x[env, slot] = player.x
+                self.y[env, slot] = player.y
+                self.size[env, slot] = player.width
+
+            self.power_up_active[env] = False
+            for slot, power_up in enumerate(sim.power_ups):
+                self.power_up_x[env, slot] = power_up.x
+                self.power_up_y[env, slot] = power_up.y
+                self.power_up_kind[env, slot] = POWER_UP_KINDS.index(power_up.kind)
+                self.power_up_active[env, slot] = True
+
+            self.effects[env] = 0
+            self.tick[env] = 0
+            self.winner[env] = 0
+
+    def set_cell(self, env, col, row, value):
+        """
+        Changes a grid cell of a match, keeping its collider and the grid of its
+        Simulation, which teleports and finds opponents on it, up to date.
+        """
+        self.colliders[env].set_cell(col, row, value)
+        self.sims[env].set_cell(col, row, value)
+
+    def step(self, inputs):
+        """
+        Advances every running match by one tick.
+        inputs is an integer array of shape (num_envs, players) with one input mask per
+        player. Returns the boolean array of finished matches.
+        """
+        running = ~self.done
+        self.tick += running
+
+        # Like Simulation.step, inputs are read before this tick's effects expire
+        reverse = self._active(REVERSE_CONTROLS, self.tick - running)
+        self._expire_effects(running)
+        self._move(np.asarray(inputs), reverse, running)
+        self._check_power_ups(running)
+        self._check_win(running)
+        return self.done
+
+    def _check_win(self, running):
+        """The first player inside the win zone wins, like Simulation._check_win."""
+        left_zone, right_zone = self.win_zone
+        inside = (self.x > left_zone) & (self.x < right_zone)
+        if self.vertical_win_zone is not None:
+            top_zone, bottom_zone = self.vertical_win_zone
+            inside &= (self.y > top_zone) & (self.y < bottom_zone)
+        won = running & inside.any(axis=1)
+        self.winner[won] = inside[won].argmax(axis=1) + 1
+
+    def _active(self, effect, tick=None):
+        """
+        Boolean (num_envs, players) array of players affected by the given effect, at
+        the current tick unless another array of ticks is given.
+        """
+        if tick is None:
+            tick = self.tick
+        return self.effects[:, :, effect] > tick[:, None]
+
+    def _expire_effects(self, running):
+        expired = (self.effects > 0) & (self.effects <= self.tick[:, None, None])
+        expired &= running[:, None, None]
+        if not expired.any():
+            return
+
+        for env, slot in zip(*np.nonzero(expired[:, :, ENLARGE])):
+            self._resize(env, slot, self.base_size)
+        self.effects[expired] = 0
+
+    def _speed(self):
+        speed = np.full(self.x.shape, float(self.base_speed))
+        speed[self._active(SPEED_BOOST)] *= 1.5
+        speed[self._active(SLOW_DOWN)] *= 0.5
+        return speed
+
+    def _hits_wall(self, x, y, size):
+        """Boolean array telling which rectangles overlap a wall tile."""
+        block = self.block_size
+        rows, cols = self.grids.shape[1:]
+        left = np.trunc(x).astype(np.int64)
+        top = np.trunc(y).astype(np.int64)
+
+        # Players are smaller than a block, so they cover at most 2x2 tiles
+        col0 = np.clip(left // block, 0, cols - 1)
+        col1 = np.clip((left + size - 1) // block, 0, cols - 1)
+        row0 = np.clip(top // block, 0, rows - 1)
+        row1 = np.clip((top + size - 1) // block, 0, rows - 1)
+
+        env = self._env_index
+        grids = self.grids
+        return (
+            (grids[env, row0, col0] | grids[env, row0, col1])
+            | (grids[env, row1, col0] | grids[env, row1, col1])
+        ).astype(bool)
+
+    def _move(self, inputs, reverse, running):
+        block = self.block_size
+        rows, cols = self.grids.shape[1:]
+        x, y, size = self.x, self.y, self.size
+        speed = self._speed()
+
+        up = np.where(reverse, inputs & INPUT_DOWN, inputs & INPUT_UP) != 0
+        down = np.where(reverse, inputs & INPUT_UP, inputs & INPUT_DOWN) != 0
+        left = np.where(reverse, inputs & INPUT_RIGHT, inputs & INPUT_LEFT) != 0
+        right = np.where(reverse, inputs & INPUT_LEFT, inputs & INPUT_RIGHT) != 0
+
+        can_move = running[:, None] & ~self._active(FREEZE)
+
+        new_y = np.where(up, np.where(y - speed > 0, y - speed, 0), y)
+        new_y = np.where(down, np.minimum(y + speed, rows * block - size), new_y)
+        new_x = np.where(left, np.where(x - speed > 0, x - speed, 0), x)
+        new_x = np.where(right, np.minimum(x + speed, cols * block - size), new_x)
+
+        # Horizontal, then vertical, stopping flush against the first wall in the way
+        stuck = self._hits_wall(x, y, size)
+        blocked = (new_x != x) & self._hits_wall(new_x, y, size)
+        new_left = np.trunc(new_x).astype(np.int64)
+        limit = np.where(
+            new_x > x,
+            np.maximum(x, (new_left + size - 1) // block * block - size),
+            np.minimum(x, (new_left // block + 1) * block),
+        )
+        new_x = np.where(blocked, np.where(stuck, x, limit), new_x)
+        x[:] = np.where(can_move, new_x, x)
+
+        stuck = self._hits_wall(x, y, size)
+        blocked = (new_y != y) & self._hits_wall(x, new_y, size)
+        new_top = np.trunc(new_y).astype(np.int64)
+        limit = np.where(
+            new_y > y,
+            np.maximum(y, (new_top + size - 1) // block * block - size),
+            np.minimum(y, (new_top // block + 1) * block),
+        )
+        new_y = np.where(blocked, np.where(stuck, y, limit), new_y)
+        y[:] = np.where(can_move, new_y, y)
+
+    def _check_power_ups(self, running):
+        if self.power_up_active.shape[1] == 0:
+            return
+
+        # Rounded like the game's pygame.Rect, as in Simulation._check_power_ups
+        left = np.trunc(self.x + 0.5).astype(np.int64)[:, :, None]
+        top = np.trunc(self.y + 0.5).astype(np.int64)[:, :, None]
+        size = self.size[:, :, None]
+        power_up_x = self.power_up_x[:, None, :]
+        power_up_y = self.power_up_y[:, None, :]
+        power_up_size = self.power_up_size
+
+        # Broad overlap test for all matches at once, pickups themselves are rare
+        touching = (
+            self.power_up_active[:, None, :]
+            & running[:, None, None]
+            & (left < power_up_x + power_up_size)
+            & (power_up_x < left + size)
+            & (top < power_up_y + power_up_size)
+            & (power_up_y < top + size)
+        )
+        if not touching.any():
+            return
+
+        # Resolve pickups one by one like Simulation.step, since an effect can move
+        # or resize a player before the next overlap is checked
+        for env in np.nonzero(touching.any(axis=(1, 2)))[0]:
+            for slot in range(self.x.shape[1]):
+                for power_up in range(self.power_up_active.shape[1]):
+                    if self.power_up_active[env, power_up] and self._touches(
+                        env, slot, power_up
+                    ):
+                        self.power_up_active[env, power_up] = False
+                        kind = POWER_UP_KINDS[self.power_up_kind[env, power_up]]
+                        self._apply_power_up(env, slot, kind)
+
+    def _touches(self, env, slot, power_up):
+        """Checks whether a player overlaps a power-up."""
+        left = int(self.x[env, slot] + 0.5)
+        top = int(self.y[env, slot] + 0.5)
+        size = self.size[env, slot]
+        power_up_x = self.power_up_x[env, power_up]
+        power_up_y = self.power_up_y[env, power_up]
+        return (
+            left < power_up_x + self.power_up_size
+            and power_up_x < left + size
+            and top < power_up_y + self.power_up_size
+            and power_up_y < top + size
+        )
+
+    def _apply_power_up(self, env, slot, kind):
+        expiry = self.tick[env] + self.duration
+        if kind == "speed_boost":
+            self.effects[env, slot, SPEED_BOOST] = expiry
+            return
+        if kind == "teleport":
+            self._teleport(env, slot)
+            return
+
+        opponent = self._opponent(env, slot)
+        if kind == "enlarge":
+            if self.effects[env, opponent, ENLARGE] <= self.tick[env]:
+                self._resize(env, opponent, int(self.block_size * 0.99))
+                self._push_out_of_wall(env, opponent)
+            self.effects[env, opponent, ENLARGE] = expiry
+        else:
+            self.effects[env, opponent, EFFECTS.index(kind)] = expiry
+
+    def _resize(self, env, slot, size):
+        center_x = self.x[env, slot] + self.size[env, slot] / 2
+        center_y = self.y[env, slot] + self.size[env, slot] / 2
+        self.size[env, slot] = size
+        self.x[env, slot] = int(center_x - size / 2)
+        self.y[env, slot] = int(center_y - size / 2)
+
+    def _push_out_of_wall(self, env, slot):
+        collider = self.colliders[env]
+        x, y, size = self.x[env, slot], self.y[env, slot], int(self.size[env, slot])
+        # The rectangle is rounded like in Simulation._push_out_of_wall
+        if collider.rect_hits_wall(int(x + 0.5), int(y + 0.5), size, size):
+            position = collider.push_out_of_wall(x, y, size, size)
+            if position is not None:
+                self.x[env, slot], self.y[env, slot] = position
+
+    def _opponent(self, env, slot):
+        """Returns the slot of the opponent a power-up picked up by a slot works against."""
+        half = self.size[env] / 2
+        tiles = [
+            self.colliders[env].tile_at(x, y)
+            for x, y in zip(self.x[env] + half, self.y[env] + half)
+        ]
+        return find_opponent(slot, tiles, self.sims[env].distance_field)
+
+    def _teleport(self, env, slot):
+        """Teleports through Simulation.teleport_target, drawing from the match's own RNG."""
+        size = int(self.size[env, slot])
+        corner = START_CORNERS[slot % len(START_CORNERS)]
+        position = self.sims[env].teleport_target(corner, size, size)
+        if position is not None:
+            self.x[env, slot], self.y[env, slot] = position
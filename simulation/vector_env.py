@@ -0,0 +1,148 @@
+"""
+This module contains SubprocVectorEnv, which runs one LabyRunEnv per worker process and
+shares observations through shared memory, so agents can train across all cores.
+"""
+
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .env import LabyRunEnv
+
+
+def _attach(spec, names, num_envs):
+    """Maps the shared memory blocks to arrays of shape (num_envs, *shape)."""
+    blocks = {name: shared_memory.SharedMemory(name=names[name]) for name in spec}
+    arrays = {
+        name: np.ndarray((num_envs, *shape), dtype=dtype, buffer=blocks[name].buf)
+        for name, (shape, dtype) in spec.items()
+    }
+    return blocks, arrays
+
+
+def _worker(connection, index, num_envs, names, env_kwargs):
+    """Runs one environment, writing observations straight into shared memory."""
+    env = LabyRunEnv(**env_kwargs)
+    blocks, arrays = _attach(env.observation_spec, names, num_envs)
+    out = {name: array[index] for name, array in arrays.items()}
+    seed = None
+
+    try:
+        while True:
+            command, data = connection.recv()
+            if command == "reset":
+                seed = data
+                _, info = env.reset(seed)
+                env.observe(out)
+                connection.send(info)
+            elif command == "step":
+                _, reward, terminated, truncated, info = env.step(data)
+                if terminated or truncated:
+                    # Auto-reset, reporting how the finished match ended
+                    info["final_winner"] = info["winner"]
+                    info["final_tick"] = info["tick"]
+                    seed = None if seed is None else seed + num_envs
+                    env.reset(seed)
+                env.observe(out)
+                connection.send((reward, terminated, truncated, info))
+            elif command == "close":
+                break
+    finally:
+        for block in blocks.values():
+            block.close()
+        connection.close()
+
+
+class SubprocVectorEnv:
+    """
+    Runs num_envs LabyRunEnv instances, each in its own process.
+
+    Observations live in shared memory: reset() and step() return a dict of arrays of
+    shape (num_envs, ...) that the workers overwrite in place on the next call. Finished
+    matches are reset automatically; their result is reported in the info dict under
+    final_winner and final_tick.
+    """
+
+    def __init__(self, num_envs, context=None, **env_kwargs):
+        self.num_envs = num_envs
+        spec = LabyRunEnv(**env_kwargs).observation_spec
+        self.observation_spec = spec
+
+        self._blocks = {
+            name: shared_memory.SharedMemory(
+                create=True,
+                size=max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize * num_envs),
+            )
+            for name, (shape, dtype) in spec.items()
+        }
+        names = {name: block.name for name, block in self._blocks.items()}
+        self.observations = {
+            name: np.ndarray(
+                (num_envs, *shape), dtype=dtype, buffer=self._blocks[name].buf
+            )
+            for name, (shape, dtype) in spec.items()
+        }
+
+        ctx = mp.get_context(context)
+        self._connections = []
+        self._processes = []
+        for index in range(num_envs):
+            parent, child = ctx.Pipe()
+            process = ctx.Process(
+                target=_worker,
+                args=(child, index, num_envs, names, env_kwargs),
+                daemon=True,
+            )
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+        self.closed = False
+
+    def reset(self, seed=None):
+        """
+        Resets every environment; environment i gets seed + i.
+        Returns (observations, infos).
+        """
+        for index, connection in enumerate(self._connections):
+            connection.send(("reset", None if seed is None else seed + index))
+        infos = [connection.recv() for connection in self._connections]
+        return self.observations, infos
+
+    def step(self, actions):
+        """
+        Steps every environment with its action.
+        Returns (observations, rewards, terminated, truncated, infos).
+        """
+        for connection, action in zip(self._connections, actions):
+            connection.send(("step", int(action)))
+        results = [connection.recv() for connection in self._connections]
+
+        rewards, terminated, truncated, infos = zip(*results)
+        return (
+            self.observations,
+            np.array(rewards, dtype=np.float32),
+            np.array(terminated),
+            np.array(truncated),
+            list(infos),
+        )
+
+    def close(self):
+        """Stops the workers and frees the shared memory."""
+        if self.closed:
+            return
+        for connection in self._connections:
+            connection.send(("close", None))
+        for process in self._processes:
+            process.join()
+        for block in self._blocks.values():
+            block.close()
+            block.unlink()
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
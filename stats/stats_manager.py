@@ -5,7 +5,9 @@ This module contains the StatsManager class.
 import json
 import os
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, List, Optional
+
+from util.tracing import tracer
 
 from .player_stats import GameRecord, PlayerStats
 
@@ -40,6 +42,7 @@ class StatsManager:
                 print(f"Error loading stats: {str(e)}")
                 self.players = {}
 
+    @tracer.traced("StatsManager.save_stats")
     def save_stats(self) -> None:
         """Save all player stats to the JSON file."""
         data = {name: stats.to_dict() for name, stats in self.players.items()}
@@ -53,6 +56,11 @@ class StatsManager:
         except IOError as e:
             print(f"Error saving stats: {str(e)}")
 
+    @property
+    def ghost_directory(self) -> str:
+        """Directory next to the stats file holding the fastest run on every maze."""
+        return os.path.splitext(self.stats_file)[0] + "_ghosts"
+
     def get_player_stats(self, player_name: str) -> PlayerStats:
         """Get statistics for a specific player."""
         if player_name not in self.players:
@@ -64,9 +72,13 @@ class StatsManager:
         self.game_start_time = datetime.now().timestamp()
 
     def record_game_result(
-        self, winner_name: str, loser_name: str, maze_width: int, maze_height: int
+        self,
+        winner_name: str,
+        loser_names: List[str],
+        maze_width: int,
+        maze_height: int,
     ) -> None:
-        """Record the result of a completed game."""
+        """Record the result of a completed game, with one record per player."""
         if self.game_start_time is None:
             print("Warning: Game timer was not started")
             game_time = 0.0
@@ -79,28 +91,27 @@ class StatsManager:
         winner_record = GameRecord(
             timestamp=timestamp,
             player_name=winner_name,
-            opponent_name=loser_name,
+            opponent_name=", ".join(loser_names),
             maze_width=maze_width,
             maze_height=maze_height,
             win=True,
             game_time=game_time,
         )
 
-        loser_record = GameRecord(
-            timestamp=timestamp,
-            player_name=loser_name,
-            opponent_name=winner_name,
-            maze_width=maze_width,
-            maze_height=maze_height,
-            win=False,
-            game_time=game_time,
-        )
-
         winner_stats = self.get_player_stats(winner_name)
-        loser_stats = self.get_player_stats(loser_name)
-
         winner_stats.add_game(winner_record)
-        loser_stats.add_game(loser_record)
+
+        for loser_name in loser_names:
+            loser_record = GameRecord(
+                timestamp=timestamp,
+                player_name=loser_name,
+                opponent_name=winner_name,
+                maze_width=maze_width,
+                maze_height=maze_height,
+                win=False,
+                game_time=game_time,
+            )
+            self.get_player_stats(loser_name).add_game(loser_record)
 
         self.save_stats()
 
@@ -0,0 +1,18 @@
+"""
+Fixtures shared by the tests.
+"""
+
+import pytest
+
+
+@pytest.fixture
+def game(tmp_path, monkeypatch):
+    """A headless game whose maps and data are written to a temporary directory."""
+    monkeypatch.chdir(tmp_path)
+    # Imported here, as the game picks SDL's dummy drivers before pygame is initialized
+    import pygame
+
+    from main import LabyRunGame
+
+    yield LabyRunGame(headless=True, seed=1)
+    pygame.quit()
@@ -0,0 +1,19 @@
+"""
+Tests of the controllers driving headless players.
+"""
+
+import pytest
+
+from engine.controllers import ScriptedController
+
+
+def test_scripted_controller_rejects_segments_without_ticks():
+    with pytest.raises(ValueError):
+        ScriptedController([])
+    with pytest.raises(ValueError):
+        ScriptedController([(0, 1), (-3, 2)])
+
+
+def test_scripted_controller_skips_empty_segments_and_loops():
+    controller = ScriptedController([(2, 1), (0, 4), (1, 8)])
+    assert [controller.get_input(None, tick) for tick in range(6)] == [1, 1, 8, 1, 1, 8]
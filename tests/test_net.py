@@ -0,0 +1,125 @@
+"""
+Tests of the match server and its clients.
+"""
+
+import asyncio
+import socket
+import threading
+
+import pytest
+
+from engine.controllers import RandomWalkController
+from engine.replay import apply_settings_snapshot, settings_snapshot
+from net import NetClient, StateDecoder, StateEncoder
+from net.delta import POSITION_SCALE
+from net.server import MatchServer
+from net.server_client import ServerClient
+from simulation import SimConfig
+
+
+@pytest.fixture
+def server_address(request):
+    """
+    Runs a MatchServer on a loop in another thread, returns its address and itself. The
+    number of players per match can be passed as the fixture's parameter.
+    """
+    config = SimConfig(
+        player_count=getattr(request, "param", 2), tick_rate=600, max_ticks=6000
+    )
+    loop = asyncio.new_event_loop()
+    server = MatchServer(config, seat_timeout=0.5, seed=1)
+    listener = loop.run_until_complete(server.serve("127.0.0.1", 0))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield f"127.0.0.1:{listener.sockets[0].getsockname()[1]}", server
+
+    listener.close()
+    asyncio.run_coroutine_threadsafe(server.stop(), loop).result(10)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(10)
+    loop.close()
+
+
+@pytest.mark.parametrize("server_address", [2, 4], indirect=True)
+def test_server_client_plays_a_match(server_address):
+    address, server = server_address
+    client = ServerClient.connect(address, "Ann")
+    try:
+        match_id, tick, winner = client.play()
+    finally:
+        client.close()
+
+    report = next(report for report in server.reports if report.match_id == match_id)
+    assert report.clients == 1
+    assert report.finished
+    assert (tick, winner) == (report.ticks, report.winner)
+    # Acknowledged inputs were applied by the server
+    assert client.stats.latencies
+
+
+def test_lan_client_is_refused_by_server(server_address):
+    address, _ = server_address
+    with pytest.raises(ConnectionError, match="protocol version 1"):
+        NetClient.connect(address, "Ann", timeout=5.0)
+
+
+def test_state_decoder_follows_the_encoded_match(game):
+    from main import LabyRunGame
+
+    game.settings.set_maze_size(11, 11)
+    game.settings.events_enabled = True
+    game.settings.teleport_enabled = True
+    game.game_state.run_game()
+    # A second game seeded alike shows the match, like a NetClient
+    client = LabyRunGame(headless=True, seed=1)
+    apply_settings_snapshot(client, settings_snapshot(game.settings))
+    client.game_state.run_game()
+
+    encoder = StateEncoder(game)
+    encoder.reset()
+    decoder = StateDecoder(client)
+    decoder.reset()
+    controllers = [RandomWalkController(seed) for seed in range(2)]
+    while game.game_state.get_current_state() == "running" and game.engine.tick < 3000:
+        for player, controller in zip(game.players, controllers):
+            player.set_input(controller.get_input(player, game.engine.tick))
+        game.engine.step()
+
+        tick, _ = decoder.apply(encoder.encode(game.engine.tick))
+        assert tick == game.engine.tick
+        for player, shown in zip(game.players, client.players):
+            assert abs(shown.x - player.x) <= 0.5 / POSITION_SCALE
+            assert abs(shown.y - player.y) <= 0.5 / POSITION_SCALE
+            assert (shown.width, shown.height) == (player.width, player.height)
+            assert (shown.frozen, shown.reversed_controls) == (
+                player.frozen,
+                player.reversed_controls,
+            )
+        assert client.maze.collider.grid == game.maze.collider.grid
+        assert [power_up.active for power_up in client.maze.power_ups] == [
+            power_up.active for power_up in game.maze.power_ups
+        ]
+        assert [type(event) for event in client.event_manager.active_events] == [
+            type(event) for event in game.event_manager.active_events
+        ]
+
+
+@pytest.mark.parametrize(
+    "header",
+    [
+        # TCP: a varint length of 1 GiB
+        b"\x80\x80\x80\x80\x04",
+        # WebSocket: a masked binary frame of 1 TiB after the handshake
+        b"GET / HTTP/1.1\r\nUpgrade: websocket\r\nSec-WebSocket-Key: "
+        b"dGhlIHNhbXBsZSBub25jZQ==\r\n\r\n\x82\xff" + (1 << 40).to_bytes(8, "big"),
+    ],
+)
+def test_server_closes_connections_sending_oversized_messages(server_address, header):
+    address, _ = server_address
+    host, port = address.rsplit(":", 1)
+    with socket.create_connection((host, int(port)), timeout=5.0) as connection:
+        connection.sendall(header)
+        # The server closes the connection instead of waiting for the message, only
+        # the WebSocket handshake's response arrives before
+        while connection.recv(4096):
+            pass
@@ -0,0 +1,74 @@
+"""
+Tests of the power-ups of the game.
+"""
+
+from powerups.powerups import Enlarge, SlowDown, SpeedBoost
+
+
+def expire_until(game, tick):
+    game.engine.tick = tick
+    game.powerup_manager.update(tick)
+
+
+def test_overlapping_speed_effects_expire_on_their_own(game):
+    game.game_state.run_game()
+    player1, player2 = game.players
+    base_speed = player1.speed
+    block = game.settings.block_size
+    duration = game.engine.ticks(game.settings.power_up_duration)
+
+    SpeedBoost(game, 0, 0, block).apply_effect(player1)
+    expire_until(game, 10)
+    # Picked up by player 2, slows down its opponent
+    SlowDown(game, 0, 0, block).apply_effect(player2)
+    assert player1.speed == base_speed * 1.5 * 0.5
+
+    expire_until(game, duration)
+    assert player1.speed == base_speed * 0.5
+    assert player2.speed == base_speed
+
+    expire_until(game, duration + 10)
+    assert player1.speed == base_speed
+    assert len(player1.effects) == 0
+
+
+def test_resizing_moves_the_previous_position_along(game):
+    game.game_state.run_game()
+    player1, player2 = game.players
+    player1.prev_x, player1.prev_y = player1.x - 2, player1.y
+
+    # Picked up by player 2, enlarges its opponent
+    Enlarge(game, 0, 0, game.settings.block_size).apply_effect(player2)
+    assert player1.width > game.settings.player_width
+    assert (player1.x - player1.prev_x, player1.y - player1.prev_y) == (2, 0)
+
+
+def test_power_up_of_the_same_kind_refreshes_the_effect(game):
+    player1, _ = game.players
+    base_speed = player1.speed
+    block = game.settings.block_size
+    duration = game.engine.ticks(game.settings.power_up_duration)
+
+    SpeedBoost(game, 0, 0, block).apply_effect(player1)
+    expire_until(game, 10)
+    SpeedBoost(game, 0, 0, block).apply_effect(player1)
+    assert player1.speed == base_speed * 1.5
+    assert len(game.powerup_manager.scheduler) == 1  # The first expiry is cancelled
+
+    expire_until(game, duration)
+    assert player1.speed == base_speed * 1.5
+    expire_until(game, duration + 10)
+    assert player1.speed == base_speed
+
+
+def test_refreshing_after_a_restore_cancels_the_restored_expiry(game):
+    player1, _ = game.players
+    base_speed = player1.speed
+    block = game.settings.block_size
+    manager = game.powerup_manager
+
+    SpeedBoost(game, 0, 0, block).apply_effect(player1)
+    manager.load_state(manager.save_state())
+    SpeedBoost(game, 0, 0, block).apply_effect(player1)
+    assert len(manager.scheduler) == 1
+    assert player1.speed == base_speed * 1.5
@@ -0,0 +1,57 @@
+"""
+Tests of recording, replaying and rewinding matches.
+"""
+
+from engine.controllers import RandomWalkController
+from engine.headless import HeadlessRunner
+from engine.replay import Replay, ReplayPlayer, ReplayRecorder
+from engine.snapshots import SnapshotRing
+
+
+def record_match(game):
+    """
+    Records a headless match of random walkers, with the events and every power-up on so
+    that the replay covers all of the rules. Returns its Replay.
+    """
+    game.settings.set_maze_size(11, 11)
+    game.settings.events_enabled = True
+    game.settings.teleport_enabled = True
+    game.engine.recorder = ReplayRecorder("replays")
+    controllers = [RandomWalkController(seed) for seed in range(2)]
+    HeadlessRunner(game, controllers, max_ticks=3000).run()
+    replay = Replay.load(game.engine.recorder.last_path)
+    game.engine.recorder = None
+    return replay
+
+
+def test_recorded_match_replays_to_the_same_state(game, capsys):
+    replay = record_match(game)
+    assert replay.inputs
+
+    game.run_replay(replay)
+    assert game.engine.tick == replay.end_tick
+    output = capsys.readouterr().out
+    assert f"Replay finished at tick {replay.end_tick}, state matches" in output
+
+
+def test_rewound_replay_ends_in_the_same_state(game, capsys):
+    replay = record_match(game)
+
+    engine = game.engine
+    engine.snapshots = SnapshotRing(game)
+    engine.replay = ReplayPlayer(replay)
+    replay.apply_settings(game)
+    game.game_state.run_game()
+
+    # Rewinds three times, spread over the match
+    rewinds = [replay.end_tick // 4, replay.end_tick // 2, replay.end_tick * 3 // 4]
+    while game.game_state.get_current_state() == "running":
+        engine.step()
+        if rewinds and engine.tick == rewinds[0]:
+            ticks = 60 + 50 * len(rewinds)
+            engine.rewind(ticks)
+            assert engine.tick == rewinds.pop(0) - ticks
+    assert not rewinds
+
+    output = capsys.readouterr().out
+    assert f"Replay finished at tick {replay.end_tick}, state matches" in output
@@ -0,0 +1,160 @@
+"""
+Tests of the pygame-free simulation core.
+"""
+
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+from simulation import Bot, SimConfig, Simulation, find_opponent, generate_map
+from simulation.fields import UNREACHABLE, DistanceField, win_columns, win_rows
+from simulation.physics import GridCollider
+from simulation.simulation import POWER_UP_TYPES, START_CORNERS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_import_leaves_pygame_out():
+    code = "import sys, simulation; sys.exit('pygame' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=False)
+    assert result.returncode == 0, "importing simulation loaded pygame"
+
+
+def test_more_players_race_on_four_quadrants():
+    config = SimConfig(maze_width=11, maze_height=11, player_count=5, max_ticks=6000)
+    sim = Simulation(config)
+    sim.reset(3)
+    assert (len(sim.grid), len(sim.grid[0])) == (25, 25)
+    assert [player.corner for player in sim.players][:4] == START_CORNERS
+    assert sim.players[4].corner == START_CORNERS[0]
+
+    bots = [Bot() for _ in sim.players]
+    while not sim.step(*(bot(sim, player) for bot, player in zip(bots, sim.players))):
+        pass
+    assert sim.winner in range(1, 6)
+
+
+def test_nearest_floor_updates_match_a_rebuild():
+    grid = generate_map(11, 11, 5)
+    collider = GridCollider(grid, 16)
+    collider.nearest_floor(0, 0)
+    rng = random.Random(5)
+    for _ in range(200):
+        col, row = rng.randrange(collider.cols), rng.randrange(collider.rows)
+        collider.set_cell(col, row, rng.randrange(2))
+
+    rebuilt = GridCollider([row[:] for row in grid], 16)
+    for row in range(collider.rows):
+        for col in range(collider.cols):
+            assert collider.nearest_floor(col, row) == rebuilt.nearest_floor(col, row)
+
+
+def test_distance_field_updates_match_a_rebuild():
+    grid = generate_map(11, 11, 7, quadrants=True)
+    columns, rows = win_columns(len(grid[0])), win_rows(len(grid))
+    field = DistanceField(grid, columns, rows)
+    rng = random.Random(7)
+    for _ in range(200):
+        col = rng.randrange(1, field.cols - 1)
+        row = rng.randrange(1, field.rows - 1)
+        if grid[row][col] == 1:
+            grid[row][col] = 0
+            field.open_cell(col, row)
+        else:
+            grid[row][col] = 1
+            field.close_cell(col, row)
+
+    rebuilt = DistanceField([line[:] for line in grid], columns, rows)
+    assert field.distances == rebuilt.distances
+
+
+def test_opponent_is_the_one_closest_to_the_win_zone():
+    grid = generate_map(11, 11, 7, quadrants=True)
+    field = DistanceField(grid, win_columns(len(grid[0])), win_rows(len(grid)))
+    floors = sorted(
+        (field.distance(col, row), (col, row))
+        for row in range(field.rows)
+        for col in range(field.cols)
+        if field.distance(col, row) > 0
+    )
+    far, near = floors[-1][1], floors[0][1]
+    wall = next(
+        (col, row)
+        for row in range(field.rows)
+        for col in range(field.cols)
+        if field.distance(col, row) == UNREACHABLE
+    )
+
+    assert find_opponent(0, [far, far, near, wall], field) == 2
+    assert find_opponent(2, [wall, far, near, far], field) == 1
+    assert find_opponent(0, [near, wall], field) == 1
+
+
+@pytest.mark.parametrize("player_count", [2, 4])
+def test_batch_simulation_matches_simulation(player_count):
+    np = pytest.importorskip("numpy")
+    from simulation.vector import BatchSimulation
+
+    config = SimConfig(
+        maze_width=11,
+        maze_height=11,
+        player_count=player_count,
+        max_ticks=2000,
+        power_up_types=POWER_UP_TYPES,
+    )
+    batch = BatchSimulation(8, config)
+    batch.reset(range(8))
+    sims = [Simulation(config) for _ in range(8)]
+    for seed, sim in enumerate(sims):
+        sim.reset(seed)
+
+    # Inputs held for 10 ticks, so that players travel and pick up power-ups
+    rng = np.random.default_rng(player_count)
+    inputs = np.repeat(rng.integers(0, 16, size=(200, 8, player_count)), 10, axis=0)
+    for tick_inputs in inputs:
+        batch.step(tick_inputs)
+        for env, sim in enumerate(sims):
+            sim.step(*tick_inputs[env].tolist())
+            assert [(player.x, player.y, player.width) for player in sim.players] == list(
+                zip(batch.x[env], batch.y[env], batch.size[env])
+            )
+            assert (sim.winner or 0) == batch.winner[env]
+    assert any(not power_up.active for sim in sims for power_up in sim.power_ups)
+
+
+@pytest.mark.parametrize("player_count", [2, 4])
+def test_simulation_matches_the_game(game, player_count):
+    from engine.controllers import RandomWalkController
+
+    settings = game.settings
+    settings.set_player_count(player_count)
+    settings.set_maze_size(11, 11)
+    settings.events_enabled = True
+    for kind in POWER_UP_TYPES:
+        setattr(settings, f"{kind}_enabled", True)
+    game.game_state.run_game()
+    sim = Simulation(SimConfig.from_settings(settings, max_ticks=3000))
+    sim.reset(game.engine.seed)
+
+    numbers = range(1, player_count + 1)
+    game.engine.bots = {number: RandomWalkController(number) for number in numbers}
+    walkers = [RandomWalkController(number) for number in numbers]
+    offset_x, offset_y = game.maze.offset_x, game.maze.offset_y
+    while not sim.done:
+        game.engine.step()
+        sim.step(*(walker.get_input(None, sim.tick + 1) for walker in walkers))
+        assert [
+            (player.x - offset_x, player.y - offset_y, player.width, player.speed)
+            for player in game.players
+        ] == [(player.x, player.y, player.width, player.speed) for player in sim.players]
+        assert game.maze.maze == sim.grid
+        assert [power_up.active for power_up in game.maze.power_ups] == [
+            power_up.active for power_up in sim.power_ups
+        ]
+
+    winner = game.game_state.winner
+    assert sim.winner == (winner.player_number if winner else None)
+    assert any(not power_up.active for power_up in sim.power_ups)
@@ -2,4 +2,8 @@
 This module provides utility classes and functions for the game.
 """
 
-from .settings import Settings
+from .fonts import TextCache, get_font, render_text, text_cache
+from .sampling import SamplingProfiler
+from .settings import MAX_PLAYERS, Settings
+from .startup import StartupTimer
+from .tracing import Tracer, tracer
@@ -0,0 +1,58 @@
+"""
+This module contains the shared font registry and a cache of rendered text surfaces, so
+labels that do not change are rendered once instead of every frame.
+"""
+
+from collections import OrderedDict
+
+import pygame
+
+_fonts = {}
+
+
+def get_font(name, size):
+    """
+    Returns the system font with the given name and size, loading it on first use.
+    """
+    key = (name, size)
+    font = _fonts.get(key)
+    if font is None:
+        font = pygame.font.SysFont(name, size)
+        _fonts[key] = font
+    return font
+
+
+class TextCache:
+    """
+    Least recently used cache of text surfaces, keyed by (font, text, color).
+    The returned surfaces are shared and must not be modified.
+    """
+
+    def __init__(self, capacity=512):
+        self.capacity = capacity
+        self.surfaces = OrderedDict()
+
+    def render(self, font, text, color):
+        """Returns the antialiased text rendered with the font and color."""
+        key = (font, text, tuple(color))
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = font.render(text, True, color)
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.capacity:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(key)
+        return surface
+
+    def clear(self):
+        """Drops all cached surfaces."""
+        self.surfaces.clear()
+
+
+text_cache = TextCache()
+
+
+def render_text(font, text, color):
+    """Renders text through the shared cache."""
+    return text_cache.render(font, text, color)
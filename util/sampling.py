@@ -0,0 +1,92 @@
+"""
+This module contains a sampling profiler that periodically reads the main thread's stack
+from a background thread. Unlike cProfile it does not slow down every function call, so
+the game keeps its real frame rate while being profiled.
+
+The result is written in the collapsed-stack format ("frame;frame;frame count" per line)
+read by flamegraph.pl, speedscope and inferno.
+"""
+
+import atexit
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+DEFAULT_PROFILE_FILE = ".data/profile.folded"
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of the thread that created it every `interval` seconds.
+    """
+
+    def __init__(self, path=DEFAULT_PROFILE_FILE, interval=0.005):
+        self.path = path
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+
+        self._target = threading.get_ident()
+        self._labels = {}  # Code object -> frame label
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="sampling-profiler", daemon=True
+        )
+
+    def start(self):
+        """Starts sampling; the profile is written when the program exits."""
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Stops sampling and writes the collapsed stacks."""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join()
+        self.save()
+
+    def _run(self):
+        next_sample = time.perf_counter()
+        while not self._stop.is_set():
+            frame = sys._current_frames().get(self._target)
+            if frame is None:
+                break
+            self.stacks[self._collapse(frame)] += 1
+            self.samples += 1
+            del frame
+
+            next_sample += self.interval
+            delay = next_sample - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_sample = time.perf_counter()  # Fell behind, do not burst
+
+    def _collapse(self, frame):
+        """Returns the stack as a ;-separated string, outermost frame first."""
+        labels = []
+        while frame is not None:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                filename = os.path.basename(code.co_filename)
+                label = f"{code.co_name} ({filename}:{code.co_firstlineno})"
+                self._labels[code] = label
+            labels.append(label)
+            frame = frame.f_back
+        return ";".join(reversed(labels))
+
+    def save(self, path=None):
+        """Writes the collapsed stacks to path."""
+        path = path or self.path
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as file:
+                for stack, count in self.stacks.most_common():
+                    file.write(f"{stack} {count}\n")
+            print(f"Profile with {self.samples} samples written to {path}")
+        except IOError as e:
+            print(f"Error saving profile: {str(e)}")
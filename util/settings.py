@@ -2,6 +2,8 @@
 This module contains the Settings class.
 """
 
+from simulation.simulation import MAX_PLAYERS, START_CORNERS
+
 
 class Settings:
     """
@@ -22,9 +24,18 @@ class Settings:
         self.screen_width = main.screen.get_width()
         self.screen_height = main.screen.get_height()
 
-        # players colors
-        self.player1_color = (255, 0, 255)
-        self.player2_color = (255, 0, 255)
+        # players, more than two race on a map of four quadrants
+        self.player_count = 2
+        self.player_colors = [
+            (255, 0, 255),
+            (255, 0, 255),
+            (0, 170, 170),
+            (0, 0, 230),
+            (140, 70, 0),
+            (120, 120, 0),
+            (0, 110, 0),
+            (100, 100, 100),
+        ]
 
         # labyrinth colors
         self.wall_color = (0, 0, 0)
@@ -41,12 +52,17 @@ class Settings:
         self._calculate_block_size()
 
         # Oblicz bezpośrednio pozycje początkowe graczy (bez zależności od maze)
-        self.player1_initial_position = self._calculate_player1_position()
-        self.player2_initial_position = self._calculate_player2_position()
+        self.player_initial_positions = []
+        self.calculate_initial_positions()
 
         # Ustawienie mgły wojny
         self.fog_of_war_enabled = False
 
+        # Shortest way of each player to the win zone, toggled with H during a match
+        self.hints_enabled = False
+        self.hint_color = (60, 140, 230)
+        self.hint_alpha = 150
+
         # Ustawienie power-upów
         self.power_up_duration = 5000
 
@@ -72,13 +88,19 @@ class Settings:
         self.fatigue_enabled = True  # Fatigue event
         self.invisiblewalls_enabled = True  # Invisible Walls event
 
+        # Simulation runs at a fixed rate, rendering is capped separately
+        self.tick_rate = 60  # Simulation steps per second
+        self.max_fps = 60  # Upper bound for rendered frames per second
+        self.max_steps_per_frame = 5  # Catch-up limit after a long frame
+        self.menu_idle_timeout = 1000  # Longest sleep while waiting for menu input (ms)
+
     def _calculate_block_size(self):
         """
         Calculates the block size based on the screen size and maze dimensions.
         """
+        map_width, map_height = self._map_size()
         self.block_size = min(
-            self.screen_width // (self.maze_width * 2 + 3),
-            self.screen_height // self.maze_height,
+            self.screen_width // map_width, self.screen_height // map_height
         )
 
         self.player_width = self.block_size // 2
@@ -87,65 +109,73 @@ class Settings:
         self.player_speed = self.block_size // 8
         self.default_speed = self.player_speed
 
-    def _calculate_player1_position(self):
+    def _map_size(self):
         """
-        Calculates the starting position of player 1 (bottom left corner of the maze).
+        Returns the width and height of the map in blocks: two mirrored mazes with a
+        connector between them, stacked twice on maps with four quadrants.
         """
-        # Oblicz pozycję labiryntu
-        maze_width = (
-            self.maze_width * 2 + 3
-        )  # Szerokość po uwzględnieniu odbicia i łącznika
-        maze_height = self.maze_height
-
-        offset_x = (self.screen_width - maze_width * self.block_size) // 2
-        offset_y = (self.screen_height - maze_height * self.block_size) // 2
-
-        # Lewy dolny róg (dodaj 1.5 bloku od lewej, odejmij 2 bloki od dołu)
-        left_x = offset_x + 1.5 * self.block_size - self.player_width // 2
-        left_y = (
-            offset_y
-            + maze_height * self.block_size
-            - 2 * self.block_size
-            + self.player_height // 2
-        )
-
-        return (left_x, left_y)
-
-    def _calculate_player2_position(self):
+        map_width = self.maze_width * 2 + 3
+        map_height = self.maze_height * 2 + 3 if self.quadrant_map else self.maze_height
+        return map_width, map_height
+
+    @property
+    def quadrant_map(self):
+        """Whether the map has four quadrants, as it does for more than two players."""
+        return self.player_count > 2
+
+    @property
+    def middle(self):
+        """The middle of the screen in pixels, where the map is centered."""
+        return self.screen_width // 2, self.screen_height // 2
+
+    @staticmethod
+    def player_corner(index):
         """
-        Oblicza pozycję startową gracza 2 (prawy dolny róg labiryntu).
+        Returns the start corner of the player with the given index as (right, bottom).
         """
-        # Oblicz pozycję labiryntu
-        maze_width = (
-            self.maze_width * 2 + 3
-        )  # Szerokość po uwzględnieniu odbicia i łącznika
-        maze_height = self.maze_height
-
-        offset_x = (self.screen_width - maze_width * self.block_size) // 2
-        offset_y = (self.screen_height - maze_height * self.block_size) // 2
-
-        # Prawy dolny róg (odejmij 2 bloki od prawej, odejmij 2 bloki od dołu)
-        right_x = (
-            offset_x
-            + maze_width * self.block_size
-            - 2 * self.block_size
-            + self.player_width // 2
-        )
-        right_y = (
-            offset_y
-            + maze_height * self.block_size
-            - 2 * self.block_size
-            + self.player_height // 2
-        )
+        return START_CORNERS[index % len(START_CORNERS)]
 
-        return (right_x, right_y)
+    def _calculate_player_position(self, corner):
+        """
+        Calculates the starting position of a player in the given corner of the map.
+        """
+        right, bottom = corner
+        map_width, map_height = self._map_size()
+
+        offset_x = (self.screen_width - map_width * self.block_size) // 2
+        offset_y = (self.screen_height - map_height * self.block_size) // 2
+
+        # The player touches the walls of the corner, 1.5 blocks from the map's edges
+        if right:
+            x = offset_x + map_width * self.block_size - 2 * self.block_size
+            x += self.player_width // 2
+        else:
+            x = offset_x + 1.5 * self.block_size - self.player_width // 2
+        if bottom:
+            y = offset_y + map_height * self.block_size - 2 * self.block_size
+            y += self.player_height // 2
+        else:
+            y = offset_y + 1.5 * self.block_size - self.player_height // 2
+
+        return (x, y)
 
     def calculate_initial_positions(self):
         """
         Aktualizuje pozycje początkowe graczy (np. po zmianie rozmiaru labiryntu).
         """
-        self.player1_initial_position = self._calculate_player1_position()
-        self.player2_initial_position = self._calculate_player2_position()
+        self.player_initial_positions = [
+            self._calculate_player_position(self.player_corner(index))
+            for index in range(self.player_count)
+        ]
+
+    def set_player_count(self, count):
+        """
+        Sets the number of players.
+        """
+        if not 2 <= count <= MAX_PLAYERS:
+            raise ValueError(f"Number of players must be between 2 and {MAX_PLAYERS}.")
+        self.player_count = count
+        self.set_maze_size(self.maze_width, self.maze_height)
 
     def set_maze_size(self, width, height):
         """
@@ -159,6 +189,5 @@ class Settings:
         if hasattr(self.main, "engine"):
             self.main.engine.update_win_zone()
 
-        if hasattr(self.main, "player1") and hasattr(self.main, "player2"):
-            self.main.player1.reset()
-            self.main.player2.reset()
+        if hasattr(self.main, "players"):
+            self.main.update_players()
@@ -0,0 +1,46 @@
+"""
+This module contains the StartupTimer class, which breaks down the time from constructing
+the game to its first drawn frame.
+"""
+
+import time
+
+
+class StartupTimer:
+    """
+    Records the duration of each startup phase. The last phase ends when the first frame
+    has been drawn.
+    """
+
+    def __init__(self, verbose=False):
+        self.verbose = verbose  # Print the breakdown once the first frame is drawn
+        self.start = time.perf_counter()
+        self.last = self.start
+        self.phases = []  # (name, seconds)
+        self.finished = False
+
+    def mark(self, phase):
+        """Ends the given phase, which started when the previous one ended."""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def frame_drawn(self):
+        """Called after every drawn frame; completes the timing on the first one."""
+        if self.finished:
+            return
+        self.mark("first frame")
+        self.finished = True
+        if self.verbose:
+            print(self)
+
+    @property
+    def total(self):
+        """Seconds from the start to the end of the last recorded phase."""
+        return self.last - self.start
+
+    def __str__(self):
+        lines = [f"Time to first frame: {self.total * 1000:.1f} ms"]
+        for phase, duration in self.phases:
+            lines.append(f"  {phase:<16} {duration * 1000:8.1f} ms")
+        return "\n".join(lines)
@@ -0,0 +1,153 @@
+"""
+This module contains an opt-in tracer that records nested spans into a ring buffer and
+writes them in the Chrome trace-event format, which Perfetto and chrome://tracing open.
+
+Tracing is enabled by setting the LABYRUN_TRACE environment variable to the output path
+(or to 1 for the default path) or with the --trace command line flag.
+"""
+
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+TRACE_ENV_VAR = "LABYRUN_TRACE"
+DEFAULT_TRACE_FILE = ".data/trace.json"
+
+
+class _NullSpan:
+    """Span used while tracing is disabled, it does nothing."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """Records its duration into the tracer when the with-block ends."""
+
+    __slots__ = ("events", "name", "args", "start")
+
+    def __init__(self, events, name, args):
+        self.events = events
+        self.name = name
+        self.args = args
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter_ns()
+        self.events.append(
+            (self.name, self.start, end - self.start, threading.get_ident(), self.args)
+        )
+        return False
+
+
+class Tracer:
+    """
+    Collects spans while enabled. Only the last `capacity` spans are kept, so a long
+    session can be traced without running out of memory.
+    """
+
+    def __init__(self, capacity=200_000):
+        self.enabled = False
+        self.path = None
+        self.events = deque(maxlen=capacity)
+        self._registered = False
+
+    def enable(self, path=DEFAULT_TRACE_FILE):
+        """Starts recording; the trace is written to path when the program exits."""
+        self.enabled = True
+        self.path = path
+        if not self._registered:
+            atexit.register(self.save)
+            self._registered = True
+
+    def span(self, name, **args):
+        """Returns a context manager recording the time spent inside it as a span."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self.events, name, args)
+
+    def traced(self, name=None):
+        """Decorator recording every call of the function as a span."""
+
+        def decorator(function):
+            span_name = name or function.__qualname__
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                with _Span(self.events, span_name, None):
+                    return function(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def save(self, path=None):
+        """Writes the recorded spans as a Chrome trace-event JSON file."""
+        path = path or self.path
+        if path is None:
+            return
+
+        pid = os.getpid()
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        trace_events = [
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": pid,
+                "args": {"name": "LabyRun"},
+            }
+        ]
+        for tid in {event[3] for event in self.events}:
+            trace_events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": pid,
+                    "tid": tid,
+                    "args": {"name": thread_names.get(tid, str(tid))},
+                }
+            )
+
+        for name, start, duration, tid, args in self.events:
+            event = {
+                "name": name,
+                "ph": "X",
+                "ts": start / 1000,  # The format uses microseconds
+                "dur": duration / 1000,
+                "pid": pid,
+                "tid": tid,
+            }
+            if args:
+                event["args"] = args
+            trace_events.append(event)
+
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as file:
+                json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, file)
+            print(f"Trace with {len(self.events)} spans written to {path}")
+        except IOError as e:
+            print(f"Error saving trace: {str(e)}")
+
+
+tracer = Tracer()
+
+if os.environ.get(TRACE_ENV_VAR):
+    _path = os.environ[TRACE_ENV_VAR]
+    tracer.enable(DEFAULT_TRACE_FILE if _path == "1" else _path)